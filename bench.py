@@ -0,0 +1,586 @@
+"""Micro-benchmarks for the simulation hot paths (headless, no OpenGL).
+
+    python bench.py collision
+    python bench.py collision --game project_1st_part --bullets 5000
+    python bench.py bullets --per-tick 60
+    python bench.py crossover --enemies 4 --bullets 1 4 16 64 256
+    python bench.py enemies --enemies 100 500
+    python bench.py steering --enemies 1 4 16 64
+    python bench.py entities --count 10000
+    python bench.py spawn --wave 10000
+    python bench.py placement --enemies 10 100 1000
+    python bench.py pathfinding --enemies 10 100 500
+    python bench.py separation --enemies 100 1000 4000
+"""
+import argparse
+import heapq
+import math
+import random
+import statistics
+import time
+import tracemalloc
+
+import numpy as np
+
+import headless
+from entities import Enemy, Player
+from flow_field import DIAGONAL, FlowField, ObstacleGrid
+from spawn_placement import SpawnPlacer
+from spawn_pool import SpawnPool
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def median_seconds(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def make_enemy(game, world, x, z, type_id=1):
+    archetype = game.get_enemy_archetype(world, type_id)
+    enemy = Enemy(archetype, [x, archetype.model_height/2, z])
+    enemy.health = 10**9
+    return enemy
+
+
+def add_enemy(world, enemy, shoot_cooldown=1.0):
+    """Register enemy with the world the way spawn_enemy does."""
+    world.enemy_batch.add(enemy, enemy.archetype.speed, enemy.archetype.reload_time, shoot_cooldown)
+    world.enemies.append(enemy)
+
+
+def scatter_bullets(game, count, rng):
+    bullets = []
+    for _ in range(count):
+        dx, dz = rng.uniform(-1, 1), rng.uniform(-1, 1)
+        length = (dx*dx + dz*dz) ** 0.5 or 1.0
+        bullets.append(([rng.uniform(1, game.DUNGEON_SIZE_X-1), rng.uniform(0.5, 2.0),
+                         rng.uniform(1, game.DUNGEON_SIZE_Z-1)], [dx/length, 0.0, dz/length]))
+    return bullets
+
+
+def brute_force_hits(game, world, radius_of):
+    """The pre-grid O(bullets x enemies) test, kept here as the baseline."""
+    hits = 0
+    for bullet_pos in world.bullets.pos[:world.bullets.count].tolist():
+        for enemy in world.enemies:
+            if game.distance_3d(bullet_pos, enemy.pos) < radius_of(enemy):
+                hits += 1
+                break
+    return hits
+
+
+def bench_collision(game_name='project', enemy_counts=(10, 100, 1000), bullet_count=5000, repeat=7, seed=1):
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    headless.reset_game(game, world, seed=seed)
+    if game_name == 'project':
+        radius_of = lambda enemy: enemy.archetype.collision_radius + game.BULLET_RADIUS
+    else:
+        radius_of = lambda enemy: enemy.archetype.collision_radius * 1.5
+    rng = random.Random(seed)
+    shots = scatter_bullets(game, bullet_count, rng)
+    rows = []
+    for n in enemy_counts:
+        enemies = [make_enemy(game, world, rng.uniform(2, game.DUNGEON_SIZE_X-2), rng.uniform(2, game.DUNGEON_SIZE_Z-2))
+                   for _ in range(n)]
+
+        def reset():
+            world.enemies.clear()
+            world.enemy_batch.clear()
+            for enemy in enemies:
+                add_enemy(world, enemy)
+            world.bullets.clear()
+            for pos, direction in shots:
+                game.create_bullet(world, pos, direction, 'PLAYER', 1)
+
+        def tick():
+            reset()
+            game.update_bullets(world, 0.0)
+
+        reset_cost = median_seconds(reset, repeat)
+        grid_cost = median_seconds(tick, repeat) - reset_cost
+        reset()
+        brute_cost = median_seconds(lambda: brute_force_hits(game, world, radius_of), max(1, repeat // 3))
+        rows.append((n, grid_cost, brute_cost))
+    print(f"{game_name}: {bullet_count} live player bullets")
+    print(f"{'enemies':>8} {'grid ms/tick':>14} {'brute ms/tick':>14} {'speedup':>8}")
+    for n, grid_cost, brute_cost in rows:
+        print(f"{n:>8} {grid_cost*1000:>14.2f} {brute_cost*1000:>14.2f} {brute_cost/max(grid_cost, 1e-9):>7.1f}x")
+    return rows
+
+
+def bench_bullet_churn(game_name='project', bullets_per_tick=60, ticks=2000, timestep=1/60.0, seed=1):
+    """Rapid-fire style load: spawn, integrate and expire bullets every tick, report tick-time spread."""
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    headless.reset_game(game, world, seed=seed)
+    rng = random.Random(seed)
+    shots = scatter_bullets(game, bullets_per_tick, rng)
+    samples = []
+    for _ in range(ticks):
+        for pos, direction in shots:
+            game.create_bullet(world, pos, direction, 'PLAYER', 1)
+        start = time.perf_counter()
+        game.update_bullets(world, timestep)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    pct = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))] * 1000
+    print(f"{game_name}: {bullets_per_tick} new bullets/tick, {world.bullets.count} live at end")
+    print(f"update_bullets ms/tick  p50 {pct(0.5):.3f}  p95 {pct(0.95):.3f}  p99 {pct(0.99):.3f}  max {samples[-1]*1000:.3f}")
+    return samples
+
+
+def bench_bullet_crossover(game_name='project', enemy_count=4, bullet_counts=(1, 2, 4, 8, 16, 32, 64, 128, 256),
+                           repeat=200, timestep=1/60.0, seed=1):
+    """update_bullets per tick on the per-bullet and the NumPy path, at the bullet counts a level actually
+    reaches and beyond; the game's BULLET_ARRAY_THRESHOLD sits where the arrays start to win."""
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    headless.reset_game(game, world, seed=seed)
+    rng = random.Random(seed)
+    world.enemies.clear()
+    world.enemy_batch.clear()
+    for _ in range(enemy_count):
+        add_enemy(world, make_enemy(game, world, rng.uniform(2, game.DUNGEON_SIZE_X-2), rng.uniform(2, game.DUNGEON_SIZE_Z-2)))
+    print(f"{game_name}: {enemy_count} live wolves, threshold {game.BULLET_ARRAY_THRESHOLD}")
+    print(f"{'bullets':>8} {'scalar us/tick':>15} {'arrays us/tick':>15} {'faster':>8}")
+    rows = []
+    bullets = world.bullets
+    for n in bullet_counts:
+        bullets.clear()
+        for k, (pos, direction) in enumerate(scatter_bullets(game, n, rng)):
+            game.create_bullet(world, pos, direction, 'PLAYER' if k % 2 else 'ENEMY', 0)
+        saved = [arr[:n].copy() for arr in bullets._arrays()]
+
+        def reset():
+            for arr, rows in zip(bullets._arrays(), saved):
+                arr[:n] = rows
+            bullets.count = n
+
+        def per_tick(update):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                reset()
+                if update:
+                    update(world, timestep)
+            return (time.perf_counter() - start) / repeat
+
+        reset_cost = min(per_tick(None) for _ in range(5))
+        costs = [min(per_tick(update) for _ in range(5)) - reset_cost
+                 for update in (game.update_bullets_scalar, game.update_bullets_arrays)]
+        rows.append((n, *costs))
+        print(f"{n:>8} {costs[0]*1e6:>15.1f} {costs[1]*1e6:>15.1f} {'scalar' if costs[0] < costs[1] else 'arrays':>8}")
+    return rows
+
+
+def bench_enemies(game_name='project', enemy_counts=(10, 100, 500, 1000), ticks=300, timestep=1/60.0, seed=1):
+    """Per-tick cost of update_enemies (steering, facing, clamping, firing) with n live wolves."""
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    rng = random.Random(seed)
+    print(f"{game_name}: update_enemies")
+    print(f"{'enemies':>8} {'ms/tick':>10} {'ticks/s':>10}")
+    rows = []
+    for n in enemy_counts:
+        headless.reset_game(game, world, seed=seed)
+        world.enemies_spawned_this_level = world.level_configs[world.current_level]['total_enemies'] # no spawning
+        for _ in range(n):
+            enemy = make_enemy(game, world, rng.uniform(2, game.DUNGEON_SIZE_X-2), rng.uniform(2, game.DUNGEON_SIZE_Z-2))
+            add_enemy(world, enemy, rng.uniform(0.0, 2.0))
+        start = time.perf_counter()
+        for _ in range(ticks):
+            game.update_enemies(world, timestep)
+        cost = (time.perf_counter() - start) / ticks
+        world.bullets.clear()
+        rows.append((n, cost))
+        print(f"{n:>8} {cost*1000:>10.3f} {1/cost:>10.0f}")
+    return rows
+
+
+def bench_steering_crossover(game_name='project', enemy_counts=(1, 2, 4, 8, 16, 32, 64, 128), ticks=300,
+                             timestep=1/60.0, seed=1):
+    """update_enemies per tick with EnemyBatch.step forced onto the per-enemy and the array path, from the
+    few wolves a level's max_concurrent allows upwards; ARRAY_STEP_THRESHOLD sits where the arrays start to win."""
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    batch = world.enemy_batch
+    default = batch.array_threshold
+    print(f"{game_name}: update_enemies, threshold {default}")
+    print(f"{'enemies':>8} {'per-enemy us/tick':>18} {'arrays us/tick':>15} {'faster':>8}")
+    rows = []
+    for n in enemy_counts:
+        costs = []
+        for threshold in (math.inf, 0):
+            rng = random.Random(seed)
+            headless.reset_game(game, world, seed=seed)
+            batch.array_threshold = threshold
+            world.enemies_spawned_this_level = world.level_configs[world.current_level]['total_enemies'] # no spawning
+            for _ in range(n):
+                enemy = make_enemy(game, world, rng.uniform(2, game.DUNGEON_SIZE_X-2), rng.uniform(2, game.DUNGEON_SIZE_Z-2))
+                add_enemy(world, enemy, rng.uniform(0.0, 2.0))
+            start = time.perf_counter()
+            for _ in range(ticks):
+                game.update_enemies(world, timestep)
+            costs.append((time.perf_counter() - start) / ticks)
+            world.bullets.clear()
+        batch.array_threshold = default
+        rows.append((n, *costs))
+        print(f"{n:>8} {costs[0]*1e6:>18.1f} {costs[1]*1e6:>15.1f} {'scalar' if costs[0] < costs[1] else 'arrays':>8}")
+    return rows
+
+
+def dict_enemy(game, world, x, z, type_id=1):
+    """The pre-slots layout: every per-type field copied into each enemy dict."""
+    config = game.get_enemy_definition(world, type_id)
+    return {
+        'pos': [x, config['model_height']/2, z], 'enemy_type_id': type_id,
+        'max_health': config['health'], 'health': config['health'], 'damage': config['damage'],
+        'points': config['points'], 'color': list(config['color']), 'model_height': config['model_height'],
+        'collision_radius': game.ENEMY_BASE_COLLISION_RADIUS*(config['model_height']/1.8),
+        'is_boss': config.get('is_boss', False),
+    }
+
+
+def dict_player(game):
+    return {
+        'pos': [game.DUNGEON_SIZE_X/2, game.PLAYER_BODY_Y_OFFSET, game.DUNGEON_SIZE_Z/2],
+        'rotation_y': 0.0, 'rotation_x': 0.0, 'health': game.PLAYER_MAX_HEALTH, 'score': 0, 'speed': game.PLAYER_SPEED,
+        'shoot_cooldown': 0.0, 'current_shoot_cooldown_time': game.PLAYER_BASE_SHOOT_COOLDOWN_TIME,
+        'kills_for_health_perk': 0, 'kills_for_score_perk': 0, 'kills_for_gun_perk': 0,
+        'health_perk_available': False, 'score_perk_available': False, 'gun_perk_available': False,
+        'score_perk_active_until': 0, 'gun_perk_active_until': 0,
+    }
+
+
+def slots_player(game):
+    return Player([game.DUNGEON_SIZE_X/2, game.PLAYER_BODY_Y_OFFSET, game.DUNGEON_SIZE_Z/2],
+                  game.PLAYER_MAX_HEALTH, game.PLAYER_SPEED, game.PLAYER_BASE_SHOOT_COOLDOWN_TIME)
+
+
+def bytes_per_object(build, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [build() for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del objects
+    return used / count
+
+
+def bench_entities(game_name='project', count=10000, repeat=7, seed=1):
+    """Memory per entity and hot-path field access, dicts against the slotted entities."""
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    headless.reset_game(game, world, seed=seed)
+    rng = random.Random(seed)
+    spots = [(rng.uniform(2, game.DUNGEON_SIZE_X-2), rng.uniform(2, game.DUNGEON_SIZE_Z-2)) for _ in range(count)]
+    it = iter(spots * 2)
+    enemy_bytes = (bytes_per_object(lambda: dict_enemy(game, world, *next(it)), count),
+                   bytes_per_object(lambda: make_enemy(game, world, *next(it)), count))
+    player_bytes = (bytes_per_object(lambda: dict_player(game), count), bytes_per_object(lambda: slots_player(game), count))
+    # A bullet used to be a dict like this; now it is one row of the pool's arrays
+    bullet_dict = lambda: {'pos': [1.0, 1.0, 1.0], 'dir': [0.0, 0.0, 1.0], 'owner': 'PLAYER', 'damage': 1,
+                           'lifespan': 3.0, 'color': [1.0, 1.0, 0.0]}
+    pool = world.bullets
+    bullet_bytes = (bytes_per_object(bullet_dict, count), sum(a.itemsize * (a.size // len(a)) for a in pool._arrays()))
+
+    dict_enemies = [dict_enemy(game, world, x, z) for x, z in spots]
+    slot_enemies = [make_enemy(game, world, x, z) for x, z in spots]
+    for enemy in slot_enemies:
+        enemy.health = 3
+
+    def hit_dicts():
+        score = 0
+        for e in dict_enemies:
+            e['health'] = 3
+            if e['pos'][0] >= 0.0 and e['health'] > 0:
+                e['health'] -= 1
+                score += e['points'] * (e['collision_radius'] > 0)
+        return score
+
+    def hit_slots():
+        score = 0
+        for e in slot_enemies:
+            e.health = 3
+            if e.pos[0] >= 0.0 and e.health > 0:
+                e.health -= 1
+                archetype = e.archetype
+                score += archetype.points * (archetype.collision_radius > 0)
+        return score
+
+    dp, sp = dict_player(game), slots_player(game)
+
+    def tick_dict_player():
+        p = dp
+        for _ in range(count):
+            p['shoot_cooldown'] = max(0.0, p['shoot_cooldown'] - 0.016)
+            if p['gun_perk_active_until'] > 0 and p['score'] >= 0:
+                p['rotation_y'] += 1.0
+
+    def tick_slots_player():
+        p = sp
+        for _ in range(count):
+            p.shoot_cooldown = max(0.0, p.shoot_cooldown - 0.016)
+            if p.gun_perk_active_until > 0 and p.score >= 0:
+                p.rotation_y += 1.0
+
+    rows = [
+        ('enemy', enemy_bytes, median_seconds(hit_dicts, repeat), median_seconds(hit_slots, repeat)),
+        ('player', player_bytes, median_seconds(tick_dict_player, repeat), median_seconds(tick_slots_player, repeat)),
+        ('bullet', bullet_bytes, None, None),
+    ]
+    print(f"{game_name}: {count} entities")
+    print(f"{'type':>8} {'dict B':>8} {'new B':>8} {'dict ns/op':>11} {'new ns/op':>10}")
+    for name, (old_b, new_b), old_t, new_t in rows:
+        timing = f"{old_t/count*1e9:>11.1f} {new_t/count*1e9:>10.1f}" if old_t is not None else f"{'-':>11} {'-':>10}"
+        print(f"{name:>8} {old_b:>8.0f} {new_b:>8.0f} {timing}")
+    print("(bullet 'new' is bytes per BulletPool row; bullets have no per-bullet objects)")
+    return rows
+
+
+def bench_spawn_pool(wave_sizes=(16, 1000, 10000), seed=1):
+    """Drain a boss wave: the old per-wolf list (filter, choice, remove) against SpawnPool."""
+    print(f"{'wave':>8} {'list us/spawn':>14} {'pool us/spawn':>14}")
+    rows = []
+    for size in wave_sizes:
+        types = ['boss'] + [1]*(size//3) + [2]*(size//3) + [3]*(size - 1 - 2*(size//3))
+
+        def drain_list():
+            rng = random.Random(seed)
+            pool = list(types)
+            pool.remove('boss')
+            while pool:
+                candidates = [t for t in pool if t != 'boss']
+                pool.remove(rng.choice(candidates))
+
+        def drain_pool():
+            rng = random.Random(seed)
+            pool = SpawnPool(types, priority=('boss',))
+            pool.take('boss')
+            while pool.draw(rng) is not None:
+                pass
+
+        old_t = median_seconds(drain_list, 3) if size <= 20000 else None
+        new_t = median_seconds(drain_pool, 3)
+        rows.append((size, old_t, new_t))
+        old = f"{old_t/size*1e6:>14.2f}" if old_t is not None else f"{'-':>14}"
+        print(f"{size:>8} {old} {new_t/size*1e6:>14.2f}")
+    return rows
+
+
+def bench_spawn_placement(game_name='project', enemy_counts=(10, 100, 1000), tries=200, seed=1):
+    """Find a spawn spot among n enemies: the old 20 random guesses against the occupancy grid.
+
+    Also counts how often each finds a spot when one exists, since a failed guess run
+    postpones the spawn to a later tick.
+    """
+    game = headless.load_game(game_name)
+    margin, player_dist, enemy_dist = game.SPAWN_MARGIN, 15.0, 5.0
+    hi_x, hi_z = game.DUNGEON_SIZE_X - margin, game.DUNGEON_SIZE_Z - margin
+    player = (game.DUNGEON_SIZE_X/2, game.DUNGEON_SIZE_Z/2)
+    placer = SpawnPlacer(margin, margin, hi_x, hi_z, game.SPAWN_CELL_SIZE)
+    print(f"{game_name}: {tries} placements per row")
+    print(f"{'enemies':>8} {'guess us':>10} {'found':>6} {'grid us':>10} {'found':>6}")
+    rows = []
+    for count in enemy_counts:
+        rng = random.Random(seed)
+        enemies = [(rng.uniform(margin, hi_x), rng.uniform(margin, hi_z)) for _ in range(count)]
+
+        def guess():
+            found = 0
+            for _ in range(tries):
+                for _ in range(20):
+                    x, z = rng.uniform(margin, hi_x), rng.uniform(margin, hi_z)
+                    if math.dist((x, z), player) >= player_dist and \
+                            all(math.dist((x, z), e) >= enemy_dist for e in enemies):
+                        found += 1
+                        break
+            return found
+
+        def grid():
+            found = 0
+            for _ in range(tries):
+                placer.reset()
+                placer.block([player], player_dist)
+                placer.block(enemies, enemy_dist)
+                found += placer.sample(rng) is not None
+            return found
+
+        guess_t, guess_found = timed(guess)
+        grid_t, grid_found = timed(grid)
+        rows.append((count, guess_t, guess_found, grid_t, grid_found))
+        print(f"{count:>8} {guess_t/tries*1e6:>10.1f} {guess_found:>6} {grid_t/tries*1e6:>10.1f} {grid_found:>6}")
+    return rows
+
+
+def astar(grid, start, goal):
+    """Length of the shortest path from cell start to cell goal (octile heuristic), inf if none."""
+    rows = grid.rows
+    gi, gj = divmod(goal, rows)
+
+    def estimate(cell):
+        di, dj = divmod(cell, rows)
+        di, dj = abs(di - gi), abs(dj - gj)
+        return max(di, dj) + (DIAGONAL - 1.0) * min(di, dj)
+
+    best = {start: 0.0}
+    heap = [(estimate(start), 0.0, start)]
+    while heap:
+        _, d, cell = heapq.heappop(heap)
+        if cell == goal:
+            return d
+        if d > best[cell]:
+            continue
+        for other, cost in grid.neighbours[cell]:
+            nd = d + cost
+            if nd < best.get(other, math.inf):
+                best[other] = nd
+                heapq.heappush(heap, (nd + estimate(other), nd, other))
+    return math.inf
+
+
+def bench_pathfinding(game_name='project', enemy_counts=(10, 100, 500), repeat=5, seed=1):
+    """Route n enemies to the player once: one A* search each against one flow field rebuild plus a lookup each."""
+    game = headless.load_game(game_name)
+    grid = ObstacleGrid(game.DUNGEON_SIZE_X, game.DUNGEON_SIZE_Z, game.FLOW_CELL_SIZE, game.DUNGEON_OBSTACLES)
+    field = FlowField(grid)
+    rng = random.Random(seed)
+    print(f"{game_name}: {grid.cols}x{grid.rows} cells, {len(grid.boxes)} obstacles")
+    print(f"{'enemies':>8} {'A* ms':>10} {'field ms':>10} {'speedup':>8}")
+    rows = []
+    for count in enemy_counts:
+        spots = []
+        while len(spots) < count + 1:
+            x, z = rng.uniform(0, game.DUNGEON_SIZE_X), rng.uniform(0, game.DUNGEON_SIZE_Z)
+            if not grid.blocked.flat[grid.cell_index(x, z)]:
+                spots.append((x, z))
+        (px, pz), enemies = spots[0], spots[1:]
+        goal = int(grid.cell_index(px, pz))
+        cells = [int(grid.cell_index(x, z)) for x, z in enemies]
+        xs, zs = (np.array(axis) for axis in zip(*enemies))
+
+        def per_enemy():
+            for cell in cells:
+                astar(grid, cell, goal)
+
+        def flow():
+            field.goals = None # Force the rebuild a player changing cells triggers
+            field.update(px, pz)
+            field.sample(xs, zs)
+
+        astar_t, field_t = median_seconds(per_enemy, repeat), median_seconds(flow, repeat)
+        rows.append((count, astar_t, field_t))
+        print(f"{count:>8} {astar_t*1e3:>10.2f} {field_t*1e3:>10.2f} {astar_t/field_t:>7.1f}x")
+    return rows
+
+
+def overlapping_pairs(batch):
+    """Pairs of live enemies whose collision circles overlap (brute force, for scoring only)."""
+    slots = batch.live_slots()
+    p, r = batch.pos[slots], batch.collision_radius[slots]
+    gap = np.hypot(p[:, None, 0] - p[:, 0], p[:, None, 2] - p[:, 2]) - (r[:, None] + r)
+    return int(np.count_nonzero(np.triu(gap < 0, 1)))
+
+
+def bench_separation(game_name='project', enemy_counts=(100, 1000, 4000), ticks=120, timestep=1/60.0, seed=1):
+    """Wolves dropped in a crowd around the player: update_enemies cost and overlapping pairs left after
+    ticks steps, with and without separation steering. us/wolf should stay flat as the crowd grows."""
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    index = world.enemy_neighbours
+    print(f"{game_name}: {ticks} ticks, k={game.ENEMY_SEPARATION_NEIGHBOURS}, radius {index.radius}")
+    print(f"{'enemies':>8} {'plain us/wolf':>14} {'overlaps':>9} {'sep us/wolf':>12} {'overlaps':>9}")
+    rows = []
+    for n in enemy_counts:
+        row = [n]
+        for neighbours in (None, index):
+            rng = random.Random(seed)
+            headless.reset_game(game, world, seed=seed)
+            world.enemy_neighbours = neighbours
+            world.enemies_spawned_this_level = world.level_configs[world.current_level]['total_enemies'] # no spawning
+            spread = math.sqrt(n) # About one wolf per square unit: heavily stacked
+            cx, cz = world.player.pos[0], world.player.pos[2]
+            for _ in range(n):
+                x = min(max(cx + rng.uniform(-spread, spread), 1.0), game.DUNGEON_SIZE_X - 1.0)
+                z = min(max(cz + rng.uniform(-spread, spread), 1.0), game.DUNGEON_SIZE_Z - 1.0)
+                add_enemy(world, make_enemy(game, world, x, z), rng.uniform(0.0, 2.0))
+            start = time.perf_counter()
+            for _ in range(ticks):
+                game.update_enemies(world, timestep)
+            cost = (time.perf_counter() - start) / ticks
+            world.bullets.clear()
+            row += [cost, overlapping_pairs(world.enemy_batch)]
+        world.enemy_neighbours = index
+        rows.append(tuple(row))
+        print(f"{n:>8} {row[1]/n*1e6:>14.2f} {row[2]:>9} {row[3]/n*1e6:>12.2f} {row[4]:>9}")
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulation micro-benchmarks")
+    sub = parser.add_subparsers(dest='bench', required=True)
+    p = sub.add_parser('collision', help="bullet-vs-enemy cost per tick")
+    p.add_argument('--game', default='project')
+    p.add_argument('--bullets', type=int, default=5000)
+    p.add_argument('--enemies', type=int, nargs='+', default=[10, 100, 1000])
+    p = sub.add_parser('bullets', help="bullet pool churn under sustained fire")
+    p.add_argument('--game', default='project')
+    p.add_argument('--per-tick', type=int, default=60)
+    p.add_argument('--ticks', type=int, default=2000)
+    p = sub.add_parser('crossover', help="update_bullets per-bullet vs NumPy path by bullet count")
+    p.add_argument('--game', default='project')
+    p.add_argument('--enemies', type=int, default=4)
+    p.add_argument('--bullets', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64, 128, 256])
+    p = sub.add_parser('enemies', help="enemy steering/firing cost per tick")
+    p.add_argument('--game', default='project')
+    p.add_argument('--enemies', type=int, nargs='+', default=[10, 100, 500, 1000])
+    p = sub.add_parser('steering', help="EnemyBatch.step per-enemy vs array path by enemy count")
+    p.add_argument('--game', default='project')
+    p.add_argument('--enemies', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64, 128])
+    p = sub.add_parser('entities', help="memory and field-access cost: dicts vs slotted entities")
+    p.add_argument('--game', default='project')
+    p.add_argument('--count', type=int, default=10000)
+    p = sub.add_parser('spawn', help="boss-wave spawn pool draws: list vs counted multiset")
+    p.add_argument('--wave', type=int, nargs='+', default=[16, 1000, 10000])
+    p = sub.add_parser('placement', help="spawn placement: random guesses vs occupancy grid")
+    p.add_argument('--game', default='project')
+    p.add_argument('--enemies', type=int, nargs='+', default=[10, 100, 1000])
+    p = sub.add_parser('pathfinding', help="routing enemies around obstacles: per-enemy A* vs one flow field")
+    p.add_argument('--game', default='project')
+    p.add_argument('--enemies', type=int, nargs='+', default=[10, 100, 500])
+    p = sub.add_parser('separation', help="separation steering: cost per wolf and overlaps left in a crowd")
+    p.add_argument('--game', default='project')
+    p.add_argument('--enemies', type=int, nargs='+', default=[100, 1000, 4000])
+    args = parser.parse_args(argv)
+    if args.bench == 'collision':
+        bench_collision(args.game, tuple(args.enemies), args.bullets)
+    elif args.bench == 'bullets':
+        bench_bullet_churn(args.game, args.per_tick, args.ticks)
+    elif args.bench == 'crossover':
+        bench_bullet_crossover(args.game, args.enemies, tuple(args.bullets))
+    elif args.bench == 'enemies':
+        bench_enemies(args.game, tuple(args.enemies))
+    elif args.bench == 'steering':
+        bench_steering_crossover(args.game, tuple(args.enemies))
+    elif args.bench == 'entities':
+        bench_entities(args.game, args.count)
+    elif args.bench == 'spawn':
+        bench_spawn_pool(tuple(args.wave))
+    elif args.bench == 'placement':
+        bench_spawn_placement(args.game, tuple(args.enemies))
+    elif args.bench == 'pathfinding':
+        bench_pathfinding(args.game, tuple(args.enemies))
+    elif args.bench == 'separation':
+        bench_separation(args.game, tuple(args.enemies))
+
+
+if __name__ == "__main__": main()
@@ -0,0 +1,151 @@
+"""Preallocated structure-of-arrays bullet storage.
+
+Live bullets occupy rows [0, count) of each array. Removal swaps survivors from the
+tail into the holes, so bullet order is not stable across culls; ids holds a serial
+per bullet that moves with its row, for code that follows bullets across ticks.
+"""
+import math
+
+import numpy as np
+
+OWNER_PLAYER = 0
+OWNER_ENEMY = 1
+
+
+class BulletPool:
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.next_id = 0
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.pos = np.zeros((capacity, 3))
+        self.dir = np.zeros((capacity, 3))
+        self.color = np.zeros((capacity, 3))
+        self.lifespan = np.zeros(capacity)
+        self.damage = np.zeros(capacity, dtype=np.int32)
+        self.owner = np.zeros(capacity, dtype=np.int8)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.shooter = np.zeros(capacity, dtype=np.int32) # Player.number of the hero who fired a player bullet
+
+    def _arrays(self):
+        return (self.pos, self.dir, self.color, self.lifespan, self.damage, self.owner, self.ids, self.shooter)
+
+    def _reserve(self, extra):
+        needed = self.count + extra
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        old, n = self._arrays(), self.count
+        self._allocate(capacity)
+        for dst, src in zip(self._arrays(), old):
+            dst[:n] = src[:n]
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, pos, direction, owner, damage, lifespan, color, shooter=0):
+        self._reserve(1)
+        i = self.count
+        self.pos[i] = pos
+        self.dir[i] = direction
+        self.color[i] = color
+        self.lifespan[i] = lifespan
+        self.damage[i] = damage
+        self.owner[i] = owner
+        self.shooter[i] = shooter
+        self.ids[i] = self.next_id
+        self.next_id += 1
+        self.count += 1
+        return i
+
+    def spawn_many(self, pos, direction, owner, damage, lifespan, color, shooter=0):
+        """Append a batch; pos/direction are (k, 3) arrays, the rest broadcast."""
+        k = len(pos)
+        if k == 0:
+            return
+        self._reserve(k)
+        s = slice(self.count, self.count + k)
+        self.pos[s] = pos
+        self.dir[s] = direction
+        self.color[s] = color
+        self.lifespan[s] = lifespan
+        self.damage[s] = damage
+        self.owner[s] = owner
+        self.shooter[s] = shooter
+        self.ids[s] = np.arange(self.next_id, self.next_id + k)
+        self.next_id += k
+        self.count += k
+
+    def integrate(self, delta_time, speed):
+        n = self.count
+        self.pos[:n] += self.dir[:n] * (speed * delta_time)
+        self.lifespan[:n] -= delta_time
+
+    def interpolated_pos(self, alpha, speed, tick_dt):
+        """Live positions rewound to alpha of the way through the last tick (motion is linear)."""
+        n = self.count
+        return self.pos[:n] + self.dir[:n] * (speed * tick_dt * (alpha - 1.0))
+
+    def out_of_bounds(self, lo, hi):
+        """Mask of live bullets outside the open box lo < pos < hi (per-axis bounds)."""
+        p = self.pos[:self.count]
+        return ((p <= lo) | (p >= hi)).any(axis=1)
+
+    def cull(self, mask):
+        """Remove live bullets where mask is True by moving tail survivors into the holes."""
+        n = self.count
+        keep = n - int(np.count_nonzero(mask))
+        if keep == n:
+            return
+        holes = np.flatnonzero(mask[:keep])
+        survivors = np.flatnonzero(~mask[keep:n]) + keep
+        for arr in self._arrays():
+            arr[holes] = arr[survivors]
+        self.count = keep
+
+    def remove(self, i):
+        last = self.count - 1
+        if i != last:
+            for arr in self._arrays():
+                arr[i] = arr[last]
+        self.count = last
+
+
+def sweep_spheres(start, travel, centers, radii):
+    """First-contact parameter t in [0, 1] of each segment start + t*travel against its sphere, inf on a miss.
+
+    Rows are paired: segment k is tested against centers[k]/radii[k] (radii may be a scalar).
+    A segment that starts inside its sphere hits at t = 0.
+    """
+    m = start - centers
+    a = (travel * travel).sum(axis=1)
+    b = (m * travel).sum(axis=1)
+    c = (m * m).sum(axis=1) - np.square(radii)
+    disc = b * b - a * c
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (-b - np.sqrt(np.maximum(disc, 0.0))) / a
+    crossing = (a > 0) & (disc >= 0) & (t >= 0) & (t <= 1)
+    return np.where(c < 0, 0.0, np.where(crossing, t, np.inf))
+
+
+def sweep_sphere(start, travel, center, radius):
+    """sweep_spheres for one segment on plain floats (3-sequences), for code looping over a few bullets."""
+    mx, my, mz = start[0] - center[0], start[1] - center[1], start[2] - center[2]
+    tx, ty, tz = travel
+    c = mx*mx + my*my + mz*mz - radius*radius
+    if c < 0:
+        return 0.0
+    a = tx*tx + ty*ty + tz*tz
+    b = mx*tx + my*ty + mz*tz
+    disc = b*b - a*c
+    if a <= 0 or disc < 0:
+        return math.inf
+    t = (-b - math.sqrt(disc)) / a
+    return t if 0 <= t <= 1 else math.inf
@@ -0,0 +1,349 @@
+"""Campaign files: levels, waves and enemy archetypes loaded from JSON or TOML.
+
+A campaign source is validated once and compiled into a binary cache next to it
+(<source>.cache) that records the source's modification time, size and SHA-256. A later
+launch whose source still has that mtime and size uses the cache without reading the
+source at all; otherwise the source is hashed, and only a changed digest means parsing
+and validating it again. Levels sit in the cache as separate JSON records behind an
+offset table and are decoded the first time they are played, so startup does not grow
+with the number of levels. The cache holds plain data only, never pickles, so a
+tampered cache can at worst describe odd levels.
+
+    {
+      "enemies": {
+        "1":    {"name": "Type1Wolf", "health": 3, "damage": 3, "speed_mult": 0.4,
+                 "model_height": 1.5, "color": [0.6, 0.5, 0.4], "points": 10},
+        "boss": {"name": "BossWolf", "health": 15, "damage": 7, "speed_mult": 0.8,
+                 "model_height": 2.5, "color": [0.3, 0.3, 0.3], "points": 100, "is_boss": true}
+      },
+      "levels": [
+        {"max_concurrent": 2, "waves": [{"type": 1, "count": 6}]},
+        {"max_concurrent_boss_phase": 3, "is_boss_level": true,
+         "waves": [{"type": "boss", "count": 1}, {"type": 1, "count": 5}],
+         "colors": {"1": [0.9, 0.4, 0.3]}}
+      ]
+    }
+
+A level lists its spawns either as "enemy_types" (one entry per wolf) or as "waves";
+"total_enemies" defaults to the number of spawns and "colors" overrides archetype
+colors for that level only. As with the built-in tables, a boss level draws from its
+spawn list until it is empty and any other level repeats its first type. Numeric enemy keys become ints, like the built-in type ids.
+
+    python campaign.py check campaign.json
+    python campaign.py export project_1st_part campaign.json   (the built-in levels)
+"""
+import argparse
+import hashlib
+import json
+import os
+import struct
+import time
+
+try:
+    import tomllib # Python 3.11+
+except ImportError:
+    tomllib = None
+
+CACHE_MAGIC = b'DCMP'
+CACHE_VERSION = 2
+# magic, version, source mtime (ns), source size, source sha256, level count, enemies record length
+CACHE_HEADER = struct.Struct('<4sBqQ32sII')
+
+ENEMY_FIELDS = {'name': str, 'health': int, 'damage': int, 'speed_mult': (int, float),
+                'model_height': (int, float), 'color': list, 'points': int}
+LEVEL_KEYS = {'total_enemies', 'max_concurrent', 'max_concurrent_boss_phase', 'enemy_types', 'waves', 'is_boss_level',
+              'colors'}
+
+
+class CampaignError(ValueError):
+    pass
+
+
+def _type_id(key):
+    return int(key) if isinstance(key, str) and key.isdigit() else key
+
+
+def _check_type(t, where):
+    if not isinstance(t, (int, str)) or isinstance(t, bool):
+        raise CampaignError(f"{where}: enemy type {t!r} must be a name or an integer")
+    return _type_id(t)
+
+
+def _check_color(color, where):
+    if not (isinstance(color, list) and len(color) == 3 and
+            all(isinstance(c, (int, float)) and 0.0 <= c <= 1.0 for c in color)):
+        raise CampaignError(f"{where}: color must be three numbers in [0, 1]")
+    return [float(c) for c in color]
+
+
+def validate(raw):
+    """Check a parsed campaign and normalise it to (enemies, levels) with int type ids and expanded waves."""
+    if not isinstance(raw, dict):
+        raise CampaignError("campaign must be a table with 'enemies' and 'levels'")
+    if not isinstance(raw.get('enemies'), dict) or not raw['enemies']:
+        raise CampaignError("'enemies' must be a non-empty table")
+    if not isinstance(raw.get('levels'), list) or not raw['levels']:
+        raise CampaignError("'levels' must be a non-empty list")
+    enemies = {}
+    for key, definition in raw['enemies'].items():
+        where = f"enemies.{key}"
+        if not isinstance(definition, dict):
+            raise CampaignError(f"{where} must be a table")
+        for field, kind in ENEMY_FIELDS.items():
+            if field not in definition:
+                raise CampaignError(f"{where}: missing '{field}'")
+            if not isinstance(definition[field], kind) or isinstance(definition[field], bool):
+                raise CampaignError(f"{where}.{field} has the wrong type")
+        if definition['health'] <= 0 or definition['speed_mult'] <= 0 or definition['model_height'] <= 0:
+            raise CampaignError(f"{where}: health, speed_mult and model_height must be positive")
+        clean = {field: definition[field] for field in ENEMY_FIELDS}
+        clean['color'] = _check_color(definition['color'], where)
+        if definition.get('is_boss'):
+            clean['is_boss'] = True
+        enemies[_type_id(key)] = clean
+    levels = []
+    for number, level in enumerate(raw['levels'], 1):
+        where = f"levels[{number}]"
+        if not isinstance(level, dict):
+            raise CampaignError(f"{where} must be a table")
+        unknown = set(level) - LEVEL_KEYS
+        if unknown:
+            raise CampaignError(f"{where}: unknown keys {sorted(unknown)}")
+        if ('enemy_types' in level) == ('waves' in level):
+            raise CampaignError(f"{where}: give exactly one of 'enemy_types' or 'waves'")
+        if 'waves' in level:
+            if not isinstance(level['waves'], list):
+                raise CampaignError(f"{where}.waves must be a list")
+            types = []
+            for wave in level['waves']:
+                if not (isinstance(wave, dict) and 'type' in wave and isinstance(wave.get('count'), int) and wave['count'] > 0):
+                    raise CampaignError(f"{where}: each wave needs a 'type' and a positive 'count'")
+                types += [_check_type(wave['type'], f"{where}.waves")] * wave['count']
+        else:
+            if not isinstance(level['enemy_types'], list):
+                raise CampaignError(f"{where}.enemy_types must be a list")
+            types = [_check_type(t, f"{where}.enemy_types") for t in level['enemy_types']]
+        if not types:
+            raise CampaignError(f"{where}: no enemies to spawn")
+        missing = {t for t in types if t not in enemies}
+        if missing:
+            raise CampaignError(f"{where}: undefined enemy types {sorted(map(str, missing))}")
+        config = {'total_enemies': level.get('total_enemies', len(types)), 'enemy_types': types}
+        if not isinstance(config['total_enemies'], int) or config['total_enemies'] < 1:
+            raise CampaignError(f"{where}: total_enemies must be a positive integer")
+        # A boss level spends its spawn list; other levels keep spawning their first type up to total_enemies
+        if level.get('is_boss_level') and config['total_enemies'] > len(types):
+            raise CampaignError(f"{where}: total_enemies exceeds the boss level's {len(types)} spawns")
+        # Boss levels cap spawns by the boss-phase limit while the boss lives (max_concurrent afterwards, default 1)
+        required = 'max_concurrent_boss_phase' if level.get('is_boss_level') else 'max_concurrent'
+        for limit_key in ('max_concurrent', 'max_concurrent_boss_phase'):
+            if limit_key not in level and limit_key != required:
+                continue
+            if not isinstance(level.get(limit_key), int) or level[limit_key] < 1:
+                raise CampaignError(f"{where}: '{limit_key}' must be a positive integer")
+            config[limit_key] = level[limit_key]
+        if level.get('is_boss_level'):
+            config['is_boss_level'] = True
+        if 'colors' in level:
+            if not isinstance(level['colors'], dict):
+                raise CampaignError(f"{where}.colors must be a table")
+            config['colors'] = {}
+            for key, color in level['colors'].items():
+                if _type_id(key) not in enemies:
+                    raise CampaignError(f"{where}.colors: undefined enemy type {key}")
+                config['colors'][_type_id(key)] = _check_color(color, f"{where}.colors.{key}")
+        levels.append(config)
+    return enemies, levels
+
+
+def parse_source(path, data):
+    if path.endswith('.toml'):
+        if tomllib is None:
+            raise CampaignError("TOML campaigns need Python 3.11+ (tomllib); use JSON instead")
+        return tomllib.loads(data.decode('utf-8'))
+    return json.loads(data)
+
+
+def _record(value):
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
+
+
+def encode_level(level):
+    """One validated level config as a JSON record. JSON keys are strings, so colors keyed by type id
+    are stored as [type id, color] pairs."""
+    if 'colors' in level:
+        level = dict(level, colors=[[t, color] for t, color in level['colors'].items()])
+    return _record(level)
+
+
+def decode_level(record):
+    level = json.loads(bytes(record))
+    if 'colors' in level:
+        level['colors'] = {t: color for t, color in level['colors']}
+    return level
+
+
+def compile_cache(stat, digest, enemies, levels):
+    records = [encode_level(level) for level in levels]
+    enemy_record = _record([[t, definition] for t, definition in enemies.items()])
+    offsets, position = [], 0
+    for record in records:
+        offsets.append(position)
+        position += len(record)
+    offsets.append(position)
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, stat.st_mtime_ns, stat.st_size, digest, len(levels),
+                               len(enemy_record))
+    return header + enemy_record + struct.pack(f'<{len(offsets)}Q', *offsets) + b''.join(records)
+
+
+def read_cache(path):
+    """(data, header) of a readable cache file of this version, or (None, None)."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        header = CACHE_HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return None, None
+    if header[:2] != (CACHE_MAGIC, CACHE_VERSION):
+        return None, None
+    return data, header
+
+
+class LevelTable(dict):
+    """level number -> config dict, decoded from the campaign on first access."""
+
+    def __init__(self, campaign, spawn_pool=list):
+        super().__init__()
+        self.campaign = campaign
+        self.spawn_pool = spawn_pool
+
+    def __missing__(self, level):
+        config = self.campaign.level(level)
+        config['enemies_to_spawn_pool'] = self.spawn_pool(config['enemy_types'])
+        self[level] = config
+        return config
+
+
+class Campaign:
+    def __init__(self, path):
+        self.path = path
+        self.cache_path = path + '.cache'
+        stat = os.stat(path)
+        source = None
+        data, header = read_cache(self.cache_path)
+        if header is not None and header[2:4] != (stat.st_mtime_ns, stat.st_size):
+            with open(path, 'rb') as f:
+                source = f.read()
+            if hashlib.sha256(source).digest() == header[4]:
+                # Touched but unchanged (copied, checked out again): only the recorded mtime and size are stale
+                data = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, stat.st_mtime_ns, stat.st_size,
+                                         *header[4:]) + data[CACHE_HEADER.size:]
+                self._write_cache(data)
+            else:
+                data = None
+        self.from_cache = data is not None and self._load(data)
+        if not self.from_cache: # No cache, a stale one, or a corrupt one
+            if source is None:
+                with open(path, 'rb') as f:
+                    source = f.read()
+            try:
+                enemies, levels = validate(parse_source(path, source))
+            except (ValueError, UnicodeDecodeError) as e: # CampaignError, json.JSONDecodeError, tomllib.TOMLDecodeError
+                raise CampaignError(f"{path}: {e}") from e
+            data = compile_cache(stat, hashlib.sha256(source).digest(), enemies, levels)
+            self._write_cache(data)
+            self._load(data)
+
+    def _write_cache(self, data):
+        try:
+            with open(self.cache_path, 'wb') as f:
+                f.write(data)
+        except OSError:
+            pass # Read-only location: the compiled form is still used for this run
+
+    def _load(self, data):
+        """Decode the enemy table and offset table of cache data; False if they do not decode."""
+        level_count, enemy_len = CACHE_HEADER.unpack_from(data)[5:]
+        start = CACHE_HEADER.size
+        try:
+            enemies = {t: definition for t, definition in json.loads(data[start:start + enemy_len])}
+            offsets = struct.unpack_from(f'<{level_count + 1}Q', data, start + enemy_len)
+        except (ValueError, TypeError, struct.error):
+            return False
+        self.level_count, self.enemies, self._offsets = level_count, enemies, offsets
+        self._records = memoryview(data)[start + enemy_len + 8 * (level_count + 1):]
+        return True
+
+    def __deepcopy__(self, memo):
+        return self # Read-only; replay snapshots share it
+
+    def level(self, number):
+        """Fresh config dict for level number (1-based)."""
+        if not 1 <= number <= self.level_count:
+            raise KeyError(number)
+        try:
+            return decode_level(self._records[self._offsets[number - 1]:self._offsets[number]])
+        except (ValueError, TypeError) as e:
+            raise CampaignError(f"{self.cache_path}: corrupt record for level {number} ({e}); delete it to rebuild") from e
+
+    def level_configs(self, spawn_pool=list):
+        """Lazy level table; spawn_pool(enemy_types) builds each level's 'enemies_to_spawn_pool'."""
+        return LevelTable(self, spawn_pool)
+
+    def enemy_definition(self, type_id, level):
+        """Definition dict as get_enemy_definition returns it, with the level's color override applied."""
+        definition = self.enemies.get(type_id)
+        if definition is None:
+            return {}
+        definition = dict(definition)
+        colors = self.level(level).get('colors') if 1 <= level <= self.level_count else None
+        if colors and type_id in colors:
+            definition['color'] = colors[type_id]
+        return definition
+
+
+def export_builtin(game_name, path):
+    """Write a game's hard-coded levels and wolf types as a campaign file."""
+    import headless
+    game = headless.load_game(game_name)
+    world = game.GameWorld()
+    game.init_level_configs(world)
+    type_ids = []
+    for number in range(1, world.max_levels + 1):
+        for t in world.level_configs[number]['enemy_types']:
+            if t not in type_ids:
+                type_ids.append(t)
+    base = {t: game.get_enemy_definition(world, t, 1) for t in type_ids}
+    levels = []
+    for number in range(1, world.max_levels + 1):
+        config = {k: v for k, v in world.level_configs[number].items() if k != 'enemies_to_spawn_pool'}
+        colors = {str(t): game.get_enemy_definition(world, t, number)['color'] for t in set(config['enemy_types'])
+                  if game.get_enemy_definition(world, t, number)['color'] != base[t]['color']}
+        if colors:
+            config['colors'] = colors
+        levels.append(config)
+    with open(path, 'w') as f:
+        json.dump({'enemies': {str(t): d for t, d in base.items()}, 'levels': levels}, f, indent=1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate, compile and export campaign files")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('check', help="validate a campaign and build its cache")
+    p.add_argument('path')
+    p = sub.add_parser('export', help="write a game's built-in levels as a campaign")
+    p.add_argument('game', choices=['project', 'project_1st_part'])
+    p.add_argument('path')
+    args = parser.parse_args(argv)
+    if args.command == 'export':
+        export_builtin(args.game, args.path)
+        print(f"wrote {args.path}")
+        return
+    start = time.perf_counter()
+    campaign = Campaign(args.path)
+    elapsed = time.perf_counter() - start
+    print(f"{args.path}: {campaign.level_count} levels, {len(campaign.enemies)} enemy types "
+          f"({'cache hit' if campaign.from_cache else 'compiled'} in {elapsed*1000:.1f} ms)")
+
+
+if __name__ == "__main__": main()
@@ -0,0 +1,129 @@
+"""Several heroes in one GameWorld, for co-op sessions (server.py).
+
+world.players lists every hero in the dungeon. world.player is players[0], the hero
+the world's own input tables (keys_pressed, special_keys_pressed, mouse_buttons,
+key_presses) drive; the GLUT window and headless.py only ever have that one. Each
+further hero has tables of its own in world.player_inputs, at its index there (the
+entry for hero 0 is None). The game runs its per-hero rules, key presses, movement and
+firing, once per hero with world.player and the world's tables bound to that hero's
+(hero_turns), so those rules still read one hero. The shared rules read world.players:
+wolves chase the hero the flow field reaches them from first (wolf_targets), enemy
+bullets hit whichever standing hero they reach first, and the game is over once no hero
+is standing. A downed hero sits out until the next level starts or restarts, though it
+can still spend a health perk it had earned.
+
+Every hero has a stable number (Player.number). Snapshots name heroes by it, and each
+player bullet carries its shooter's (BulletPool.shooter), so a kill scores for the hero
+who fired.
+"""
+import math
+from types import SimpleNamespace
+
+import numpy as np
+
+from enemy_batch import GOLDEN_ANGLE
+
+INPUT_TABLES = ('keys_pressed', 'special_keys_pressed', 'mouse_buttons', 'key_presses')
+MAX_PLAYERS = 32 # Heroes a replay can tell apart (replay.HERO_SHIFT)
+START_SPACING = 2.0 # Distance from the dungeon centre, where hero 0 starts, to the other heroes' start points
+
+
+def new_inputs():
+    return SimpleNamespace(keys_pressed={}, special_keys_pressed={}, mouse_buttons={}, key_presses=[])
+
+
+def input_tables(world, index):
+    """The object holding hero index's input tables, as attributes named like the world's: the world itself for 0."""
+    return world if index == 0 else world.player_inputs[index]
+
+
+def start_offset(index):
+    """x/z offset of hero index's start point from the dungeon centre."""
+    if index == 0:
+        return 0.0, 0.0
+    angle = index * GOLDEN_ANGLE
+    return START_SPACING * math.sin(angle), START_SPACING * math.cos(angle)
+
+
+def next_number(world):
+    """Number for a hero joining world; never one an earlier hero had (replays tell heroes apart by it)."""
+    world.heroes_joined += 1
+    return world.heroes_joined
+
+
+def find(world, number):
+    """The hero numbered number, or None if it left."""
+    for player in world.players:
+        if player.number == number:
+            return player
+    return None
+
+
+def standing(world):
+    return [player for player in world.players if player.health > 0]
+
+
+def join(world, player):
+    """Add another hero, with empty input tables, to a world that already has its first."""
+    if len(world.players) >= MAX_PLAYERS:
+        raise ValueError(f"a world holds at most {MAX_PLAYERS} heroes")
+    world.players.append(player)
+    world.player_inputs.append(new_inputs())
+
+
+def leave(world, player):
+    """Take a hero out of the world. The last hero stays, letting go of every input; returns False for it."""
+    index = world.players.index(player) # Player has no __eq__, so this is an identity match
+    if len(world.players) == 1:
+        for name in INPUT_TABLES:
+            getattr(world, name).clear()
+        return False
+    if index == 0:
+        # The next hero becomes world.player and its tables the world's own
+        inputs = world.player_inputs[1]
+        for name in INPUT_TABLES:
+            setattr(world, name, getattr(inputs, name))
+        world.player = world.players[1]
+        world.player_inputs[1] = None
+    del world.players[index]
+    del world.player_inputs[index]
+    return True
+
+
+def hero_turns(world, standing_only=False):
+    """Iterate over the heroes (those with health left, if standing_only) with world.player and the world's
+    input tables bound to each one's in turn; both are restored once the loop ends."""
+    players = world.players
+    if len(players) <= 1:
+        if not standing_only or world.player.health > 0:
+            yield world.player
+        return
+    host = world.player
+    own = [getattr(world, name) for name in INPUT_TABLES]
+    try:
+        for player, inputs in list(zip(players, world.player_inputs)):
+            if standing_only and player.health <= 0:
+                continue
+            world.player = player
+            for name, table in zip(INPUT_TABLES, own):
+                setattr(world, name, table if inputs is None else getattr(inputs, name))
+            yield player
+    finally:
+        world.player = host
+        for name, table in zip(INPUT_TABLES, own):
+            setattr(world, name, table)
+
+
+def wolf_targets(world, heroes):
+    """Per enemy_batch slot, the position of the hero that wolf goes for: the nearest along the floor,
+    as the flow field (aimed at heroes, in this order) says, or in a straight line where it reaches none."""
+    batch = world.enemy_batch
+    slots = batch.live_slots()
+    xyz = np.array([hero.pos for hero in heroes], dtype=float)
+    p = batch.pos[slots]
+    field = world.flow_field
+    goal = field.goal_index[field.obstacles.cell_index(p[:, 0], p[:, 2])]
+    straight = np.hypot(p[:, 0, None] - xyz[:, 0], p[:, 2, None] - xyz[:, 2]).argmin(axis=1)
+    targets = np.zeros((len(batch.entities), 3))
+    targets[slots] = xyz[np.where(goal >= 0, goal, straight)]
+    return targets
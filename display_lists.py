@@ -0,0 +1,31 @@
+"""LRU cache of compiled OpenGL display lists for static, immediate-mode models."""
+from collections import OrderedDict
+
+from OpenGL.GL import GL_COMPILE, glCallList, glDeleteLists, glEndList, glGenLists, glNewList
+
+
+class DisplayListCache:
+    def __init__(self, capacity=16):
+        self.capacity = capacity
+        self.lists = OrderedDict() # key -> display list id, least recently used first
+
+    def call(self, key, build, *args):
+        """Replay the list for key, compiling it from build(*args) on first use."""
+        list_id = self.lists.get(key)
+        if list_id is None:
+            list_id = glGenLists(1)
+            glNewList(list_id, GL_COMPILE)
+            build(*args)
+            glEndList()
+            self.lists[key] = list_id
+            if len(self.lists) > self.capacity:
+                _, evicted = self.lists.popitem(last=False)
+                glDeleteLists(evicted, 1)
+        else:
+            self.lists.move_to_end(key)
+        glCallList(list_id)
+
+    def clear(self):
+        for list_id in self.lists.values():
+            glDeleteLists(list_id, 1)
+        self.lists.clear()
@@ -0,0 +1,296 @@
+"""Array-backed enemy state so steering and firing run as a handful of NumPy ops per tick.
+
+Each entities.Enemy stays the game's handle for an enemy, but its pos is a view into a
+row of EnemyBatch.pos and the per-tick fields (speed, cooldowns, facing) live only in
+the batch arrays, indexed by enemy.slot. Slots are stable while an enemy is alive;
+freed slots are reused by later spawns, and a slot's generation counts its spawns so
+(slot, generation) names one enemy for its whole life.
+
+Below ARRAY_STEP_THRESHOLD live enemies, which covers every level's max_concurrent,
+step runs the same rules one enemy at a time on plain floats instead: for a handful
+of wolves the fixed cost of each NumPy call is larger than the work it vectorizes.
+"""
+import math
+
+import numpy as np
+
+ARRAY_STEP_THRESHOLD = 32 # Live enemies from which step uses the array path (bench.py steering)
+GOLDEN_ANGLE = 2.399963 # Radians
+
+
+def _per_slot(player_pos):
+    return isinstance(player_pos, np.ndarray) and player_pos.ndim == 2
+
+
+class EnemyBatch:
+    def __init__(self, capacity=64, array_threshold=ARRAY_STEP_THRESHOLD):
+        self.entities = []
+        self.free_slots = []
+        self.array_threshold = array_threshold
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.active = np.zeros(capacity, dtype=bool)
+        self.pos = np.zeros((capacity, 3))
+        self.prev_pos = np.zeros((capacity, 3)) # Position at the start of the current tick
+        self.speed = np.zeros(capacity)
+        self.shoot_cooldown = np.zeros(capacity)
+        self.reload_time = np.zeros(capacity)
+        self.collision_radius = np.zeros(capacity)
+        self.model_height = np.zeros(capacity)
+        self.damage = np.zeros(capacity, dtype=np.int32)
+        self.rotation_y = np.zeros(capacity)
+        self.color = np.zeros((capacity, 3))
+        self.generation = np.zeros(capacity, dtype=np.uint32)
+
+    def _arrays(self):
+        return (self.active, self.pos, self.prev_pos, self.speed, self.shoot_cooldown, self.reload_time,
+                self.collision_radius, self.model_height, self.damage, self.rotation_y, self.color, self.generation)
+
+    def _grow(self):
+        old, n = self._arrays(), len(self.entities)
+        self._allocate(self.capacity * 2)
+        for dst, src in zip(self._arrays(), old):
+            dst[:n] = src[:n]
+        self.rebind() # Old views point at the discarded arrays
+
+    def rebind(self):
+        """Point every live enemy's pos back at its row (after the arrays were reallocated or copied)."""
+        for slot, enemy in enumerate(self.entities):
+            if enemy is not None:
+                enemy.pos = self.pos[slot]
+
+    def __len__(self):
+        return int(np.count_nonzero(self.active[:len(self.entities)]))
+
+    def clear(self):
+        for slot, enemy in enumerate(self.entities):
+            if enemy is not None:
+                enemy.pos = self.pos[slot].tolist()
+        self.entities = []
+        self.free_slots = []
+        self.active[:] = False
+
+    def add(self, enemy, speed, reload_time, shoot_cooldown):
+        """Register an Enemy; its pos and its archetype's radius, height, damage and color seed the row."""
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.entities[slot] = enemy
+        else:
+            if len(self.entities) == self.capacity:
+                self._grow()
+            slot = len(self.entities)
+            self.entities.append(enemy)
+        archetype = enemy.archetype
+        self.active[slot] = True
+        self.pos[slot] = enemy.pos
+        self.prev_pos[slot] = enemy.pos
+        self.speed[slot] = speed
+        self.reload_time[slot] = reload_time
+        self.shoot_cooldown[slot] = shoot_cooldown
+        self.collision_radius[slot] = archetype.collision_radius
+        self.model_height[slot] = archetype.model_height
+        self.damage[slot] = archetype.damage
+        self.rotation_y[slot] = 0.0
+        self.color[slot] = archetype.color
+        self.generation[slot] += 1
+        enemy.slot = slot
+        enemy.pos = self.pos[slot]
+        return slot
+
+    def remove(self, enemy):
+        slot = enemy.slot
+        if slot is None or slot >= len(self.entities) or self.entities[slot] is not enemy:
+            return
+        enemy.pos = self.pos[slot].tolist() # Detach so a reused slot can't move a dead enemy
+        self.entities[slot] = None
+        self.active[slot] = False
+        self.free_slots.append(slot)
+
+    def live_slots(self):
+        return np.flatnonzero(self.active[:len(self.entities)])
+
+    def snapshot(self):
+        """Remember current positions as the previous tick's, for render interpolation."""
+        n = len(self.entities)
+        self.prev_pos[:n] = self.pos[:n]
+
+    def interpolated_pos(self, alpha):
+        """Positions for every slot, blended alpha of the way from the previous tick to the current one."""
+        n = len(self.entities)
+        return self.prev_pos[:n] + (self.pos[:n] - self.prev_pos[:n]) * alpha
+
+    def step(self, delta_time, player_pos, min_distance, fire_range, size_x, size_z, flow=None,
+             neighbours=None, neighbour_count=6, separation_weight=1.0):
+        """Pursue, face and wall-clamp every live enemy, tick cooldowns. Returns the slots that fire.
+
+        player_pos is the one position every enemy goes for, or an array with a row per slot
+        giving each enemy its own target (a co-op world's heroes, coop.wolf_targets).
+
+        With a flow_field.FlowField aimed at the player, an enemy that cannot see the player
+        walks the field around the obstacles instead, facing its way and holding its fire,
+        and every enemy is pushed back out of any obstacle it walked into.
+
+        With a spatial_grid.NeighbourIndex, each enemy also steers away from its
+        neighbour_count nearest neighbours within the index radius (boids separation),
+        weighted against the pursuit direction; the sum is capped at the enemy's speed.
+        """
+        live = len(self.entities) - len(self.free_slots)
+        if live == 0:
+            return []
+        if live < self.array_threshold:
+            return self._step_each([slot for slot, enemy in enumerate(self.entities) if enemy is not None],
+                                   delta_time, player_pos, min_distance, fire_range, size_x, size_z, flow,
+                                   neighbours, neighbour_count, separation_weight)
+        idx = self.live_slots()
+        p = self.pos[idx]
+        if _per_slot(player_pos):
+            player_pos = player_pos[idx].T
+        dx = player_pos[0] - p[:, 0]
+        dz = player_pos[2] - p[:, 2]
+        dist = np.sqrt(dx*dx + (player_pos[1] - p[:, 1])**2 + dz*dz)
+        flat = np.hypot(dx, dz)
+        in_sight = True
+        moving = dist > min_distance
+        if flow is not None:
+            flow_x, flow_z, in_sight = flow.sample(p[:, 0], p[:, 2])
+            follow = ~in_sight & ((flow_x != 0) | (flow_z != 0))
+            # Scaled to the straight-line distance so dividing by it below gives the unit flow step
+            dx = np.where(follow, flow_x * flat, dx)
+            dz = np.where(follow, flow_z * flat, dz)
+            moving |= follow
+        self.rotation_y[idx] = np.degrees(np.arctan2(dx, dz))
+        moving &= flat > 0
+        unit = np.where(moving, 1.0 / np.where(flat > 0, flat, 1.0), 0.0)
+        vx, vz = dx * unit, dz * unit
+        if neighbours is not None and len(idx) > 1:
+            push_x, push_z = self._separation(p, neighbours, neighbour_count)
+            vx = vx + separation_weight * push_x
+            vz = vz + separation_weight * push_z
+            length = np.hypot(vx, vz)
+            cap = np.where(length > 1.0, 1.0 / np.where(length > 0, length, 1.0), 1.0)
+            vx, vz = vx * cap, vz * cap
+        step = self.speed[idx] * delta_time
+        r = self.collision_radius[idx]
+        p[:, 0] = np.minimum(np.maximum(p[:, 0] + vx*step, r), size_x - r)
+        p[:, 2] = np.minimum(np.maximum(p[:, 2] + vz*step, r), size_z - r)
+        if flow is not None:
+            p[:, 0], p[:, 2] = flow.obstacles.push_out(p[:, 0], p[:, 2], r)
+        self.pos[idx] = p
+        cooldown = self.shoot_cooldown[idx]
+        cooling = cooldown > 0
+        fire = ~cooling & (dist < fire_range) & in_sight
+        self.shoot_cooldown[idx] = np.where(cooling, cooldown - delta_time,
+                                            np.where(fire, self.reload_time[idx], cooldown))
+        return idx[fire]
+
+    @staticmethod
+    def _separation(p, neighbours, k):
+        """Per row of p, the sum of unit pushes away from its k nearest neighbours, each scaled
+        from 1 (touching) down to 0 (at the index radius)."""
+        near, dist = neighbours.k_nearest(p[:, 0], p[:, 2], k)
+        found = near >= 0
+        other = np.where(found, near, 0)
+        away_x = p[:, 0, None] - p[other, 0]
+        away_z = p[:, 2, None] - p[other, 2]
+        # Two enemies on the very same spot split in opposite directions along an angle picked per pair
+        stacked = found & (dist == 0)
+        row = np.arange(len(p))[:, None]
+        angle = (row + other) * GOLDEN_ANGLE
+        side = np.sign(row - other)
+        away_x = np.where(stacked, side * np.cos(angle), away_x)
+        away_z = np.where(stacked, side * np.sin(angle), away_z)
+        length = np.where(stacked, 1.0, dist)
+        weight = np.where(found, (1.0 - dist / neighbours.radius) / np.where(found, length, 1.0), 0.0)
+        return (away_x * weight).sum(axis=1), (away_z * weight).sum(axis=1)
+
+    def _step_each(self, slots, delta_time, player_pos, min_distance, fire_range, size_x, size_z, flow,
+                   neighbours, neighbour_count, separation_weight):
+        """step for a few enemies, one at a time on plain floats; returns the firing slots as a list."""
+        targets = player_pos[slots].tolist() if _per_slot(player_pos) else None
+        px, py, pz = (0.0, 0.0, 0.0) if targets else (float(player_pos[0]), float(player_pos[1]), float(player_pos[2]))
+        pos = [self.pos[slot].tolist() for slot in slots]
+        moves = []
+        for row, (x, y, z) in enumerate(pos):
+            if targets:
+                px, py, pz = targets[row]
+            dx, dz = px - x, pz - z
+            dist = math.sqrt(dx*dx + (py - y)**2 + dz*dz)
+            flat = math.hypot(dx, dz)
+            in_sight = True
+            moving = dist > min_distance
+            if flow is not None:
+                flow_x, flow_z, in_sight = flow.sample_one(x, z)
+                if not in_sight and (flow_x != 0 or flow_z != 0):
+                    dx, dz = flow_x * flat, flow_z * flat
+                    moving = True
+            moves.append((dx, dz, flat, moving and flat > 0, dist, in_sight))
+        push = self._separation_each(pos, neighbours, neighbour_count) if neighbours is not None and len(slots) > 1 else None
+        firing = []
+        for row, slot in enumerate(slots):
+            x, y, z = pos[row]
+            dx, dz, flat, moving, dist, in_sight = moves[row]
+            self.rotation_y[slot] = math.degrees(math.atan2(dx, dz))
+            unit = 1.0 / flat if moving else 0.0
+            vx, vz = dx * unit, dz * unit
+            if push is not None:
+                vx = vx + separation_weight * push[row][0]
+                vz = vz + separation_weight * push[row][1]
+                length = math.hypot(vx, vz)
+                if length > 1.0:
+                    vx, vz = vx * (1.0 / length), vz * (1.0 / length)
+            step = self.speed.item(slot) * delta_time
+            r = self.collision_radius.item(slot)
+            x = min(max(x + vx*step, r), size_x - r)
+            z = min(max(z + vz*step, r), size_z - r)
+            if flow is not None:
+                x, z = flow.obstacles.push_out_one(x, z, r)
+            self.pos[slot] = (x, y, z)
+            cooldown = self.shoot_cooldown.item(slot)
+            if cooldown > 0:
+                self.shoot_cooldown[slot] = cooldown - delta_time
+            elif dist < fire_range and in_sight:
+                self.shoot_cooldown[slot] = self.reload_time.item(slot)
+                firing.append(slot)
+        return firing
+
+    @staticmethod
+    def _separation_each(pos, neighbours, k):
+        """_separation over every pair, for a few enemies: per row of pos, the (x, z) push."""
+        radius = neighbours.radius
+        push = []
+        for row, (x, _, z) in enumerate(pos):
+            near = []
+            for other, (ox, _, oz) in enumerate(pos):
+                if other != row:
+                    dist = math.hypot(ox - x, oz - z)
+                    if dist <= radius:
+                        near.append((dist, other))
+            near.sort()
+            sx = sz = 0.0
+            for dist, other in near[:k]:
+                if dist == 0:
+                    # Two enemies on the very same spot split in opposite directions along an angle picked per pair
+                    angle = (row + other) * GOLDEN_ANGLE
+                    side = 1.0 if row > other else -1.0
+                    away_x, away_z, length = side * math.cos(angle), side * math.sin(angle), 1.0
+                else:
+                    away_x, away_z, length = x - pos[other][0], z - pos[other][2], dist
+                weight = (1.0 - dist / radius) / length
+                sx += away_x * weight
+                sz += away_z * weight
+            push.append((sx, sz))
+        return push
+
+    def muzzle_shots(self, slots, target, gun_offset_ratio):
+        """Start points (gun tip along facing) and unit directions towards target (one point, or a row per slot)."""
+        yaw = np.radians(self.rotation_y[slots])
+        offset = gun_offset_ratio * self.model_height[slots]
+        start = self.pos[slots].copy()
+        start[:, 0] += np.sin(yaw) * offset
+        start[:, 2] += np.cos(yaw) * offset
+        direction = np.asarray(target, dtype=float) - start
+        length = np.linalg.norm(direction, axis=1, keepdims=True)
+        direction = np.divide(direction, length, out=np.zeros_like(direction), where=length > 0)
+        return start, direction
@@ -0,0 +1,111 @@
+"""Slotted entity types: a fixed attribute layout and no per-instance __dict__.
+
+Per-type enemy data (name, points, color, model height, ...) lives once in an
+EnemyArchetype flyweight shared by every enemy of that type, so an Enemy only carries
+its own mutable state. Bullets have no per-bullet objects at all; they are rows of
+bullet_pool.BulletPool.
+"""
+
+
+class Player:
+    __slots__ = ('pos', 'rotation_y', 'rotation_x', 'health', 'score', 'speed', 'shoot_cooldown',
+                 'current_shoot_cooldown_time', 'kills_for_health_perk', 'kills_for_score_perk', 'kills_for_gun_perk',
+                 'health_perk_available', 'score_perk_available', 'gun_perk_available',
+                 'score_perk_active_until', 'gun_perk_active_until', 'number')
+
+    def __init__(self, pos, health, speed, shoot_cooldown_time, number=0):
+        self.pos = pos
+        self.rotation_y = 0.0
+        self.rotation_x = 0.0
+        self.health = health
+        self.score = 0
+        self.speed = speed
+        self.shoot_cooldown = 0.0
+        self.current_shoot_cooldown_time = shoot_cooldown_time
+        self.kills_for_health_perk = 0
+        self.kills_for_score_perk = 0
+        self.kills_for_gun_perk = 0
+        self.health_perk_available = False
+        self.score_perk_available = False
+        self.gun_perk_available = False
+        self.score_perk_active_until = 0
+        self.gun_perk_active_until = 0
+        self.number = number # Stable hero id in a co-op world (coop.py); the only hero is 0
+
+
+class EnemyArchetype:
+    """Immutable per-type enemy data, built once from a get_enemy_definition() dict and shared.
+
+    Also carries the values spawning and drawing derive from the definition: movement
+    speed, reload time, hit radius and the darker (legs) / brighter (face) body shades.
+    """
+    __slots__ = ('type_id', 'name', 'health', 'damage', 'speed_mult', 'model_height', 'color', 'points', 'is_boss',
+                 'speed', 'reload_time', 'collision_radius', 'dark_color', 'bright_color')
+
+    def __init__(self, type_id, definition, base_speed, base_collision_radius):
+        self.type_id = type_id
+        self.name = definition['name']
+        self.health = definition['health']
+        self.damage = definition['damage']
+        self.speed_mult = definition['speed_mult']
+        self.model_height = definition['model_height']
+        self.color = tuple(definition['color'])
+        self.points = definition['points']
+        self.is_boss = definition.get('is_boss', False)
+        self.speed = base_speed * self.speed_mult
+        self.reload_time = 1.5 / (self.speed_mult + 0.5)
+        self.collision_radius = base_collision_radius * (self.model_height / 1.8)
+        self.dark_color = tuple(c * 0.8 for c in self.color)
+        self.bright_color = tuple(c * 1.1 for c in self.color)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self # Shared flyweight: state snapshots keep pointing at the same archetype
+
+
+class ArchetypeRegistry:
+    """EnemyArchetype tables per level, each built once and looked up in O(1).
+
+    define(type_id, level) returns a definition dict (empty for an unknown type).
+    invalidate() drops the tables after the definitions or level configs change, so
+    the next lookup rebuilds them; enemies already alive keep their old archetype.
+    """
+
+    def __init__(self, define, base_speed, base_collision_radius):
+        self.define = define
+        self.base_speed = base_speed
+        self.base_collision_radius = base_collision_radius
+        self.tables = {} # level -> {type_id: EnemyArchetype or None}
+
+    def build(self, level, type_ids):
+        """Prebuild the table for a level from the types it spawns."""
+        for type_id in set(type_ids):
+            self.get(level, type_id)
+        return self.tables.setdefault(level, {})
+
+    def get(self, level, type_id):
+        table = self.tables.setdefault(level, {})
+        if type_id in table:
+            return table[type_id]
+        definition = self.define(type_id, level)
+        archetype = EnemyArchetype(type_id, definition, self.base_speed, self.base_collision_radius) if definition else None
+        table[type_id] = archetype
+        return archetype
+
+    def invalidate(self, level=None):
+        if level is None:
+            self.tables.clear()
+        else:
+            self.tables.pop(level, None)
+
+
+class Enemy:
+    __slots__ = ('archetype', 'pos', 'health', 'slot')
+
+    def __init__(self, archetype, pos):
+        self.archetype = archetype
+        self.pos = pos # A view into EnemyBatch.pos once the enemy is added to the batch
+        self.health = archetype.health
+        self.slot = None
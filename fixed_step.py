@@ -0,0 +1,35 @@
+"""Accumulator-driven fixed-timestep scheduler.
+
+Wall-clock frame time is banked and spent in whole ticks of 1/tick_rate seconds,
+so the simulation sees the same step size at any display refresh rate. alpha()
+is how far the renderer sits between the last two ticks, for interpolation.
+"""
+
+
+class FixedStepScheduler:
+    def __init__(self, tick_rate=60.0, max_catch_up=5):
+        self.dt = 1.0 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.accumulator = 0.0
+        self.ticks = 0
+        self.dropped_time = 0.0
+
+    def advance(self, frame_time, step):
+        """Bank frame_time and call step(dt) for each whole tick due. Returns the number of ticks run."""
+        if frame_time > 0:
+            self.accumulator += frame_time
+        steps = 0
+        while self.accumulator >= self.dt and steps < self.max_catch_up:
+            step(self.dt)
+            self.accumulator -= self.dt
+            steps += 1
+        if self.accumulator >= self.dt:
+            # Too far behind (debugger, window drag): drop the backlog instead of spiralling
+            dropped = self.accumulator - self.accumulator % self.dt
+            self.dropped_time += dropped
+            self.accumulator -= dropped
+        self.ticks += steps
+        return steps
+
+    def alpha(self):
+        return self.accumulator / self.dt
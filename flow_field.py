@@ -0,0 +1,286 @@
+"""Interior obstacles, and a flow field that steers every enemy around them towards the player.
+
+ObstacleGrid keeps the dungeon's walls and pillars as boxes on the floor plane and
+rasterises them onto square cells; a cell is blocked if any box overlaps it. The
+boxes answer the exact questions (push a circle out, is a point inside, where does
+a segment first enter one), the cells feed the pathfinder.
+
+FlowField runs one Dijkstra from the player's cell over the free cells (8-connected,
+octile costs, never cutting past a blocked corner) and keeps, per cell, the unit step
+towards the player along the shortest path and whether the player's cell is in plain
+sight. It is recomputed only when the player enters another cell. An enemy then reads
+its cell's entry in O(1), so hundreds of wolves cost one search, not one each.
+With several heroes (coop.py) the search starts from all their cells at once, so each
+cell leads to the nearest hero along the floor and goal_index says which one that is.
+"""
+import heapq
+import math
+
+import numpy as np
+
+DIAGONAL = math.sqrt(2.0)
+STEPS = ((-1, 0, 1.0), (1, 0, 1.0), (0, -1, 1.0), (0, 1, 1.0),
+         (-1, -1, DIAGONAL), (-1, 1, DIAGONAL), (1, -1, DIAGONAL), (1, 1, DIAGONAL))
+
+
+class ObstacleGrid:
+    def __init__(self, size_x, size_z, cell_size, boxes=()):
+        self.cell_size = float(cell_size)
+        self.cols = max(1, int(math.ceil(size_x / self.cell_size)))
+        self.rows = max(1, int(math.ceil(size_z / self.cell_size)))
+        self.boxes = np.array(boxes, dtype=float).reshape(-1, 4) # x_min, z_min, x_max, z_max
+        self.box_rows = [tuple(box) for box in self.boxes.tolist()] # The same, as floats for scalar callers
+        self.blocked = np.zeros((self.cols, self.rows), dtype=bool)
+        for x0, z0, x1, z1 in self.boxes.tolist():
+            i0, j0 = max(0, int(x0 // self.cell_size)), max(0, int(z0 // self.cell_size))
+            i1, j1 = int(math.ceil(x1 / self.cell_size)), int(math.ceil(z1 / self.cell_size))
+            self.blocked[i0:i1, j0:j1] = True
+        self.neighbours = self._link()
+
+    def _link(self):
+        """Per cell index, ((neighbour index, step cost), ...) over free cells; empty for a blocked cell."""
+        free = ~self.blocked
+        rows = self.rows
+        links = []
+        for i in range(self.cols):
+            for j in range(rows):
+                if not free[i, j]:
+                    links.append(())
+                    continue
+                cell = []
+                for di, dj, cost in STEPS:
+                    a, b = i + di, j + dj
+                    if not (0 <= a < self.cols and 0 <= b < rows and free[a, b]):
+                        continue
+                    if di and dj and not (free[a, j] and free[i, b]):
+                        continue # Would clip the corner of a blocked cell
+                    cell.append((a * rows + b, cost))
+                links.append(tuple(cell))
+        return links
+
+    def cell_index(self, xs, zs):
+        """Flat cell index (i * rows + j) of x/z positions, clamped to the grid."""
+        ix = np.minimum(np.maximum((np.asarray(xs) // self.cell_size).astype(np.int64), 0), self.cols - 1)
+        iz = np.minimum(np.maximum((np.asarray(zs) // self.cell_size).astype(np.int64), 0), self.rows - 1)
+        return ix * self.rows + iz
+
+    def cell_of(self, x, z):
+        """cell_index of one x/z position, as a plain int."""
+        ix = min(max(int(x // self.cell_size), 0), self.cols - 1)
+        iz = min(max(int(z // self.cell_size), 0), self.rows - 1)
+        return ix * self.rows + iz
+
+    def contains(self, xs, zs):
+        """Mask of the x/z points that lie inside a box."""
+        x, z = np.asarray(xs)[..., None], np.asarray(zs)[..., None]
+        b = self.boxes
+        return ((x > b[:, 0]) & (x < b[:, 2]) & (z > b[:, 1]) & (z < b[:, 3])).any(axis=-1)
+
+    def sweep(self, xs, zs, dxs, dzs):
+        """First t in [0, 1] at which each segment (x, z) + t*(dx, dz) enters a box, inf if it enters none.
+
+        Slab test against every box; a segment that starts inside a box hits at t = 0.
+        """
+        x, z = np.asarray(xs, dtype=float)[..., None], np.asarray(zs, dtype=float)[..., None]
+        dx, dz = np.asarray(dxs, dtype=float)[..., None], np.asarray(dzs, dtype=float)[..., None]
+        b = self.boxes
+        if len(b) == 0:
+            return np.full(np.shape(xs), np.inf)
+        near_x, far_x = _slab(x, dx, b[:, 0], b[:, 2])
+        near_z, far_z = _slab(z, dz, b[:, 1], b[:, 3])
+        enter, leave = np.maximum(near_x, near_z), np.minimum(far_x, far_z)
+        hit = (enter < leave) & (leave > 0) & (enter <= 1)
+        return np.where(hit, np.maximum(enter, 0.0), np.inf).min(axis=-1)
+
+    def sweep_one(self, x, z, dx, dz):
+        """sweep for a single segment on plain floats, for code looping over a few bullets."""
+        end_x, end_z = x + dx, z + dz
+        lo_x, hi_x = min(x, end_x), max(x, end_x)
+        lo_z, hi_z = min(z, end_z), max(z, end_z)
+        first = math.inf
+        for x0, z0, x1, z1 in self.box_rows:
+            if hi_x <= x0 or lo_x >= x1 or hi_z <= z0 or lo_z >= z1:
+                continue # Segment's bounding box misses this box
+            enter, leave = -math.inf, math.inf
+            for p, d, lo, hi in ((x, dx, x0, x1), (z, dz, z0, z1)):
+                if d == 0:
+                    continue # Inside the slab throughout: the bounds test above already checked it
+                t0, t1 = (lo - p) / d, (hi - p) / d
+                enter, leave = max(enter, min(t0, t1)), min(leave, max(t0, t1))
+            if enter < leave and leave > 0 and enter <= 1:
+                first = min(first, max(enter, 0.0))
+        return first
+
+    def push_out(self, xs, zs, radius):
+        """x/z of circles moved the shortest way out of the box each overlaps (boxes do not overlap)."""
+        x, z = np.asarray(xs, dtype=float), np.asarray(zs, dtype=float)
+        b = self.boxes
+        r = np.asarray(radius, dtype=float)[..., None]
+        px, pz = x[..., None], z[..., None]
+        near = (px > b[:, 0] - r) & (px < b[:, 2] + r) & (pz > b[:, 1] - r) & (pz < b[:, 3] + r)
+        if not near.any(): # The usual case, so it is all most ticks pay
+            return x, z
+        hit = near.any(axis=-1)
+        box = b[near.argmax(axis=-1)[hit]] # One box per circle: boxes are further apart than two radii
+        x, z = np.array(x, ndmin=1), np.array(z, ndmin=1)
+        r = np.broadcast_to(np.asarray(radius, dtype=float), x.shape)[hit]
+        hx, hz = x[hit], z[hit]
+        # Outside the box: away from its nearest point. Centre inside: out through the nearest side.
+        ox = hx - np.minimum(np.maximum(hx, box[:, 0]), box[:, 2])
+        oz = hz - np.minimum(np.maximum(hz, box[:, 1]), box[:, 3])
+        gap = np.hypot(ox, oz)
+        sides = np.stack([hx - box[:, 0], box[:, 2] - hx, hz - box[:, 1], box[:, 3] - hz], axis=1)
+        side = sides.argmin(axis=1)
+        inside = gap == 0
+        safe_gap = np.where(inside, 1.0, gap)
+        depth = np.maximum(np.where(inside, sides.min(axis=1) + r, r - gap), 0.0)
+        x[hit] = hx + depth * np.where(inside, np.choose(side, (-1.0, 1.0, 0.0, 0.0)), ox / safe_gap)
+        z[hit] = hz + depth * np.where(inside, np.choose(side, (0.0, 0.0, -1.0, 1.0)), oz / safe_gap)
+        return x.reshape(np.shape(xs)), z.reshape(np.shape(zs))
+
+    def push_out_one(self, x, z, radius):
+        """push_out for a single circle on plain floats, for code looping over a few entities."""
+        for x0, z0, x1, z1 in self.box_rows:
+            if not (x0 - radius < x < x1 + radius and z0 - radius < z < z1 + radius):
+                continue
+            ox = x - min(max(x, x0), x1)
+            oz = z - min(max(z, z0), z1)
+            gap = math.hypot(ox, oz)
+            if gap == 0:
+                sides = (x - x0, x1 - x, z - z0, z1 - z)
+                side = sides.index(min(sides))
+                depth = max(sides[side] + radius, 0.0)
+                return x + depth * (-1.0, 1.0, 0.0, 0.0)[side], z + depth * (0.0, 0.0, -1.0, 1.0)[side]
+            depth = max(radius - gap, 0.0)
+            return x + depth * (ox / gap), z + depth * (oz / gap)
+        return x, z
+
+
+def _slab(p, d, lo, hi):
+    """Entry and exit t of the lines p + t*d through the open slab lo < p < hi (one axis of a box)."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t0, t1 = (lo - p) / d, (hi - p) / d
+    # Parallel to the slab: inside it for every t, or for none
+    inside = (p > lo) & (p < hi)
+    parallel = d == 0
+    near = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t0, t1))
+    far = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t0, t1))
+    return near, far
+
+
+class FlowField:
+    def __init__(self, obstacles):
+        self.obstacles = obstacles
+        cells = obstacles.cols * obstacles.rows
+        self.goals = None
+        self.dist = np.full(cells, np.inf)
+        self.goal_index = np.full(cells, -1) # Per cell, which goal it leads to (the nearest); -1 where none does
+        self.flow_x = np.zeros(cells)
+        self.flow_z = np.zeros(cells)
+        self.in_sight = np.zeros(cells, dtype=bool)
+        self.entries = [(0.0, 0.0, False)] * cells # (flow_x, flow_z, in_sight) per cell as plain values, for sample_one
+        self.recomputes = 0
+
+    def update(self, x, z):
+        """Aim the field at the cell holding x/z, or at the cells holding several positions (x and z
+        sequences); each cell then leads to the nearest of them along the floor and in_sight says whether
+        that one is in plain sight. Returns True if that meant recomputing the field."""
+        if np.isscalar(x):
+            goals = (self.obstacles.cell_of(x, z),)
+        else:
+            goals = tuple(self.obstacles.cell_of(a, b) for a, b in zip(x, z))
+        if goals == self.goals:
+            return False
+        self.goals = goals
+        self._integrate(goals)
+        self._directions()
+        self._sight(goals)
+        self.entries = list(zip(self.flow_x.tolist(), self.flow_z.tolist(), self.in_sight.tolist()))
+        self.recomputes += 1
+        return True
+
+    def sample(self, xs, zs):
+        """(flow_x, flow_z, in_sight) for each x/z position: the unit step towards the goal, zero where unreachable."""
+        cells = self.obstacles.cell_index(xs, zs)
+        return self.flow_x[cells], self.flow_z[cells], self.in_sight[cells]
+
+    def sample_one(self, x, z):
+        """sample for a single position, as plain floats and a bool."""
+        return self.entries[self.obstacles.cell_of(x, z)]
+
+    def _integrate(self, goals):
+        grid = self.obstacles
+        dist = [math.inf] * (grid.cols * grid.rows)
+        owner = [-1] * (grid.cols * grid.rows)
+        heap = []
+        for g, goal in enumerate(goals):
+            if grid.neighbours[goal] or not grid.blocked.flat[goal]:
+                heap.append((0.0, goal, g))
+            else:
+                # The player stands in a cell a box only partly covers: start from the free cells around it
+                i, j = divmod(goal, grid.rows)
+                for di, dj, cost in STEPS:
+                    a, b = i + di, j + dj
+                    if 0 <= a < grid.cols and 0 <= b < grid.rows and not grid.blocked[a, b]:
+                        heap.append((cost, a * grid.rows + b, g))
+        for d, cell, g in heap:
+            if d < dist[cell]:
+                dist[cell], owner[cell] = d, g
+        heap = [(d, cell) for d, cell, _ in heap]
+        heapq.heapify(heap)
+        neighbours = grid.neighbours
+        pop, push = heapq.heappop, heapq.heappush
+        while heap:
+            d, cell = pop(heap)
+            if d > dist[cell]:
+                continue
+            for other, cost in neighbours[cell]:
+                nd = d + cost
+                if nd < dist[other]:
+                    dist[other] = nd
+                    owner[other] = owner[cell]
+                    push(heap, (nd, other))
+        self.dist = np.array(dist)
+        self.goal_index = np.array(owner)
+
+    def _directions(self):
+        grid = self.obstacles
+        cols, rows = grid.cols, grid.rows
+        dist = np.full((cols + 2, rows + 2), np.inf)
+        dist[1:-1, 1:-1] = self.dist.reshape(cols, rows)
+        free = np.zeros((cols + 2, rows + 2), dtype=bool)
+        free[1:-1, 1:-1] = ~grid.blocked
+        shifted = lambda a, di, dj: a[1+di:cols+1+di, 1+dj:rows+1+dj]
+        best, nearer = np.full((cols, rows), np.inf), np.full((cols, rows), np.inf)
+        step_x, step_z = np.zeros((cols, rows)), np.zeros((cols, rows))
+        for di, dj, cost in STEPS:
+            through = shifted(dist, di, dj) + cost
+            if di and dj:
+                through = np.where(shifted(free, di, 0) & shifted(free, 0, dj), through, np.inf)
+            better = through < best
+            best = np.where(better, through, best)
+            nearer = np.where(better, shifted(dist, di, dj), nearer)
+            step_x = np.where(better, di / cost, step_x)
+            step_z = np.where(better, dj / cost, step_z)
+        # Only step where the chosen neighbour is nearer the goal; the goal cell and unreachable cells keep a
+        # zero flow. (On a shortest path best equals the cell's own distance, so compare the neighbour's.)
+        closer = nearer < dist[1:-1, 1:-1]
+        self.flow_x = np.where(closer, step_x, 0.0).ravel()
+        self.flow_z = np.where(closer, step_z, 0.0).ravel()
+
+    def _sight(self, goals):
+        grid = self.obstacles
+        ci, cj = np.divmod(np.arange(grid.cols * grid.rows), grid.rows)
+        sight = np.empty((len(goals), len(ci)), dtype=bool)
+        for g, goal in enumerate(goals):
+            blocked = grid.blocked.copy()
+            blocked.flat[goal] = False
+            gi, gj = divmod(goal, grid.rows)
+            span = max(abs(ci - gi).max(), abs(cj - gj).max())
+            t = np.linspace(0.0, 1.0, 2 * span + 2) # At most half a cell between samples
+            si = np.floor(ci[:, None] + 0.5 + (gi - ci)[:, None] * t).astype(np.int64)
+            sj = np.floor(cj[:, None] + 0.5 + (gj - cj)[:, None] * t).astype(np.int64)
+            sight[g] = ~blocked[si, sj].any(axis=1)
+        # A cell no goal can be walked to from is in sight if any goal is
+        owner = self.goal_index
+        self.in_sight = np.where(owner >= 0, sight[np.maximum(owner, 0), np.arange(len(ci))], sight.any(axis=0))
@@ -0,0 +1,64 @@
+"""View-frustum culling of bounding spheres, before any GL call is made for them.
+
+Frustum rebuilds the matrices gluPerspective and gluLookAt would load from the same
+arguments, so no glGet round trip is needed, and extracts the six clip planes from
+their product (Gribb & Hartmann). A sphere is culled when it lies wholly outside any
+one plane; spheres straddling a corner outside two planes are kept, which errs on the
+side of drawing.
+"""
+import math
+
+import numpy as np
+
+
+def perspective_matrix(fovy, aspect, near, far):
+    """The matrix gluPerspective(fovy, aspect, near, far) multiplies in (row-major, column vectors)."""
+    f = 1.0 / math.tan(math.radians(fovy) / 2.0)
+    return np.array([[f / aspect, 0.0, 0.0, 0.0],
+                     [0.0, f, 0.0, 0.0],
+                     [0.0, 0.0, (far + near) / (near - far), 2.0 * far * near / (near - far)],
+                     [0.0, 0.0, -1.0, 0.0]])
+
+
+def look_at_matrix(eye, target, up=(0.0, 1.0, 0.0)):
+    """The matrix gluLookAt(*eye, *target, *up) multiplies in."""
+    eye = np.asarray(eye, dtype=float)
+    forward = np.asarray(target, dtype=float) - eye
+    forward /= np.linalg.norm(forward)
+    side = np.cross(forward, up)
+    side /= np.linalg.norm(side)
+    true_up = np.cross(side, forward)
+    m = np.identity(4)
+    m[0, :3], m[1, :3], m[2, :3] = side, true_up, -forward
+    m[:3, 3] = -m[:3, :3] @ eye
+    return m
+
+
+class Frustum:
+    def __init__(self, fovy, aspect, near, far, eye, target, up=(0.0, 1.0, 0.0)):
+        clip = perspective_matrix(fovy, aspect, near, far) @ look_at_matrix(eye, target, up)
+        # left, right, bottom, top, near, far: inside where n . p + d >= 0
+        planes = np.array([clip[3] + clip[0], clip[3] - clip[0], clip[3] + clip[1],
+                           clip[3] - clip[1], clip[3] + clip[2], clip[3] - clip[2]])
+        self.planes = planes / np.linalg.norm(planes[:, :3], axis=1, keepdims=True)
+
+    def visible(self, centers, radii):
+        """Mask of the spheres (centers (n, 3), radii scalar or (n,)) that may show on screen."""
+        centers = np.asarray(centers, dtype=float).reshape(-1, 3)
+        distance = centers @ self.planes[:, :3].T + self.planes[:, 3]
+        return (distance >= -np.asarray(radii, dtype=float).reshape(-1, 1)).all(axis=1)
+
+
+class CullCounter:
+    """Drawn/culled totals per object kind for the last frame, for the profiler overlay."""
+
+    def __init__(self, kinds):
+        self.drawn = dict.fromkeys(kinds, 0)
+        self.culled = dict.fromkeys(kinds, 0)
+
+    def count(self, kind, mask):
+        """Record one kind's visibility mask; returns the indices to draw."""
+        shown = np.flatnonzero(mask)
+        self.drawn[kind] = len(shown)
+        self.culled[kind] = len(mask) - len(shown)
+        return shown
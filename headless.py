@@ -0,0 +1,158 @@
+"""Headless simulation runner.
+
+Loads the game module with DUNGEON_HEADLESS=1 so OpenGL is never imported, then
+steps update_game_state on a GameWorld on a fixed timestep as fast as the CPU allows
+and reports simulated ticks per second. A simple autopilot stands in for the
+keyboard/mouse.
+
+    python headless.py --ticks 20000 --seed 1
+    python headless.py --game project_1st_part --sim-seconds 300
+    python headless.py --ticks 5000 --profile-csv ticks.csv
+    python headless.py --ticks 20000 --seed 7 --record session.rpl   (then: python replay.py session.rpl)
+"""
+import argparse
+import importlib
+import math
+import os
+import random
+import sys
+import time
+
+os.environ['DUNGEON_HEADLESS'] = '1'
+
+from campaign import Campaign
+from replay import ReplayRecorder, state_digest
+
+DEFAULT_TIMESTEP = 1 / 60.0
+
+
+def load_game(module_name='project'):
+    if module_name in sys.modules and not getattr(sys.modules[module_name], 'HEADLESS', False):
+        raise RuntimeError(f"{module_name} was already imported with OpenGL; import headless first")
+    return importlib.import_module(module_name)
+
+
+def reset_game(game, world, seed=None, level=1):
+    if seed is not None:
+        world.rng.seed(seed)
+    world.keys_pressed.clear()
+    world.special_keys_pressed.clear()
+    world.mouse_buttons.clear()
+    world.key_presses.clear()
+    world.sim_time = 0.0
+    game.init_level_configs(world)
+    game.init_player(world)
+    game.init_level(world, level)
+
+
+def nearest_enemy(world):
+    px, _, pz = world.player.pos
+    best, best_d2 = None, None
+    for enemy in world.enemies:
+        d2 = (enemy.pos[0]-px)**2 + (enemy.pos[2]-pz)**2
+        if best is None or d2 < best_d2:
+            best, best_d2 = enemy, d2
+    return best
+
+
+def autopilot(game, world):
+    """Turn towards the nearest wolf and keep the trigger held (sets the same input dicts GLUT would)."""
+    keys = world.keys_pressed
+    keys[b'a'] = keys[b'd'] = False
+    target = nearest_enemy(world)
+    if target is None:
+        return
+    p = world.player
+    # Bullets leave along (sin(yaw), cos(yaw)) in both game variants
+    want = math.degrees(math.atan2(target.pos[0]-p.pos[0], target.pos[2]-p.pos[2]))
+    diff = (want - p.rotation_y + 180.0) % 360.0 - 180.0
+    if diff > game.PLAYER_ROTATE_ANGLE:
+        keys[b'a'] = True
+    elif diff < -game.PLAYER_ROTATE_ANGLE:
+        keys[b'd'] = True
+    elif hasattr(game, 'draw_player_humanoid_model'):
+        world.mouse_buttons[game.GLUT_LEFT_BUTTON] = game.GLUT_DOWN
+    elif p.shoot_cooldown <= 0:
+        world.key_presses.append(b' ') # project_1st_part fires on a space bar key-down
+
+
+def run(game, world, ticks=None, sim_seconds=None, timestep=DEFAULT_TIMESTEP, stop_on_win=True, controller=autopilot, recorder=None):
+    """Step the simulation on a fixed timestep, logging each tick's input to recorder if given. Returns a stats dict."""
+    if ticks is None:
+        ticks = int(math.ceil((sim_seconds if sim_seconds is not None else 60.0) / timestep))
+    deaths = 0
+    start = time.perf_counter()
+    tick = 0
+    while tick < ticks:
+        if stop_on_win and world.game_state == game.STATE_YOU_WIN:
+            break
+        if controller is not None and world.game_state == game.STATE_PLAYING:
+            controller(game, world)
+        was_alive = world.game_state != game.STATE_GAME_OVER_TRANSITION
+        if recorder:
+            recorder.record_tick(timestep, lambda dt: game.update_game_state(world, dt))
+        else:
+            game.update_game_state(world, timestep)
+        game.profiler.end_frame() # One profiler row per tick; no-op unless enabled
+        if was_alive and world.game_state == game.STATE_GAME_OVER_TRANSITION:
+            deaths += 1
+        tick += 1
+    elapsed = time.perf_counter() - start
+    return {
+        'ticks': tick,
+        'sim_seconds': tick * timestep,
+        'wall_seconds': elapsed,
+        'ticks_per_second': tick / elapsed if elapsed > 0 else float('inf'),
+        'level': world.current_level,
+        'score': world.player.score,
+        'deaths': deaths,
+        'won': world.game_state == game.STATE_YOU_WIN,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the dungeon simulation without a display")
+    parser.add_argument('--game', default='project', help="game module to load (project or project_1st_part)")
+    parser.add_argument('--ticks', type=int, default=None, help="number of fixed steps to run")
+    parser.add_argument('--sim-seconds', type=float, default=None, help="simulated seconds to run (default 60)")
+    parser.add_argument('--timestep', type=float, default=DEFAULT_TIMESTEP, help="fixed timestep in seconds")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--idle', action='store_true', help="no autopilot input")
+    parser.add_argument('--profile', action='store_true', help="print per-phase update percentiles")
+    parser.add_argument('--profile-csv', default=None, help="stream per-tick phase timings to this CSV file")
+    parser.add_argument('--campaign', default=None, help="levels and wolf types from this JSON/TOML campaign file")
+    parser.add_argument('--record', default=None, help="write a replay of the run to this file (see replay.py)")
+    args = parser.parse_args(argv)
+
+    game = load_game(args.game)
+    world = game.GameWorld(Campaign(args.campaign) if args.campaign else game.world.campaign)
+    seed = args.seed
+    if args.record and seed is None:
+        seed = random.randrange(2**32) # A replay needs a known seed
+    reset_game(game, world, seed=seed, level=args.level)
+    recorder = None
+    if args.record:
+        recorder = ReplayRecorder(args.record, args.game, seed, args.level, args.timestep, world)
+    if args.profile_csv:
+        game.profiler.stream_csv(args.profile_csv)
+    elif args.profile:
+        game.profiler.enabled = True
+    stats = run(game, world, ticks=args.ticks, sim_seconds=args.sim_seconds, timestep=args.timestep,
+                controller=None if args.idle else autopilot, recorder=recorder)
+    print(f"{stats['ticks']} ticks ({stats['sim_seconds']:.1f}s simulated) in {stats['wall_seconds']:.3f}s wall")
+    print(f"{stats['ticks_per_second']:.0f} ticks/s | level {stats['level']} | score {stats['score']} | "
+          f"deaths {stats['deaths']}{' | WON' if stats['won'] else ''}")
+    if recorder:
+        recorder.close()
+        print(f"recorded {recorder.ticks} ticks to {args.record} (seed {seed}, digest {state_digest(world)})")
+    if game.profiler.enabled:
+        print(f"{'phase':<16}{'p50':>8}{'p95':>8}{'p99':>8} (ms)")
+        for phase, (p50, p95, p99) in game.profiler.percentiles(every=1).items():
+            if phase.startswith('update_'):
+                print(f"{phase:<16}{p50:>8.3f}{p95:>8.3f}{p99:>8.3f}")
+        game.profiler.close_csv()
+    return stats
+
+
+if __name__ == "__main__": main()
@@ -0,0 +1,160 @@
+"""HUD text drawn from a glyph atlas: one textured-quad batch per string, cached by value.
+
+Each GLUT bitmap font is rasterised once, printable ASCII only, by drawing its glyphs
+with glutBitmapCharacter into an offscreen framebuffer and reading them back, so the
+HUD keeps the look of the original fonts. A string's quads are built on first use and
+kept in an LRU keyed on (font, format, values); drawing an unchanged line again is a
+single glDrawArrays call however long it is, with no reformatting.
+
+HudText.create() returns None when the context has no framebuffer objects, and the
+caller keeps drawing with glutBitmapCharacter.
+"""
+from collections import OrderedDict
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GLUT import glutBitmapCharacter, glutBitmapWidth
+
+FIRST_CHAR = 32
+LAST_CHAR = 126
+COLUMNS = 16
+PAD = 2 # Pixels around each cell for glyphs that overhang their advance
+
+
+def _rasterize(font, codes, cell_w, cell_h, baseline, width, height):
+    """Draw each glyph into its atlas cell offscreen and return the coverage as (height, width) uint8."""
+    fbo = glGenFramebuffers(1)
+    rbo = glGenRenderbuffers(1)
+    glBindRenderbuffer(GL_RENDERBUFFER, rbo)
+    glRenderbufferStorage(GL_RENDERBUFFER, GL_RGBA8, width, height)
+    glBindFramebuffer(GL_FRAMEBUFFER, fbo)
+    glFramebufferRenderbuffer(GL_FRAMEBUFFER, GL_COLOR_ATTACHMENT0, GL_RENDERBUFFER, rbo)
+    try:
+        if glCheckFramebufferStatus(GL_FRAMEBUFFER) != GL_FRAMEBUFFER_COMPLETE:
+            raise RuntimeError("glyph atlas framebuffer incomplete")
+        glPushAttrib(GL_ALL_ATTRIB_BITS)
+        glViewport(0, 0, width, height)
+        glDisable(GL_LIGHTING)
+        glDisable(GL_DEPTH_TEST)
+        glDisable(GL_TEXTURE_2D)
+        glMatrixMode(GL_PROJECTION)
+        glPushMatrix()
+        glLoadIdentity()
+        glOrtho(0, width, 0, height, -1, 1)
+        glMatrixMode(GL_MODELVIEW)
+        glPushMatrix()
+        glLoadIdentity()
+        glClearColor(0, 0, 0, 0)
+        glClear(GL_COLOR_BUFFER_BIT)
+        glColor3f(1, 1, 1)
+        for i, code in enumerate(codes):
+            glRasterPos2i((i % COLUMNS) * cell_w + PAD, (i // COLUMNS) * cell_h + baseline)
+            glutBitmapCharacter(font, code)
+        glPixelStorei(GL_PACK_ALIGNMENT, 1)
+        pixels = glReadPixels(0, 0, width, height, GL_RED, GL_UNSIGNED_BYTE)
+        glPopMatrix()
+        glMatrixMode(GL_PROJECTION)
+        glPopMatrix()
+        glMatrixMode(GL_MODELVIEW)
+        glPopAttrib()
+    finally:
+        glBindFramebuffer(GL_FRAMEBUFFER, 0)
+        glDeleteFramebuffers(1, [fbo])
+        glDeleteRenderbuffers(1, [rbo])
+    return np.frombuffer(pixels, dtype=np.uint8).reshape(height, width)
+
+
+class GlyphAtlas:
+    def __init__(self, font, point_size):
+        codes = list(range(FIRST_CHAR, LAST_CHAR + 1))
+        self.advance = np.array([glutBitmapWidth(font, c) for c in codes], dtype=np.float32)
+        self.cell_w = int(self.advance.max()) + 2 * PAD
+        self.cell_h = int(point_size * 1.5)
+        self.baseline = int(point_size * 0.4) # Cell bottom to baseline, room for descenders
+        self.width = self.cell_w * COLUMNS
+        self.height = self.cell_h * ((len(codes) + COLUMNS - 1) // COLUMNS)
+        coverage = _rasterize(font, codes, self.cell_w, self.cell_h, self.baseline, self.width, self.height)
+        self.texture = glGenTextures(1)
+        glBindTexture(GL_TEXTURE_2D, self.texture)
+        glPixelStorei(GL_UNPACK_ALIGNMENT, 1)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MIN_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_MAG_FILTER, GL_NEAREST)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_S, GL_CLAMP_TO_EDGE)
+        glTexParameteri(GL_TEXTURE_2D, GL_TEXTURE_WRAP_T, GL_CLAMP_TO_EDGE)
+        glTexImage2D(GL_TEXTURE_2D, 0, GL_ALPHA, self.width, self.height, 0, GL_ALPHA, GL_UNSIGNED_BYTE, coverage)
+        glBindTexture(GL_TEXTURE_2D, 0)
+
+    def quads(self, text):
+        """GL_QUADS rows for glInterleavedArrays(GL_T2F_V3F), pen starting at the origin on the baseline."""
+        codes = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8).astype(np.intp)
+        index = np.where((codes >= FIRST_CHAR) & (codes <= LAST_CHAR), codes - FIRST_CHAR, ord('?') - FIRST_CHAR)
+        advance = self.advance[index]
+        x0 = np.cumsum(advance) - advance - PAD
+        y0 = float(-self.baseline)
+        u0 = (index % COLUMNS) * self.cell_w / self.width
+        v0 = (index // COLUMNS) * self.cell_h / self.height
+        u1 = u0 + self.cell_w / self.width
+        v1 = v0 + self.cell_h / self.height
+        rows = np.zeros((len(index), 4, 5), dtype=np.float32)
+        for corner, (u, v, dx, dy) in enumerate(((u0, v0, 0, 0), (u1, v0, 1, 0), (u1, v1, 1, 1), (u0, v1, 0, 1))):
+            rows[:, corner, 0] = u
+            rows[:, corner, 1] = v
+            rows[:, corner, 2] = x0 + dx * self.cell_w
+            rows[:, corner, 3] = y0 + dy * self.cell_h
+        return rows.reshape(-1, 5)
+
+
+class HudText:
+    def __init__(self, atlases, capacity=64):
+        self.atlases = atlases # id(GLUT font) -> GlyphAtlas (the font handles themselves are unhashable)
+        self.capacity = capacity
+        self.strings = OrderedDict() # (id(font), text, values) -> (texture, quad rows), least recently used first
+
+    @classmethod
+    def create(cls, fonts, capacity=64):
+        """Build an atlas for each (GLUT bitmap font, point size) pair, or return None if this context can't."""
+        if not (bool(glGenFramebuffers) and bool(glFramebufferRenderbuffer)):
+            return None
+        try:
+            atlases = {id(font): GlyphAtlas(font, size) for font, size in fonts}
+        except Exception as e: # No FBO support after all: fall back to glutBitmapCharacter
+            print(f"HUD glyph atlas unavailable: {e}")
+            return None
+        return cls(atlases, capacity)
+
+    def draw(self, x, y, text, color, font, values=()):
+        """Draw text.format(*values) with its baseline at (x, y). Returns False for a font with no atlas."""
+        key = (id(font), text, values)
+        entry = self.strings.get(key)
+        if entry is None:
+            atlas = self.atlases.get(id(font))
+            if atlas is None:
+                return False
+            entry = (atlas.texture, atlas.quads(text.format(*values) if values else text))
+            self.strings[key] = entry
+            if len(self.strings) > self.capacity:
+                self.strings.popitem(last=False)
+        else:
+            self.strings.move_to_end(key)
+        texture, rows = entry
+        if len(rows) == 0:
+            return True
+        glPushAttrib(GL_ENABLE_BIT | GL_COLOR_BUFFER_BIT | GL_TEXTURE_BIT)
+        glEnable(GL_TEXTURE_2D)
+        glBindTexture(GL_TEXTURE_2D, texture)
+        glTexEnvi(GL_TEXTURE_ENV, GL_TEXTURE_ENV_MODE, GL_MODULATE)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        glColor3f(*color)
+        glPushMatrix()
+        glTranslatef(int(x), int(y), 0) # Whole pixels keep the nearest-filtered glyphs crisp
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glInterleavedArrays(GL_T2F_V3F, 0, rows)
+        glDrawArrays(GL_QUADS, 0, len(rows))
+        glPopClientAttrib()
+        glPopMatrix()
+        glPopAttrib()
+        return True
+
+    def clear(self):
+        self.strings.clear()
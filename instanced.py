@@ -0,0 +1,247 @@
+"""Instanced rendering for wolves and bullets: one draw call per mesh, per frame.
+
+Meshes are built once on the CPU as interleaved float32 rows
+(position xyz, normal xyz, part color rgba). A part color with alpha 1 is drawn as-is
+(the wolf's gun); alpha 0 means "multiply by the instance color". Per-instance data is
+a packed (n, 8) float32 array: translation xyz, yaw in degrees, r, g, b, uniform scale.
+
+InstancedRenderer.create() returns None when the context lacks instanced arrays or
+GLSL, and the caller keeps its immediate-mode path.
+"""
+import ctypes
+import math
+
+import numpy as np
+from OpenGL.GL import *
+from OpenGL.GL import shaders
+
+VERTEX_STRIDE = 10 * 4
+INSTANCE_STRIDE = 8 * 4
+
+VERTEX_SHADER = """
+#version 120
+attribute vec3 position;
+attribute vec3 normal;
+attribute vec4 part_color;
+attribute vec4 instance_xform; // xyz translation, w yaw (degrees, about +Y like glRotatef)
+attribute vec4 instance_color; // rgb tint, a uniform scale
+varying vec4 color;
+void main() {
+    float a = radians(instance_xform.w);
+    float c = cos(a);
+    float s = sin(a);
+    vec3 p = position * instance_color.a;
+    vec3 world = vec3(c*p.x + s*p.z, p.y, -s*p.x + c*p.z) + instance_xform.xyz;
+    vec3 n = vec3(c*normal.x + s*normal.z, normal.y, -s*normal.x + c*normal.z);
+    vec3 base = part_color.a > 0.5 ? part_color.rgb : part_color.rgb * instance_color.rgb;
+    vec4 eye = gl_ModelViewMatrix * vec4(world, 1.0);
+    vec3 to_light = normalize(gl_LightSource[0].position.xyz - eye.xyz);
+    float diffuse = max(dot(normalize(gl_NormalMatrix * n), to_light), 0.0);
+    color = vec4(base * (gl_LightSource[0].ambient.rgb + gl_LightSource[0].diffuse.rgb * diffuse), 1.0);
+    gl_Position = gl_ModelViewProjectionMatrix * vec4(world, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 120
+varying vec4 color;
+void main() {
+    gl_FragColor = color;
+}
+"""
+
+ATTRIBUTES = ('position', 'normal', 'part_color', 'instance_xform', 'instance_color')
+# Without these nothing reaches the screen; the others may be optimized out by the driver
+REQUIRED_ATTRIBUTES = ('position', 'instance_xform')
+
+# --- Mesh construction (pure NumPy) ---
+def _rows(positions, normals, part_color):
+    rows = np.empty((len(positions), 10), dtype=np.float32)
+    rows[:, 0:3] = positions
+    rows[:, 3:6] = normals
+    rows[:, 6:10] = part_color
+    return rows
+
+
+def box_mesh(center, size, part_color):
+    """Axis-aligned box as 12 triangles (what glutSolidCube(1) scaled by size draws)."""
+    hx, hy, hz = (s / 2.0 for s in size)
+    cx, cy, cz = center
+    faces = [ # normal, four corners counter-clockwise seen from outside
+        ((1, 0, 0), [(hx, -hy, -hz), (hx, hy, -hz), (hx, hy, hz), (hx, -hy, hz)]),
+        ((-1, 0, 0), [(-hx, -hy, hz), (-hx, hy, hz), (-hx, hy, -hz), (-hx, -hy, -hz)]),
+        ((0, 1, 0), [(-hx, hy, -hz), (-hx, hy, hz), (hx, hy, hz), (hx, hy, -hz)]),
+        ((0, -1, 0), [(-hx, -hy, hz), (-hx, -hy, -hz), (hx, -hy, -hz), (hx, -hy, hz)]),
+        ((0, 0, 1), [(-hx, -hy, hz), (hx, -hy, hz), (hx, hy, hz), (-hx, hy, hz)]),
+        ((0, 0, -1), [(hx, -hy, -hz), (-hx, -hy, -hz), (-hx, hy, -hz), (hx, hy, -hz)]),
+    ]
+    positions, normals = [], []
+    for normal, (a, b, c, d) in faces:
+        for corner in (a, b, c, a, c, d):
+            positions.append((corner[0] + cx, corner[1] + cy, corner[2] + cz))
+            normals.append(normal)
+    return _rows(positions, normals, part_color)
+
+
+def cylinder_mesh(origin, axis, base_r, top_r, length, slices, part_color):
+    """Capped (tapered) cylinder from origin along axis ('+z' or '-y'), like gluCylinder + two gluDisks."""
+    positions, normals = [], []
+    slope = (base_r - top_r) / length if length else 0.0
+    ring = [(math.cos(2*math.pi*i/slices), math.sin(2*math.pi*i/slices)) for i in range(slices + 1)]
+    for (c0, s0), (c1, s1) in zip(ring, ring[1:]):
+        b0, b1 = (base_r*c0, base_r*s0, 0.0), (base_r*c1, base_r*s1, 0.0)
+        t0, t1 = (top_r*c0, top_r*s0, length), (top_r*c1, top_r*s1, length)
+        n0, n1 = (c0, s0, slope), (c1, s1, slope)
+        positions += [b0, b1, t1, b0, t1, t0]
+        normals += [n0, n1, n1, n0, n1, n0]
+        positions += [(0.0, 0.0, 0.0), b1, b0, (0.0, 0.0, length), t0, t1]
+        normals += [(0, 0, -1)] * 3 + [(0, 0, 1)] * 3
+    positions = np.array(positions, dtype=np.float32)
+    normals = np.array(normals, dtype=np.float32)
+    normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+    if axis == '-y': # +z -> -y, as glRotatef(180,1,0,0) after draw_cylinder's glRotatef(-90,1,0,0)
+        rot = np.array([[1, 0, 0], [0, 0, -1], [0, 1, 0]], dtype=np.float32)
+        positions, normals = positions @ rot.T, normals @ rot.T
+    return _rows(positions + np.asarray(origin, dtype=np.float32), normals, part_color)
+
+
+def wolf_mesh(body_shade, leg_color, face_shade, gun_color, leg_slices=20, gun_slices=8):
+    """Unit-height wolf matching draw_revised_wolf_model/draw_wolf proportions.
+
+    *_shade are rgb multipliers of the instance color; leg_color is either a shade
+    (alpha 0) or an absolute rgba color (alpha 1); gun_color is absolute rgb.
+    """
+    body_w, body_h, body_d = 0.35, 0.35, 0.7
+    face = 0.25
+    leg_len, leg_r = 0.4, 0.04
+    gun_len, gun_r = 0.3, 0.04
+    body_y = leg_len + body_h/2
+    face_z = body_d/2 + face/4
+    parts = [
+        box_mesh((0, body_y, 0), (body_w, body_h, body_d), tuple(body_shade) + (0.0,)),
+        box_mesh((0, body_y, face_z), (face, face, face*0.5), tuple(face_shade) + (0.0,)),
+        cylinder_mesh((0, body_y, face_z + face/4), '+z', gun_r, gun_r*0.8, gun_len, gun_slices, tuple(gun_color) + (1.0,)),
+    ]
+    leg_y = body_y - body_h/2
+    for lx in (body_w*0.4, -body_w*0.4):
+        for lz in (body_d*0.3, -body_d*0.3):
+            parts.append(cylinder_mesh((lx, leg_y, lz), '-y', leg_r, leg_r*0.7, leg_len, leg_slices, tuple(leg_color)))
+    return np.concatenate(parts)
+
+
+def wolf_box_mesh(body_shade, leg_color, face_shade):
+    """Middle LOD tier of wolf_mesh: the same body and face boxes, each leg pair merged into one
+    thin slab and no gun. 4 boxes instead of 6 capped cylinders and 2 boxes."""
+    body_w, body_h, body_d = 0.35, 0.35, 0.7
+    face = 0.25
+    leg_len, leg_r = 0.4, 0.04
+    body_y = leg_len + body_h/2
+    face_z = body_d/2 + face/4
+    slab = (body_w*0.8 + 2*leg_r, leg_len, 2*leg_r)
+    return np.concatenate([
+        box_mesh((0, body_y, 0), (body_w, body_h, body_d), tuple(body_shade) + (0.0,)),
+        box_mesh((0, body_y, face_z), (face, face, face*0.5), tuple(face_shade) + (0.0,)),
+        box_mesh((0, leg_len/2, body_d*0.3), slab, tuple(leg_color)),
+        box_mesh((0, leg_len/2, -body_d*0.3), slab, tuple(leg_color)),
+    ])
+
+
+def billboard_mesh(width, bottom, top, part_color=(1.0, 1.0, 1.0, 0.0)):
+    """One quad in the local XY plane facing +Z (two triangles): yaw it towards the camera."""
+    x = width / 2.0
+    positions = [(-x, bottom, 0.0), (x, bottom, 0.0), (x, top, 0.0), (-x, bottom, 0.0), (x, top, 0.0), (-x, top, 0.0)]
+    return _rows(positions, [(0.0, 0.0, 1.0)] * 6, part_color)
+
+
+def sphere_mesh(slices, stacks, part_color=(1.0, 1.0, 1.0, 0.0)):
+    """Unit sphere tessellated like glutSolidSphere(1, slices, stacks)."""
+    positions = []
+    def point(i, j):
+        theta = math.pi * i / stacks
+        phi = 2 * math.pi * j / slices
+        return (math.sin(theta)*math.cos(phi), math.cos(theta), math.sin(theta)*math.sin(phi))
+    for i in range(stacks):
+        for j in range(slices):
+            a, b, c, d = point(i, j), point(i+1, j), point(i+1, j+1), point(i, j+1)
+            positions += [a, b, c, a, c, d]
+    positions = np.array(positions, dtype=np.float32)
+    return _rows(positions, positions, part_color) # Unit sphere: normal == position
+
+
+# --- Instance packing ---
+def pack_instances(translations, yaw_degrees, colors, scales):
+    n = len(translations)
+    data = np.empty((n, 8), dtype=np.float32)
+    data[:, 0:3] = translations
+    data[:, 3] = yaw_degrees
+    data[:, 4:7] = colors
+    data[:, 7] = scales
+    return data
+
+
+class InstancedRenderer:
+    def __init__(self, program):
+        self.program = program
+        self.locations = [glGetAttribLocation(program, name) for name in ATTRIBUTES]
+        self.meshes = {} # name -> (vbo, vertex count)
+        self.instance_vbo = glGenBuffers(1)
+        self.draw_calls = 0
+
+    @classmethod
+    def create(cls):
+        """Compile the instancing program, or return None if this context can't run it."""
+        if not (bool(glDrawArraysInstanced) and bool(glVertexAttribDivisor) and bool(glCreateShader)):
+            return None
+        try:
+            program = shaders.compileProgram(shaders.compileShader(VERTEX_SHADER, GL_VERTEX_SHADER),
+                                             shaders.compileShader(FRAGMENT_SHADER, GL_FRAGMENT_SHADER))
+        except Exception as e: # Shader compile/link errors: fall back to immediate mode
+            print(f"Instanced rendering unavailable: {e}")
+            return None
+        renderer = cls(program)
+        missing = [name for name, loc in zip(ATTRIBUTES, renderer.locations) if loc < 0 and name in REQUIRED_ATTRIBUTES]
+        if missing:
+            print(f"Instanced rendering unavailable: no location for {', '.join(missing)}")
+            return None
+        return renderer
+
+    def add_mesh(self, name, rows):
+        vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        glBufferData(GL_ARRAY_BUFFER, rows.nbytes, rows, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self.meshes[name] = (vbo, len(rows))
+
+    def draw(self, name, instances):
+        """Draw every row of the packed (n, 8) instance array with the named mesh in one call."""
+        if len(instances) == 0:
+            return
+        vbo, count = self.meshes[name]
+        pos_loc, normal_loc, part_loc, xform_loc, color_loc = self.locations
+        glUseProgram(self.program)
+        glBindBuffer(GL_ARRAY_BUFFER, vbo)
+        # A location of -1 is an attribute the driver optimized out: nothing to bind
+        for loc, size, offset in ((pos_loc, 3, 0), (normal_loc, 3, 12), (part_loc, 4, 24)):
+            if loc < 0:
+                continue
+            glEnableVertexAttribArray(loc)
+            glVertexAttribPointer(loc, size, GL_FLOAT, GL_FALSE, VERTEX_STRIDE, ctypes.c_void_p(offset))
+        glBindBuffer(GL_ARRAY_BUFFER, self.instance_vbo)
+        glBufferData(GL_ARRAY_BUFFER, instances.nbytes, instances, GL_STREAM_DRAW)
+        # instance_xform = columns 0..3, instance_color = rgb (4..6) + scale (7)
+        for loc, offset in ((xform_loc, 0), (color_loc, 16)):
+            if loc < 0:
+                continue
+            glEnableVertexAttribArray(loc)
+            glVertexAttribPointer(loc, 4, GL_FLOAT, GL_FALSE, INSTANCE_STRIDE, ctypes.c_void_p(offset))
+            glVertexAttribDivisor(loc, 1)
+        glDrawArraysInstanced(GL_TRIANGLES, 0, count, len(instances))
+        self.draw_calls += 1
+        for loc in self.locations:
+            if loc >= 0:
+                glDisableVertexAttribArray(loc)
+        for loc in (xform_loc, color_loc):
+            if loc >= 0:
+                glVertexAttribDivisor(loc, 0)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glUseProgram(0)
@@ -0,0 +1,37 @@
+"""Level-of-detail tier selection with hysteresis, per enemy slot.
+
+Tier 0 is the full model and each higher tier a cheaper stand-in. A slot moves to a
+coarser tier only once its distance passes that tier's threshold plus the hysteresis
+band, and back to a finer one only once it drops below the threshold minus the band,
+so a wolf pacing along a boundary does not flicker between models every frame.
+
+Slots are reused by later spawns, so each remembered tier is stored with the slot's
+generation (EnemyBatch.generation); a wolf in a slot whose generation changed picks
+its tier from the plain thresholds instead of inheriting the dead wolf's.
+"""
+import numpy as np
+
+
+class LodSelector:
+    def __init__(self, thresholds, hysteresis, capacity=64):
+        self.thresholds = np.asarray(thresholds, dtype=float) # Ascending; len(thresholds) + 1 tiers
+        self.hysteresis = float(hysteresis)
+        self.tiers = np.zeros(capacity, dtype=np.int8) # Last tier chosen per slot
+        self.generations = np.zeros(capacity, dtype=np.uint32) # Slot generation that tier was chosen for
+
+    def select(self, slots, distances, generations):
+        """Tier for each slot at the given distance, remembering it for the slot's current generation."""
+        if len(slots) and slots.max() >= len(self.tiers):
+            size = max(2 * len(self.tiers), int(slots.max()) + 1)
+            tiers, known = np.zeros(size, dtype=np.int8), np.zeros(size, dtype=np.uint32)
+            tiers[:len(self.tiers)], known[:len(self.generations)] = self.tiers, self.generations
+            self.tiers, self.generations = tiers, known
+        previous = self.tiers[slots]
+        d = np.asarray(distances, dtype=float)[:, None]
+        # Any boundary the slot's current tier is already past only needs the smaller distance to stay
+        band = np.where(np.arange(len(self.thresholds)) < previous[:, None], -self.hysteresis, self.hysteresis)
+        band[self.generations[slots] != generations] = 0.0 # A new wolf in the slot has no tier yet
+        tier = np.count_nonzero(d > self.thresholds + band, axis=1).astype(np.int8)
+        self.tiers[slots] = tier
+        self.generations[slots] = generations
+        return tier
@@ -0,0 +1,157 @@
+"""Offscreen OpenGL context through EGL, for render checks on machines without a display.
+
+With Mesa this runs on the llvmpipe software rasterizer:
+
+    EGL_PLATFORM=surfaceless python offscreen.py --wolves 500 --bullets 5000
+    EGL_PLATFORM=surfaceless python offscreen.py --lod --wolves 2000
+
+GLUT is never initialised here, so only GLUT-free paths (the instanced renderer,
+raw GL/GLU drawing) can be exercised.
+"""
+import os
+
+os.environ.setdefault('PYOPENGL_PLATFORM', 'egl')
+os.environ.setdefault('EGL_PLATFORM', 'surfaceless')
+
+import argparse
+import ctypes
+import time
+
+import numpy as np
+from OpenGL import EGL
+from OpenGL.GL import *
+from OpenGL.GLU import *
+
+
+def create_context(width=640, height=480):
+    """Make a pbuffer-backed desktop GL (compatibility profile) context current. Returns (display, surface, context)."""
+    display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+    if not EGL.eglInitialize(display, None, None):
+        raise RuntimeError("eglInitialize failed")
+    attrs = (EGL.EGLint * 13)(EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT, EGL.EGL_RED_SIZE, 8, EGL.EGL_GREEN_SIZE, 8,
+                              EGL.EGL_BLUE_SIZE, 8, EGL.EGL_DEPTH_SIZE, 24, EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                              EGL.EGL_NONE)
+    config, count = EGL.EGLConfig(), EGL.EGLint()
+    if not EGL.eglChooseConfig(display, attrs, ctypes.pointer(config), 1, ctypes.pointer(count)) or count.value == 0:
+        raise RuntimeError("no EGL config with desktop OpenGL and a depth buffer")
+    surface = EGL.eglCreatePbufferSurface(display, config, (EGL.EGLint * 5)(EGL.EGL_WIDTH, width, EGL.EGL_HEIGHT, height, EGL.EGL_NONE))
+    EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+    context = EGL.eglCreateContext(display, config, EGL.EGL_NO_CONTEXT, None)
+    if not EGL.eglMakeCurrent(display, surface, surface, context):
+        raise RuntimeError("eglMakeCurrent failed")
+    glViewport(0, 0, width, height)
+    return display, surface, context
+
+
+def setup_scene(width, height, size_x, size_z, wall_height):
+    """Projection, overhead camera and GL_LIGHT0 set up the way display() does."""
+    glMatrixMode(GL_PROJECTION)
+    glLoadIdentity()
+    gluPerspective(45.0, width / height, 0.1, 500.0)
+    glMatrixMode(GL_MODELVIEW)
+    glLoadIdentity()
+    gluLookAt(size_x/2, max(size_x, size_z)*0.9, -size_z*0.2, size_x/2, 0, size_z/2, 0, 1, 0)
+    glEnable(GL_DEPTH_TEST)
+    glEnable(GL_LIGHTING)
+    glEnable(GL_LIGHT0)
+    glLightfv(GL_LIGHT0, GL_POSITION, [size_x/2, wall_height*1.8, size_z/2, 1.0])
+    glLightfv(GL_LIGHT0, GL_DIFFUSE, [0.9, 0.9, 0.8, 1])
+    glLightfv(GL_LIGHT0, GL_AMBIENT, [0.35, 0.35, 0.35, 1])
+    glClearColor(0.05, 0.05, 0.15, 1.0)
+
+
+def covered_pixels(width, height):
+    """Pixels that differ from the clear color after the frame."""
+    pixels = np.frombuffer(glReadPixels(0, 0, width, height, GL_RGB, GL_UNSIGNED_BYTE), dtype=np.uint8).reshape(-1, 3)
+    background = np.array([13, 13, 38], dtype=np.int16)
+    return int(np.count_nonzero(np.abs(pixels.astype(np.int16) - background).sum(axis=1) > 6))
+
+
+def check_instanced(wolves=200, bullets=2000, frames=20, width=640, height=480, seed=1):
+    from instanced import InstancedRenderer, pack_instances, sphere_mesh, wolf_mesh
+    size_x = size_z = 100.0
+    create_context(width, height)
+    print(glGetString(GL_VERSION).decode(), '|', glGetString(GL_RENDERER).decode())
+    renderer = InstancedRenderer.create()
+    if renderer is None:
+        print("instanced path unavailable: the game falls back to immediate mode")
+        return None
+    renderer.add_mesh('wolf', wolf_mesh((1.0, 1.0, 1.0), (0.8, 0.8, 0.8, 0.0), (1.1, 1.1, 1.1), (0.1, 0.1, 0.1)))
+    renderer.add_mesh('bullet', sphere_mesh(6, 6))
+    rng = np.random.default_rng(seed)
+    heights = rng.uniform(1.5, 2.5, wolves)
+    wolf_data = pack_instances(np.column_stack([rng.uniform(5, 95, wolves), np.zeros(wolves), rng.uniform(5, 95, wolves)]),
+                               rng.uniform(-180, 180, wolves), rng.uniform(0.2, 0.9, (wolves, 3)), heights)
+    bullet_data = pack_instances(np.column_stack([rng.uniform(0, 100, bullets), rng.uniform(0.5, 2, bullets), rng.uniform(0, 100, bullets)]),
+                                 0.0, np.tile([1.0, 0.5, 0.0], (bullets, 1)), 0.1)
+    setup_scene(width, height, size_x, size_z, 8.0)
+    start = time.perf_counter()
+    for _ in range(frames):
+        glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+        renderer.draw('wolf', wolf_data)
+        renderer.draw('bullet', bullet_data)
+        glFinish()
+    frame_ms = (time.perf_counter() - start) / frames * 1000
+    error = glGetError()
+    covered = covered_pixels(width, height)
+    print(f"{wolves} wolves + {bullets} bullets: {renderer.draw_calls // frames} draw calls/frame, "
+          f"{frame_ms:.2f} ms/frame, {covered} pixels covered, glGetError={error}")
+    return {'frame_ms': frame_ms, 'covered': covered, 'error': error}
+
+
+def check_lod(wolves=2000, frames=20, width=640, height=480, seed=1):
+    """A crowd spread over the arena, drawn all at full detail and then through the LOD tiers."""
+    from instanced import InstancedRenderer, billboard_mesh, pack_instances, wolf_box_mesh, wolf_mesh
+    from lod import LodSelector
+    size_x = size_z = 100.0
+    create_context(width, height)
+    renderer = InstancedRenderer.create()
+    if renderer is None:
+        print("instanced path unavailable: the game falls back to immediate mode")
+        return None
+    meshes = {'wolf': wolf_mesh((1.0, 1.0, 1.0), (0.8, 0.8, 0.8, 0.0), (1.1, 1.1, 1.1), (0.1, 0.1, 0.1)),
+              'wolf_box': wolf_box_mesh((1.0, 1.0, 1.0), (0.8, 0.8, 0.8, 0.0), (1.1, 1.1, 1.1)),
+              'wolf_billboard': billboard_mesh(0.6, 0.15, 0.75)}
+    for name, rows in meshes.items():
+        renderer.add_mesh(name, rows)
+    rng = np.random.default_rng(seed)
+    heights = rng.uniform(1.5, 2.5, wolves)
+    feet = np.column_stack([rng.uniform(5, 95, wolves), np.zeros(wolves), rng.uniform(5, 95, wolves)])
+    camera = np.array([size_x/2, max(size_x, size_z)*0.9, -size_z*0.2]) # setup_scene's eye
+    to_camera = camera - feet
+    tiers = LodSelector((12.0, 30.0), 1.0).select(np.arange(wolves), np.linalg.norm(to_camera, axis=1) / heights,
+                                                  np.ones(wolves, dtype=np.uint32))
+    yaw = np.where(tiers == 2, np.degrees(np.arctan2(to_camera[:, 0], to_camera[:, 2])), rng.uniform(-180, 180, wolves))
+    data = pack_instances(feet, yaw, rng.uniform(0.2, 0.9, (wolves, 3)), heights)
+    setup_scene(width, height, size_x, size_z, 8.0)
+    results = {}
+    for label, split in (('full', np.zeros(wolves, dtype=np.int8)), ('lod', tiers)):
+        names = ('wolf', 'wolf_box', 'wolf_billboard')
+        vertices = sum(int(np.count_nonzero(split == t)) * len(meshes[name]) for t, name in enumerate(names))
+        start = time.perf_counter()
+        for _ in range(frames):
+            glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
+            for t, name in enumerate(names):
+                renderer.draw(name, data[split == t])
+            glFinish()
+        frame_ms = (time.perf_counter() - start) / frames * 1000
+        results[label] = frame_ms
+        print(f"{label:>5}: tiers {np.bincount(split, minlength=3).tolist()}, {vertices} vertices/frame, "
+              f"{frame_ms:.2f} ms/frame, {covered_pixels(width, height)} pixels covered, glGetError={glGetError()}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offscreen (EGL/Mesa) render checks")
+    parser.add_argument('--wolves', type=int, default=200)
+    parser.add_argument('--bullets', type=int, default=2000)
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--lod', action='store_true', help="compare a full-detail crowd with the LOD tiers")
+    args = parser.parse_args(argv)
+    if args.lod:
+        check_lod(args.wolves, args.frames)
+    else:
+        check_instanced(args.wolves, args.bullets, args.frames)
+
+
+if __name__ == "__main__": main()
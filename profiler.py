@@ -0,0 +1,85 @@
+"""Per-frame phase timings kept in a ring buffer, with optional CSV streaming.
+
+Call sites bracket a phase with mark()/record():
+
+    t = profiler.mark()
+    update_player(dt)
+    t = profiler.record('update_player', t)
+
+Both are constant-returning no-ops while the profiler is disabled. Times recorded
+between two end_frame() calls add up into one frame row (the simulation may step
+zero or several times per rendered frame).
+"""
+import atexit
+import csv
+import time
+
+import numpy as np
+
+
+class FrameProfiler:
+    def __init__(self, phases, capacity=600):
+        self.phases = list(phases)
+        self.index = {name: i for i, name in enumerate(self.phases)}
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, len(self.phases))) # seconds
+        self.current = [0.0] * len(self.phases)
+        self.frames = 0
+        self.enabled = False
+        self.csv_file = None
+        self.csv_writer = None
+        self._stats = None
+        self._stats_frame = -1
+
+    def mark(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def record(self, phase, start):
+        """Add the time since start to phase; returns a new mark for chaining."""
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        self.current[self.index[phase]] += now - start
+        return now
+
+    def end_frame(self):
+        if not self.enabled:
+            return
+        self.samples[self.frames % self.capacity] = self.current
+        if self.csv_writer:
+            self.csv_writer.writerow([self.frames] + [f"{t*1000:.4f}" for t in self.current] + [f"{sum(self.current)*1000:.4f}"])
+            if self.frames % 60 == 0:
+                self.csv_file.flush()
+        self.frames += 1
+        self.current = [0.0] * len(self.phases)
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.current = [0.0] * len(self.phases)
+        return self.enabled
+
+    def stream_csv(self, path):
+        """Write one row per frame (milliseconds per phase) to path; enables the profiler."""
+        self.close_csv()
+        self.csv_file = open(path, 'w', newline='')
+        self.csv_writer = csv.writer(self.csv_file)
+        self.csv_writer.writerow(['frame'] + [f"{name}_ms" for name in self.phases] + ['total_ms'])
+        atexit.register(self.close_csv)
+        self.enabled = True
+
+    def close_csv(self):
+        if self.csv_file:
+            self.csv_file.close()
+        self.csv_file = None
+        self.csv_writer = None
+
+    def percentiles(self, every=30):
+        """{phase: (p50, p95, p99)} in milliseconds over the ring buffer, recomputed every `every` frames."""
+        if self.frames == 0:
+            return {}
+        if self._stats is None or self.frames - self._stats_frame >= every:
+            rows = self.samples[:min(self.frames, self.capacity)] * 1000
+            p = np.percentile(rows, [50, 95, 99], axis=0)
+            self._stats = {name: tuple(p[:, i]) for i, name in enumerate(self.phases)}
+            self._stats_frame = self.frames
+        return self._stats
@@ -1,12 +1,42 @@
-from OpenGL.GL import *
-from OpenGL.GLU import *
-from OpenGL.GLUT import *
-from OpenGL.GLUT import GLUT_BITMAP_HELVETICA_18, GLUT_BITMAP_TIMES_ROMAN_24
 import math
+import os
 import random
-import time
 import sys
 
+import numpy as np
+
+import coop
+from bullet_pool import BulletPool, OWNER_ENEMY, OWNER_PLAYER, sweep_sphere, sweep_spheres
+from campaign import Campaign
+from enemy_batch import EnemyBatch
+from entities import ArchetypeRegistry, Enemy, Player
+from fixed_step import FixedStepScheduler
+from frustum import CullCounter, Frustum
+from lod import LodSelector
+from profiler import FrameProfiler
+from replay import ReplayRecorder
+from spatial_grid import NeighbourIndex, SpatialGrid
+from spawn_placement import SpawnPlacer
+from flow_field import FlowField, ObstacleGrid
+from spawn_pool import SpawnPool
+
+# Headless mode (see headless.py) runs the simulation without importing OpenGL
+HEADLESS = os.environ.get('DUNGEON_HEADLESS') == '1'
+if not HEADLESS:
+    from OpenGL.GL import *
+    from OpenGL.GLU import *
+    from OpenGL.GLUT import *
+    from OpenGL.GLUT import GLUT_BITMAP_HELVETICA_18, GLUT_BITMAP_TIMES_ROMAN_24
+    from display_lists import DisplayListCache
+    from hud_text import HudText
+    from instanced import InstancedRenderer, billboard_mesh, pack_instances, sphere_mesh, wolf_box_mesh, wolf_mesh
+    from quadric_cache import QuadricMeshCache
+else:
+    # Only the GLUT input constants the update functions read (freeglut values)
+    GLUT_LEFT_BUTTON, GLUT_DOWN, GLUT_UP = 0, 0, 1
+    GLUT_KEY_LEFT, GLUT_KEY_UP, GLUT_KEY_RIGHT, GLUT_KEY_DOWN = 100, 101, 102, 103
+    GLUT_BITMAP_HELVETICA_18 = GLUT_BITMAP_TIMES_ROMAN_24 = None
+
 # --- Constants and Global Game Variables ---
 # Window
 SCREEN_WIDTH, SCREEN_HEIGHT = 1024, 768
@@ -16,10 +46,6 @@ STATE_LEVEL_TRANSITION = 1
 STATE_GAME_OVER_TRANSITION = 2
 STATE_YOU_WIN = 3
 
-game_state = STATE_PLAYING
-current_level = 1
-max_levels = 10
-
 # Player settings
 PLAYER_SPEED = 5.0
 PLAYER_ROTATE_ANGLE = 0.5  # Changed from PLAYER_ROTATE_SPEED = 100.0
@@ -40,10 +66,16 @@ PLAYER_GUN_LENGTH = PLAYER_TOTAL_HEIGHT * 0.3
 BULLET_SPEED = 30.0
 BULLET_RADIUS = 0.1
 BULLET_LIFESPAN = 2.5
+BULLET_ARRAY_THRESHOLD = 48 # Live bullets from which update_bullets switches to the NumPy path (bench.py crossover)
+PLAYER_BULLET_COLOR = [1.0, 1.0, 0.0]
+ENEMY_BULLET_COLOR = [1.0, 0.5, 0.0]
 
 # Enemy settings
 ENEMY_MIN_DISTANCE_FROM_PLAYER = 3.5
 ENEMY_BASE_COLLISION_RADIUS = 0.6 # This will be scaled by model height
+ENEMY_SEPARATION_RADIUS = 3.0 # Wolves closer than this push apart (boids separation)
+ENEMY_SEPARATION_NEIGHBOURS = 6 # Nearest neighbours each wolf steers away from
+ENEMY_SEPARATION_WEIGHT = 1.5 # Separation against pursuit; 1 balances one touching neighbour
 
 # Perk System Variables
 PERK_SCORE_MULTIPLIER_DURATION = 5.0
@@ -53,40 +85,116 @@ PERK_RAPID_FIRE_DURATION = 5.0
 DUNGEON_SIZE_X = 70.0
 DUNGEON_SIZE_Z = 70.0
 WALL_HEIGHT = 8.0
+COLLISION_GRID_CELL_SIZE = 5.0 # Broad-phase grid for bullet-vs-enemy checks
+SPAWN_MARGIN = 7.0 # Enemies spawn at least this far from the walls
+SPAWN_CELL_SIZE = 1.0 # Occupancy grid resolution for spawn placement
+# Interior walls and pillars, full wall height, as (x_min, z_min, x_max, z_max) boxes on even coordinates so
+# they fill whole pathfinding cells
+DUNGEON_OBSTACLES = ((16,16,20,20),(50,16,54,20),(16,50,20,54),(50,50,54,54), # Pillars
+                     (26,8,28,24),(42,46,44,62),(8,42,24,44),(46,26,62,28)) # Wall segments
+FLOW_CELL_SIZE = 2.0 # Pathfinding grid resolution (flow_field.py)
+SPAWN_OBSTACLE_CLEARANCE = 1.5 # Enemies spawn at least this far from an obstacle
 
 # Camera
 CAMERA_MODE_FIRST_PERSON = 0
 CAMERA_MODE_THIRD_PERSON = 1
-camera_mode = CAMERA_MODE_THIRD_PERSON
 tp_camera_distance = 8.0
-tp_camera_pitch = -30.0
-tp_camera_yaw_offset = 0.0
-
-# Global lists for game objects
-player = {}
-enemies = []
-bullets = []
-
-# Level Management
-level_configs = {}
-enemies_killed_this_level = 0
-enemies_spawned_this_level = 0
-boss_entity = None
 
 # Timing
 last_time = 0.0
-transition_timer = 0.0
+SIM_TICK_RATE = float(os.environ.get('DUNGEON_TICK_RATE', 60)) # Fixed simulation ticks per second
+SIM_MAX_CATCH_UP = 5 # Max ticks per rendered frame before the backlog is dropped
+scheduler = FixedStepScheduler(SIM_TICK_RATE, SIM_MAX_CATCH_UP)
+render_alpha = 1.0 # How far the frame being drawn sits between the last two ticks
 TRANSITION_DURATION = 1.5
-transition_color = [0.0, 0.0, 0.0]
-next_game_state_after_transition = STATE_PLAYING
 
-# Input states
-keys_pressed = {}
-special_keys_pressed = {}
-mouse_buttons = {}
+# Profiling (P toggles the HUD overlay, DUNGEON_PROFILE_CSV=path streams per-frame rows)
+PROFILE_PHASES = ['update_player','update_enemies','update_bullets','draw_dungeon','draw_enemies','draw_bullets','draw_ui']
+profiler = FrameProfiler(PROFILE_PHASES)
+
+# Per-tick input log (replay.py); set up by main() when DUNGEON_RECORD names a file
+recorder = None
+
+# Input
+TICK_KEYS = (b'f',b'h',b'c',b'g') # Key-down actions that change the simulation
+
+# Cylinders and spheres tessellated once per shape (quadric_cache.py), created once the GL context exists
+quadric_meshes = None
 
-# GLU Quadric object for cylinders
-glu_quadric = None
+# Compiled wolf meshes keyed on (LOD tier, model_height, color), created once the GL context exists
+WOLF_DISPLAY_LIST_CAPACITY = 48
+wolf_display_lists = None
+
+# Wolf level of detail: full model, then boxes, then a camera-facing billboard
+WOLF_LOD_DISTANCES = (12.0, 30.0) # Camera distance in wolf heights where each cheaper tier starts
+WOLF_LOD_HYSTERESIS = 1.0 # Wolf heights past a boundary before switching, so tiers do not flicker
+WOLF_LOD_TIERS = ('wolf','wolf_box','wolf_billboard')
+wolf_lod = LodSelector(WOLF_LOD_DISTANCES, WOLF_LOD_HYSTERESIS)
+
+# Perspective set in reshape(); display() culls against the same frustum before drawing
+CAMERA_FOV_Y, CAMERA_NEAR, CAMERA_FAR = 45.0, 0.1, 500.0
+WOLF_CULL_RADIUS_RATIO = 0.8 # Wolf model (face, gun) reaches this many heights from its centre
+cull_counter = CullCounter(('enemies', 'bullets')) # Drawn vs culled last frame, shown in the profiler overlay
+
+# Instanced wolves/bullets (one draw call each); None means the immediate-mode path is used
+instanced_renderer = None
+
+# Glyph-atlas HUD text with its per-string cache; None means glutBitmapCharacter is used
+HUD_TEXT_CACHE_CAPACITY = 64
+hud_text = None
+
+# --- Game World ---
+class GameWorld:
+    """Everything one running game owns: entities, level progress, timers, input state and its RNG.
+
+    The simulation functions take the world as their first argument, so any number of
+    worlds can run side by side in one process (headless.py, sweep.py, replay.py).
+    The GLUT window below plays the module-level `world`.
+    """
+
+    def __init__(self, campaign=None, seed=None):
+        self.rng = random.Random(seed)
+        self.campaign = campaign # Levels and wolf types from a campaign file (campaign.py) instead of the built-in tables
+        self.game_state = STATE_PLAYING
+        self.current_level = 1
+        self.max_levels = 0 # Set by init_level_configs
+        self.level_configs = {}
+        self.enemies_killed_this_level = 0
+        self.enemies_spawned_this_level = 0
+        self.boss_entity = None
+        self.player = None
+        self.players = [] # Every hero; players[0] is player, the one the input tables below drive (coop.py)
+        self.player_inputs = [] # Per hero, its own input tables (None for player: the world's)
+        self.heroes_joined = 0 # Heroes add_player made, so a hero's number is never reused
+        self.enemies = []
+        # Per-level EnemyArchetype tables (speed, reload, radius and shades precomputed); rebuilt when configs reload
+        self.enemy_archetypes = ArchetypeRegistry(lambda type_id, level: get_enemy_definition(self, type_id, level),
+                                                  PLAYER_SPEED, ENEMY_BASE_COLLISION_RADIUS)
+        self.bullets = BulletPool()
+        self.enemy_batch = EnemyBatch()
+        self.enemy_grid = SpatialGrid(DUNGEON_SIZE_X, DUNGEON_SIZE_Z, COLLISION_GRID_CELL_SIZE)
+        self.enemy_neighbours = NeighbourIndex(DUNGEON_SIZE_X, DUNGEON_SIZE_Z, ENEMY_SEPARATION_RADIUS)
+        self.spawn_placer = SpawnPlacer(SPAWN_MARGIN, SPAWN_MARGIN, DUNGEON_SIZE_X - SPAWN_MARGIN,
+                                        DUNGEON_SIZE_Z - SPAWN_MARGIN, SPAWN_CELL_SIZE)
+        self.obstacles = ObstacleGrid(DUNGEON_SIZE_X, DUNGEON_SIZE_Z, FLOW_CELL_SIZE, DUNGEON_OBSTACLES)
+        self.spawn_placer.close(self.obstacles.boxes, SPAWN_OBSTACLE_CLEARANCE)
+        self.flow_field = FlowField(self.obstacles) # Follows the player's cell (update_enemies)
+        self.sim_time = 0.0 # Simulated seconds, advanced by update_game_state (perk timers use this)
+        self.player_prev_pos = None # Player position before the last tick, for render interpolation
+        self.transition_timer = 0.0
+        self.transition_color = [0.0, 0.0, 0.0]
+        self.next_game_state_after_transition = STATE_PLAYING
+        self.camera_mode = CAMERA_MODE_THIRD_PERSON
+        self.tp_camera_pitch = -30.0
+        self.tp_camera_yaw_offset = 0.0
+        # Input states
+        self.keys_pressed = {}
+        self.special_keys_pressed = {}
+        self.mouse_buttons = {}
+        self.key_presses = [] # Queued TICK_KEYS, handled at the start of the next tick
+
+# The world the GLUT window shows and the callbacks drive
+world = GameWorld(Campaign(os.environ['DUNGEON_CAMPAIGN']) if os.environ.get('DUNGEON_CAMPAIGN') else None)
 
 # --- Helper Functions (Math, etc.) ---
 def vector_length(v):
@@ -106,19 +214,30 @@ def check_sphere_collision(pos1, radius1, pos2, radius2):
     return dist < (radius1 + radius2)
 
 # --- Game Object Initialization and Management ---
-def init_player():
-    global player
-    player = {
-        'pos': [DUNGEON_SIZE_X / 2, PLAYER_BODY_Y_OFFSET, DUNGEON_SIZE_Z / 2], 
-        'rotation_y': 0.0, 'rotation_x': 0.0,
-        'health': PLAYER_MAX_HEALTH, 'score': 0, 'speed': PLAYER_SPEED,
-        'shoot_cooldown': 0.0, 'current_shoot_cooldown_time': PLAYER_BASE_SHOOT_COOLDOWN_TIME,
-        'kills_for_health_perk': 0, 'kills_for_score_perk': 0, 'kills_for_gun_perk': 0,
-        'health_perk_available': False, 'score_perk_available': False, 'gun_perk_available': False,
-        'score_perk_active_until': 0, 'gun_perk_active_until': 0,
-    }
+def init_player(world):
+    world.player = Player([DUNGEON_SIZE_X / 2, PLAYER_BODY_Y_OFFSET, DUNGEON_SIZE_Z / 2],
+                    PLAYER_MAX_HEALTH, PLAYER_SPEED, PLAYER_BASE_SHOOT_COOLDOWN_TIME)
+    world.players = [world.player]
+    world.player_inputs = [None]
 
-def get_enemy_definition(enemy_type_id):
+def add_player(world):
+    # Another hero, with input tables of its own, for a co-op client (server.py)
+    player = Player(hero_start(world, len(world.players)), PLAYER_MAX_HEALTH, PLAYER_SPEED,
+                    PLAYER_BASE_SHOOT_COOLDOWN_TIME, coop.next_number(world))
+    coop.join(world, player)
+    return player
+
+def hero_start(world,index):
+    # The first hero starts at the dungeon centre, co-op heroes a few steps around it
+    ox,oz=coop.start_offset(index)
+    x,z=DUNGEON_SIZE_X/2+ox,DUNGEON_SIZE_Z/2+oz
+    if index:
+        x,z=world.obstacles.push_out_one(x,z,PLAYER_RADIUS)
+    return [x,PLAYER_BODY_Y_OFFSET,z]
+
+def get_enemy_definition(world,enemy_type_id, level=None):
+    if world.campaign:
+        return world.campaign.enemy_definition(enemy_type_id, world.current_level if level is None else level)
     if enemy_type_id == 1:
         return {'name':'Type1Wolf','health':3,'damage':3,'speed_mult':0.4,'model_height':1.5,'color':[0.6,0.5,0.4],'points':10}
     elif enemy_type_id == 2:
@@ -129,9 +248,20 @@ def get_enemy_definition(enemy_type_id):
         return {'name':'BossWolf','health':15,'damage':7,'speed_mult':0.8,'model_height':2.5,'color':[0.3,0.3,0.3],'points':100,'is_boss':True}
     return {}
 
-def init_level_configs():
-    global level_configs
-    level_configs = {
+def get_enemy_archetype(world,enemy_type_id):
+    return world.enemy_archetypes.get(world.current_level,enemy_type_id)
+
+def new_spawn_pool(enemy_types):
+    # Counted multiset of the level's wolves; the boss is taken explicitly, never drawn at random
+    return SpawnPool(enemy_types,priority=('boss',))
+
+def init_level_configs(world):
+    world.enemy_archetypes.invalidate() # Configs (re)loaded: archetype tables rebuild on next use
+    if world.campaign:
+        world.level_configs = world.campaign.level_configs(new_spawn_pool) # Levels decode on first use
+        world.max_levels = world.campaign.level_count
+        return
+    world.level_configs = {
         1: {'total_enemies':5,'max_concurrent':1,'enemy_types':[1]}, 2: {'total_enemies':6,'max_concurrent':2,'enemy_types':[1]},
         3: {'total_enemies':9,'max_concurrent':3,'enemy_types':[1]}, 4: {'total_enemies':5,'max_concurrent':1,'enemy_types':[2]},
         5: {'total_enemies':6,'max_concurrent':2,'enemy_types':[2]}, 6: {'total_enemies':9,'max_concurrent':3,'enemy_types':[2]},
@@ -139,118 +269,112 @@ def init_level_configs():
         9: {'total_enemies':9,'max_concurrent':3,'enemy_types':[3]},
         10: {'total_enemies':1+15,'max_concurrent_boss_phase':1+3,'enemy_types':['boss']+[1]*5+[2]*5+[3]*5,'is_boss_level':True}
     }
-    for i in range(1, max_levels + 1):
-        level_configs[i]['enemies_to_spawn_pool'] = list(level_configs[i]['enemy_types'])
+    world.max_levels = len(world.level_configs)
+    for i in range(1, world.max_levels + 1):
+        world.level_configs[i]['enemies_to_spawn_pool'] = new_spawn_pool(world.level_configs[i]['enemy_types'])
 
-def spawn_enemy():
-    global enemies_spawned_this_level, boss_entity, enemies
-    level_conf = level_configs[current_level]
-    if enemies_spawned_this_level >= level_conf['total_enemies']: 
+def spawn_enemy(world):
+    enemy_batch=world.enemy_batch
+    spawn_placer=world.spawn_placer
+    level_conf = world.level_configs[world.current_level]
+    if world.enemies_spawned_this_level >= level_conf['total_enemies']: 
         return
     enemy_type_to_spawn = None
     is_spawning_boss = False
     if 'is_boss_level' in level_conf:
-        if not boss_entity and 'boss' in level_conf['enemies_to_spawn_pool']:
+        if not world.boss_entity and level_conf['enemies_to_spawn_pool'].take('boss'):
             enemy_type_to_spawn = 'boss'
-            level_conf['enemies_to_spawn_pool'].remove('boss')
             is_spawning_boss = True
-        elif level_conf['enemies_to_spawn_pool']:
-            pool = [t for t in level_conf['enemies_to_spawn_pool'] if t != 'boss']
-            if pool: 
-                enemy_type_to_spawn = random.choice(pool)
-                level_conf['enemies_to_spawn_pool'].remove(enemy_type_to_spawn)
+        else:
+            enemy_type_to_spawn = level_conf['enemies_to_spawn_pool'].draw(world.rng) # Never the boss; None when only it is left
     else:
         if level_conf['enemies_to_spawn_pool']: 
             enemy_type_to_spawn = level_conf['enemy_types'][0] 
     if enemy_type_to_spawn is None: 
         return
-    config = get_enemy_definition(enemy_type_to_spawn)
-    if not config: 
+    archetype = get_enemy_archetype(world,enemy_type_to_spawn)
+    if archetype is None: 
         return
-    margin=7.0
-    x=random.uniform(margin,DUNGEON_SIZE_X-margin)
-    enemy_base_y=config['model_height']/2
-    z=random.uniform(margin,DUNGEON_SIZE_Z-margin)
+    enemy_base_y=archetype.model_height/2
     min_spawn_dist_player=15.0
     min_spawn_dist_enemy=5.0
-    spawn_attempts=0
-    valid_spawn=False
-    while spawn_attempts < 20 and not valid_spawn:
-        valid_spawn=True
-        if distance_3d([x,enemy_base_y,z],[player['pos'][0],player['pos'][1],player['pos'][2]]) < min_spawn_dist_player:
-            valid_spawn=False
-        for ex_en in enemies:
-            if distance_3d([x,enemy_base_y,z],[ex_en['pos'][0],ex_en['pos'][1],ex_en['pos'][2]]) < min_spawn_dist_enemy:
-                valid_spawn=False
-                break
-        if not valid_spawn: 
-            x=random.uniform(margin,DUNGEON_SIZE_X-margin)
-            z=random.uniform(margin,DUNGEON_SIZE_Z-margin)
-        spawn_attempts+=1
-    if not valid_spawn:
-        if is_spawning_boss: 
-            level_conf['enemies_to_spawn_pool'].insert(0,'boss')
-        elif enemy_type_to_spawn and enemy_type_to_spawn != 'boss' and 'is_boss_level' in level_conf:
-            level_conf['enemies_to_spawn_pool'].append(enemy_type_to_spawn)
+    spawn_placer.reset()
+    spawn_placer.block([(player.pos[0],player.pos[2]) for player in world.players],min_spawn_dist_player)
+    spawn_placer.block(enemy_batch.pos[enemy_batch.live_slots()][:,::2],min_spawn_dist_enemy)
+    spot=spawn_placer.sample(world.rng)
+    if spot is None: # No room right now: keep the wolf for a later tick
+        if 'is_boss_level' in level_conf:
+            level_conf['enemies_to_spawn_pool'].put_back(enemy_type_to_spawn)
         return
-    new_enemy = {
-        'pos':[x,enemy_base_y,z],'enemy_type_id':enemy_type_to_spawn,
-        'max_health':config['health'],'health':config['health'],'damage':config['damage'],'speed':PLAYER_SPEED*config['speed_mult'],
-        'reload_time':1.5/(config['speed_mult']+0.5),'shoot_cooldown':random.uniform(1.0,3.0),'points':config['points'],
-        'color':config['color'],'model_height':config['model_height'],
-        'collision_radius':ENEMY_BASE_COLLISION_RADIUS*(config['model_height']/1.8),
-        'is_boss':config.get('is_boss',False),'rotation_y':0.0
-    }
-    enemies.append(new_enemy)
-    enemies_spawned_this_level+=1
+    x,z=spot
+    new_enemy = Enemy(archetype,[x,enemy_base_y,z])
+    # Speed, cooldowns and facing live in enemy_batch (see update_enemies)
+    enemy_batch.add(new_enemy,archetype.speed,archetype.reload_time,world.rng.uniform(1.0,3.0))
+    world.enemies.append(new_enemy)
+    world.enemies_spawned_this_level+=1
     if is_spawning_boss:
-        boss_entity = new_enemy
-
-def init_level(level_num):
-    global current_level,enemies,bullets,game_state,enemies_killed_this_level,enemies_spawned_this_level,boss_entity,player
-    current_level=level_num
-    enemies.clear()
-    bullets.clear()
-    boss_entity=None
-    game_state=STATE_PLAYING
-    enemies_killed_this_level=0
-    enemies_spawned_this_level=0
-    player['pos']=[DUNGEON_SIZE_X/2,PLAYER_BODY_Y_OFFSET,DUNGEON_SIZE_Z/2]
-    player['rotation_y']=0.0
-    player['rotation_x']=0.0
-    player['health_perk_available']=False
-    player['score_perk_available']=False
-    player['gun_perk_available']=False
-    player['score_perk_active_until']=0
-    player['gun_perk_active_until']=0
-    player['kills_for_health_perk']=0
-    player['kills_for_score_perk']=0
-    player['kills_for_gun_perk']=0
-    level_configs[current_level]['enemies_to_spawn_pool'] = list(level_configs[current_level]['enemy_types'])
-
-def create_bullet(start_pos,direction_vec,owner_type,damage_val,color_override=None):
-    bullets.append({'pos':list(start_pos),'dir':direction_vec,'owner':owner_type,'damage':damage_val,'lifespan':BULLET_LIFESPAN,
-                    'color':color_override if color_override else ([1.0,1.0,0.0] if owner_type=='PLAYER' else [1.0,0.5,0.0])})
+        world.boss_entity = new_enemy
+
+def remove_enemy(world,enemy):
+    enemies=world.enemies
+    if enemy in enemies: # Enemy has no __eq__, so this is an identity match
+        enemies.remove(enemy)
+        world.enemy_batch.remove(enemy)
+
+def init_level(world,level_num):
+    level_configs=world.level_configs
+    world.current_level=level_num
+    world.enemies.clear()
+    world.enemy_batch.clear()
+    world.bullets.clear()
+    world.boss_entity=None
+    world.game_state=STATE_PLAYING
+    world.enemies_killed_this_level=0
+    world.enemies_spawned_this_level=0
+    for index,player in enumerate(world.players):
+        player.pos=hero_start(world,index)
+        player.rotation_y=0.0
+        player.rotation_x=0.0
+        if player.health<=0: # A co-op hero downed last level is back up
+            player.health=PLAYER_MAX_HEALTH
+        player.health_perk_available=False
+        player.score_perk_available=False
+        player.gun_perk_available=False
+        player.score_perk_active_until=0
+        player.gun_perk_active_until=0
+        player.kills_for_health_perk=0
+        player.kills_for_score_perk=0
+        player.kills_for_gun_perk=0
+    level_configs[world.current_level]['enemies_to_spawn_pool'] = new_spawn_pool(level_configs[world.current_level]['enemy_types'])
+    world.enemy_archetypes.build(world.current_level,level_configs[world.current_level]['enemy_types'])
+
+def create_bullet(world,start_pos,direction_vec,owner_type,damage_val,color_override=None):
+    world.bullets.spawn(start_pos,direction_vec,OWNER_PLAYER if owner_type=='PLAYER' else OWNER_ENEMY,damage_val,BULLET_LIFESPAN,
+                  color_override if color_override else (PLAYER_BULLET_COLOR if owner_type=='PLAYER' else ENEMY_BULLET_COLOR),
+                  world.player.number if owner_type=='PLAYER' else 0)
 
 # --- Update Functions ---
-def update_player(delta_time):
-    global player,camera_mode,tp_camera_pitch,tp_camera_yaw_offset
-    if player['score_perk_active_until']>0 and time.time()>player['score_perk_active_until']:
-        player['score_perk_active_until']=0
+def update_player(world,delta_time):
+    player=world.player
+    keys_pressed=world.keys_pressed
+    special_keys_pressed=world.special_keys_pressed
+    mouse_buttons=world.mouse_buttons
+    if player.score_perk_active_until>0 and world.sim_time>player.score_perk_active_until:
+        player.score_perk_active_until=0
         print("Score Perk expired.")
-    if player['gun_perk_active_until']>0:
-        if time.time()>player['gun_perk_active_until']: 
-            player['gun_perk_active_until']=0
-            player['current_shoot_cooldown_time']=PLAYER_BASE_SHOOT_COOLDOWN_TIME
+    if player.gun_perk_active_until>0:
+        if world.sim_time>player.gun_perk_active_until: 
+            player.gun_perk_active_until=0
+            player.current_shoot_cooldown_time=PLAYER_BASE_SHOOT_COOLDOWN_TIME
             print("Gun Perk expired.")
         else: 
-            player['current_shoot_cooldown_time']=0.001
+            player.current_shoot_cooldown_time=0.001
     else: 
-        player['current_shoot_cooldown_time']=PLAYER_BASE_SHOOT_COOLDOWN_TIME
-    speed=player['speed']*delta_time
+        player.current_shoot_cooldown_time=PLAYER_BASE_SHOOT_COOLDOWN_TIME
+    speed=player.speed*delta_time
     dx,dz=0,0
-    forward_x=math.sin(math.radians(player['rotation_y']))
-    forward_z=-math.cos(math.radians(player['rotation_y']))
+    forward_x=math.sin(math.radians(player.rotation_y))
+    forward_z=-math.cos(math.radians(player.rotation_y))
     if keys_pressed.get(b'w'): 
         dx+=forward_x*speed
         dz+=forward_z*speed
@@ -258,204 +382,323 @@ def update_player(delta_time):
         dx-=forward_x*speed
         dz-=forward_z*speed
     if keys_pressed.get(b'a'): 
-        player['rotation_y'] += PLAYER_ROTATE_ANGLE  # Fixed angle increment
+        player.rotation_y += PLAYER_ROTATE_ANGLE  # Fixed angle increment
     if keys_pressed.get(b'd'): 
-        player['rotation_y'] -= PLAYER_ROTATE_ANGLE  # Fixed angle increment
-    if camera_mode==CAMERA_MODE_FIRST_PERSON:
+        player.rotation_y -= PLAYER_ROTATE_ANGLE  # Fixed angle increment
+    if world.camera_mode==CAMERA_MODE_FIRST_PERSON:
         if special_keys_pressed.get(GLUT_KEY_UP): 
-            player['rotation_x']=max(-89.0,player['rotation_x']-PLAYER_ROTATE_ANGLE*0.7)
+            player.rotation_x=max(-89.0,player.rotation_x-PLAYER_ROTATE_ANGLE*0.7)
         if special_keys_pressed.get(GLUT_KEY_DOWN): 
-            player['rotation_x']=min(89.0,player['rotation_x']+PLAYER_ROTATE_ANGLE*0.7)
-    elif camera_mode==CAMERA_MODE_THIRD_PERSON: # Arrow keys orbit camera
+            player.rotation_x=min(89.0,player.rotation_x+PLAYER_ROTATE_ANGLE*0.7)
+    elif world.camera_mode==CAMERA_MODE_THIRD_PERSON: # Arrow keys orbit camera
         if special_keys_pressed.get(GLUT_KEY_UP): 
-            tp_camera_pitch=max(-89.0,tp_camera_pitch-PLAYER_ROTATE_ANGLE*0.7)
+            world.tp_camera_pitch=max(-89.0,world.tp_camera_pitch-PLAYER_ROTATE_ANGLE*0.7)
         if special_keys_pressed.get(GLUT_KEY_DOWN): 
-            tp_camera_pitch=min(0.0,tp_camera_pitch+PLAYER_ROTATE_ANGLE*0.7)
+            world.tp_camera_pitch=min(0.0,world.tp_camera_pitch+PLAYER_ROTATE_ANGLE*0.7)
         if special_keys_pressed.get(GLUT_KEY_LEFT): 
-            tp_camera_yaw_offset-=PLAYER_ROTATE_ANGLE
+            world.tp_camera_yaw_offset-=PLAYER_ROTATE_ANGLE
         if special_keys_pressed.get(GLUT_KEY_RIGHT): 
-            tp_camera_yaw_offset+=PLAYER_ROTATE_ANGLE
-    new_x=player['pos'][0]+dx
-    new_z=player['pos'][2]+dz
-    player['pos'][0]=max(PLAYER_RADIUS,min(new_x,DUNGEON_SIZE_X-PLAYER_RADIUS))
-    player['pos'][2]=max(PLAYER_RADIUS,min(new_z,DUNGEON_SIZE_Z-PLAYER_RADIUS))
-    if player['shoot_cooldown']>0: 
-        player['shoot_cooldown']-=delta_time
-    if mouse_buttons.get(GLUT_LEFT_BUTTON)==GLUT_DOWN and player['shoot_cooldown']<=0:
-        player['shoot_cooldown'] = player['current_shoot_cooldown_time']
+            world.tp_camera_yaw_offset+=PLAYER_ROTATE_ANGLE
+    new_x=player.pos[0]+dx
+    new_z=player.pos[2]+dz
+    player.pos[0]=max(PLAYER_RADIUS,min(new_x,DUNGEON_SIZE_X-PLAYER_RADIUS))
+    player.pos[2]=max(PLAYER_RADIUS,min(new_z,DUNGEON_SIZE_Z-PLAYER_RADIUS))
+    player.pos[0],player.pos[2]=world.obstacles.push_out_one(player.pos[0],player.pos[2],PLAYER_RADIUS) # Slide along walls and pillars
+    if player.shoot_cooldown>0: 
+        player.shoot_cooldown-=delta_time
+    if mouse_buttons.get(GLUT_LEFT_BUTTON)==GLUT_DOWN and player.shoot_cooldown<=0:
+        player.shoot_cooldown = player.current_shoot_cooldown_time
         
         # Get player's current orientation
-        yaw_rad = math.radians(player['rotation_y'])
+        yaw_rad = math.radians(player.rotation_y)
         
         # Calculate gun tip position matching the model's gun position
         shoulder_height = PLAYER_LEG_LENGTH + PLAYER_TORSO_HEIGHT * 0.8
         gun_forward_offset = 0.35 * PLAYER_TOTAL_HEIGHT + PLAYER_GUN_LENGTH
         
         # Calculate bullet start position at exact gun tip
-        tip_world_x = player['pos'][0] + math.sin(yaw_rad) * gun_forward_offset
-        tip_world_y = player['pos'][1] - PLAYER_BODY_Y_OFFSET + shoulder_height
-        tip_world_z = player['pos'][2] - math.cos(yaw_rad) * gun_forward_offset
+        tip_world_x = player.pos[0] + math.sin(yaw_rad) * gun_forward_offset
+        tip_world_y = player.pos[1] - PLAYER_BODY_Y_OFFSET + shoulder_height
+        tip_world_z = player.pos[2] - math.cos(yaw_rad) * gun_forward_offset
         
         # Direction matches gun direction
         direction = normalize_vector([math.sin(yaw_rad), 0, math.cos(yaw_rad)])
         
-        create_bullet([tip_world_x, tip_world_y, tip_world_z], direction, 'PLAYER', 1)
+        create_bullet(world,[tip_world_x, tip_world_y, tip_world_z], direction, 'PLAYER', 1)
         mouse_buttons[GLUT_LEFT_BUTTON]="PROCESSED"
 
-def update_enemies(delta_time):
-    global player,game_state
-    level_conf=level_configs[current_level]
-    max_c=level_conf.get('max_concurrent_boss_phase' if ('is_boss_level' in level_conf and boss_entity and boss_entity['health']>0) else 'max_concurrent',1)
-    if len(enemies)<max_c and enemies_spawned_this_level<level_conf['total_enemies']: 
-        spawn_enemy()
-    for enemy in list(enemies):
-        dist_player=distance_3d([player['pos'][0],player['pos'][1],player['pos'][2]],[enemy['pos'][0],enemy['pos'][1],enemy['pos'][2]])
-        dir_to_p_vec=[player['pos'][0]-enemy['pos'][0],0,player['pos'][2]-enemy['pos'][2]]
-        enemy['rotation_y']=math.degrees(math.atan2(dir_to_p_vec[0],dir_to_p_vec[2]))
-        if dist_player > ENEMY_MIN_DISTANCE_FROM_PLAYER:
-            dir_norm=normalize_vector(dir_to_p_vec)
-            move_dist=enemy['speed']*delta_time
-            enemy['pos'][0]+=dir_norm[0]*move_dist
-            enemy['pos'][2]+=dir_norm[2]*move_dist
-        er=enemy['collision_radius']
-        enemy['pos'][0]=max(er,min(enemy['pos'][0],DUNGEON_SIZE_X-er))
-        enemy['pos'][2]=max(er,min(enemy['pos'][2],DUNGEON_SIZE_Z-er))
-        if enemy['shoot_cooldown']>0: enemy['shoot_cooldown']-=delta_time
-        elif dist_player < 30.0:
-            enemy['shoot_cooldown']=enemy['reload_time']
-            player_center_y = player['pos'][1] - PLAYER_BODY_Y_OFFSET + PLAYER_TOTAL_HEIGHT/2
-            target_pos=[player['pos'][0],player_center_y,player['pos'][2]]
-            # Enemy gun is at its face, which is model_height/2 (body center) + some offset for face height
-            enemy_face_center_y = enemy['pos'][1] # model_height/2 is base, so this is center of body
-            gun_len_for_offset = 0.2 * enemy['model_height'] # Approx gun length for offsetting start point
-            s_yaw_e=math.sin(math.radians(enemy['rotation_y']))
-            c_yaw_e=math.cos(math.radians(enemy['rotation_y']))
-            # Start bullet from tip of gun protruding from face
-            start_x_e = enemy['pos'][0] + s_yaw_e * gun_len_for_offset
-            start_z_e = enemy['pos'][2] + c_yaw_e * gun_len_for_offset 
-            enemy_bullet_start_pos=[start_x_e,enemy_face_center_y,start_z_e]
-            enemy_bullet_dir=normalize_vector([target_pos[0]-start_x_e,target_pos[1]-enemy_face_center_y,target_pos[2]-start_z_e])
-            create_bullet(enemy_bullet_start_pos,enemy_bullet_dir,'ENEMY',enemy['damage'])
-
-def update_bullets(delta_time):
-    global player,game_state,enemies_killed_this_level,boss_entity
-    for bullet in list(bullets):
-        bullet['pos'][0]+=bullet['dir'][0]*BULLET_SPEED*delta_time
-        bullet['pos'][1]+=bullet['dir'][1]*BULLET_SPEED*delta_time
-        bullet['pos'][2]+=bullet['dir'][2]*BULLET_SPEED*delta_time
-        bullet['lifespan']-=delta_time
-        if bullet['lifespan']<=0 or not ( -BULLET_RADIUS < bullet['pos'][0] < DUNGEON_SIZE_X+BULLET_RADIUS and \
-                                        -BULLET_RADIUS < bullet['pos'][1] < WALL_HEIGHT+BULLET_RADIUS and \
-                                        -BULLET_RADIUS < bullet['pos'][2] < DUNGEON_SIZE_Z+BULLET_RADIUS ):
-            if bullet in bullets:
-                bullets.remove(bullet)
+def update_enemies(world,delta_time):
+    enemy_batch=world.enemy_batch
+    level_conf=world.level_configs[world.current_level]
+    max_c=level_conf.get('max_concurrent_boss_phase' if ('is_boss_level' in level_conf and world.boss_entity and world.boss_entity.health>0) else 'max_concurrent',1)
+    if len(world.enemies)<max_c and world.enemies_spawned_this_level<level_conf['total_enemies']: 
+        spawn_enemy(world)
+    heroes=coop.standing(world) or [world.player]
+    if len(heroes)==1:
+        player=heroes[0]
+        world.flow_field.update(player.pos[0],player.pos[2]) # Recomputes only when the player changed cells
+        target=player.pos
+    else: # Co-op: each wolf goes for the hero nearest it along the floor
+        world.flow_field.update([hero.pos[0] for hero in heroes],[hero.pos[2] for hero in heroes])
+        target=coop.wolf_targets(world,heroes)
+    firing=enemy_batch.step(delta_time,target,ENEMY_MIN_DISTANCE_FROM_PLAYER,30.0,DUNGEON_SIZE_X,DUNGEON_SIZE_Z,world.flow_field,
+                           world.enemy_neighbours,ENEMY_SEPARATION_NEIGHBOURS,ENEMY_SEPARATION_WEIGHT)
+    if len(firing):
+        if len(heroes)==1:
+            player_center_y = player.pos[1] - PLAYER_BODY_Y_OFFSET + PLAYER_TOTAL_HEIGHT/2
+            aim=[player.pos[0],player_center_y,player.pos[2]]
+        else:
+            aim=target[firing]
+            aim[:,1]=aim[:,1]-PLAYER_BODY_Y_OFFSET+PLAYER_TOTAL_HEIGHT/2
+        # Enemy gun is at body center height, protruding 0.2*model_height from the face along its facing
+        start,direction=enemy_batch.muzzle_shots(firing,aim,0.2)
+        world.bullets.spawn_many(start,direction,OWNER_ENEMY,enemy_batch.damage[firing],BULLET_LIFESPAN,ENEMY_BULLET_COLOR)
+
+def rebuild_enemy_grid(world,margin=0.0):
+    # Each enemy goes in every cell its hit sphere can reach, padded by one tick of bullet travel so a
+    # bullet only tests the cell it ended the tick in
+    enemy_grid=world.enemy_grid
+    enemy_grid.clear()
+    for enemy in world.enemies:
+        enemy_grid.insert(enemy,enemy.pos[0],enemy.pos[2],enemy.archetype.collision_radius+BULLET_RADIUS+margin)
+
+def update_bullets(world,delta_time):
+    n=world.bullets.count
+    if n==0:
+        return
+    # A level keeps a handful of bullets alive, too few for the arrays to repay each NumPy call's fixed cost
+    if n<BULLET_ARRAY_THRESHOLD:
+        update_bullets_scalar(world,delta_time)
+    else:
+        update_bullets_arrays(world,delta_time)
+
+def update_bullets_scalar(world,delta_time):
+    # Same rules as update_bullets_arrays, one bullet at a time on plain floats
+    bullets=world.bullets
+    obstacles=world.obstacles
+    n=bullets.count
+    step=BULLET_SPEED*delta_time
+    pos=bullets.pos[:n].tolist()
+    life=bullets.lifespan[:n].tolist()
+    owner=bullets.owner[:n].tolist()
+    targets=[(enemy,enemy.pos.tolist(),enemy.archetype.collision_radius+BULLET_RADIUS) for enemy in world.enemies]
+    heroes=[(player,(player.pos[0],player.pos[1],player.pos[2])) for player in coop.standing(world)] # Collision with player body center
+    hi_x,hi_y,hi_z=DUNGEON_SIZE_X+BULLET_RADIUS,WALL_HEIGHT+BULLET_RADIUS,DUNGEON_SIZE_Z+BULLET_RADIUS
+    dead=[False]*n
+    incoming=[]
+    for i,(dx,dy,dz) in enumerate(bullets.dir[:n].tolist()):
+        p=pos[i]
+        travel=[dx*step,dy*step,dz*step]
+        p[0]+=travel[0]
+        p[1]+=travel[1]
+        p[2]+=travel[2]
+        life[i]-=delta_time
+        if life[i]<=0:
+            dead[i]=True
+            continue
+        start=(p[0]-travel[0],p[1]-travel[1],p[2]-travel[2])
+        wall_t=obstacles.sweep_one(start[0],start[2],travel[0],travel[2])
+        if wall_t<=1.0:
+            travel=[travel[0]*wall_t,travel[1]*wall_t,travel[2]*wall_t]
+        dead[i]=wall_t<=1.0 or not (-BULLET_RADIUS<p[0]<hi_x and -BULLET_RADIUS<p[1]<hi_y and -BULLET_RADIUS<p[2]<hi_z)
+        if owner[i]==OWNER_PLAYER:
+            # The first wolf along the path still standing takes the bullet
+            first,first_t=None,math.inf
+            for enemy,center,radius in targets:
+                if enemy.health>0:
+                    t=sweep_sphere(start,travel,center,radius)
+                    if t<first_t:
+                        first,first_t=enemy,t
+            if first is not None:
+                dead[i]=True
+                first.health-=1 # Player bullet damage always 1
+                if first.health<=0:
+                    handle_enemy_death(world,first,coop.find(world,int(bullets.shooter[i])))
+        else:
+            # The first hero along the path takes it
+            hit,hit_t=None,math.inf
+            for player,center in heroes:
+                t=sweep_sphere(start,travel,center,BULLET_RADIUS+PLAYER_RADIUS)
+                if t<hit_t:
+                    hit,hit_t=player,t
+            if hit_t<=1.0:
+                incoming.append((i,hit))
+    bullets.pos[:n]=pos
+    bullets.lifespan[:n]=life
+    handle_player_hits(world,incoming,dead)
+    if any(dead):
+        bullets.cull(np.array(dead))
+
+def update_bullets_arrays(world,delta_time):
+    bullets=world.bullets
+    enemy_batch=world.enemy_batch
+    enemy_grid=world.enemy_grid
+    n=bullets.count
+    bullets.integrate(delta_time,BULLET_SPEED)
+    pos=bullets.pos[:n]
+    owner=bullets.owner[:n]
+    # Swept segment covered this tick, so fast bullets and long ticks can't tunnel through a wolf
+    travel=bullets.dir[:n]*(BULLET_SPEED*delta_time)
+    start=pos-travel
+    # A bullet stops at the first wall or pillar on its segment, and only what is left of it can hit anything
+    wall_t=world.obstacles.sweep(start[:,0],start[:,2],travel[:,0],travel[:,2])
+    travel=travel*np.minimum(wall_t,1.0)[:,None]
+    expired=bullets.lifespan[:n]<=0
+    dead=expired | bullets.out_of_bounds((-BULLET_RADIUS,-BULLET_RADIUS,-BULLET_RADIUS),
+                                         (DUNGEON_SIZE_X+BULLET_RADIUS,WALL_HEIGHT+BULLET_RADIUS,DUNGEON_SIZE_Z+BULLET_RADIUS)) \
+        | (wall_t<=1.0)
+    rebuild_enemy_grid(world,BULLET_SPEED*delta_time)
+    # Only player bullets in a cell some enemy reaches need the exact test
+    in_reach=enemy_grid.occupied_mask()[enemy_grid.cell_keys(pos[:,0],pos[:,2])]
+    pair_bullet=[]
+    pair_enemy=[]
+    for i in np.flatnonzero(~expired & (owner==OWNER_PLAYER) & in_reach).tolist():
+        for enemy in enemy_grid.query_point(float(pos[i,0]),float(pos[i,2])):
+            pair_bullet.append(i)
+            pair_enemy.append(enemy)
+    if pair_bullet:
+        b=np.array(pair_bullet)
+        slots=np.array([enemy.slot for enemy in pair_enemy])
+        t=sweep_spheres(start[b],travel[b],enemy_batch.pos[slots],enemy_batch.collision_radius[slots]+BULLET_RADIUS)
+        hits=np.flatnonzero(t<=1.0)
+        spent=np.zeros(n,dtype=bool)
+        # Bullets in pool order, each one stopping at the first wolf along its path
+        for k in hits[np.lexsort((t[hits],b[hits]))].tolist():
+            enemy=pair_enemy[k]
+            if spent[pair_bullet[k]] or enemy.health<=0: # Killed by an earlier bullet this tick
                 continue
-        if bullet['owner']=='PLAYER':
-            for enemy in list(enemies):
-                enemy_coll_y = enemy['pos'][1] # Collision with enemy body center
-                if check_sphere_collision(bullet['pos'],BULLET_RADIUS,[enemy['pos'][0],enemy_coll_y,enemy['pos'][2]],enemy['collision_radius']):
-                    if bullet in bullets: 
-                        bullets.remove(bullet)
-                    enemy['health']-=1 # Player bullet damage always 1
-                    if enemy['health']<=0:
-                        score_mult=2 if player['score_perk_active_until']>0 and time.time()<player['score_perk_active_until'] else 1
-                        player['score']+=enemy['points']*score_mult
-                        if enemy in enemies: 
-                            enemies.remove(enemy)
-                        if enemy is boss_entity: 
-                            boss_entity=None
-                        enemies_killed_this_level+=1
-                        player['kills_for_health_perk']+=1
-                        player['kills_for_score_perk']+=1
-                        player['kills_for_gun_perk']+=1
-                        if player['kills_for_health_perk']>=3 and not player['health_perk_available']: 
-                            player['health_perk_available']=True
-                            print("Health Perk!(H)")
-                        if player['kills_for_score_perk']>=4 and not player['score_perk_available']: 
-                            player['score_perk_available']=True
-                            print("Score Perk!(C)")
-                        if player['kills_for_gun_perk']>=5 and not player['gun_perk_available']: 
-                            player['gun_perk_available']=True
-                            print("Gun Perk!(G)")
-                    break 
-        elif bullet['owner']=='ENEMY':
-            player_coll_y = player['pos'][1] # Collision with player body center
-            if check_sphere_collision(bullet['pos'],BULLET_RADIUS,[player['pos'][0],player_coll_y,player['pos'][2]],PLAYER_RADIUS):
-                player['health']-=bullet['damage']
-                if bullet in bullets: 
-                    bullets.remove(bullet)
-                if player['health']<=0 and game_state==STATE_PLAYING: 
-                    player['health']=0
-                    start_transition(STATE_GAME_OVER_TRANSITION,[1.0,0.0,0.0])
-                    break
-
-def check_level_completion():
-    global game_state
-    level_conf=level_configs[current_level]
-    if enemies_spawned_this_level>=level_conf['total_enemies'] and not enemies and game_state==STATE_PLAYING:
-        if current_level==max_levels: 
-            game_state=STATE_YOU_WIN
+            spent[pair_bullet[k]]=True
+            enemy.health-=1 # Player bullet damage always 1
+            if enemy.health<=0:
+                handle_enemy_death(world,enemy,coop.find(world,int(bullets.shooter[pair_bullet[k]])))
+        dead|=spent
+    # Enemy bullets against each standing hero in one pass, each bullet stopping at the first it reaches
+    heroes=coop.standing(world)
+    incoming=np.flatnonzero(~expired & (owner==OWNER_ENEMY))
+    if heroes:
+        t=np.stack([sweep_spheres(start[incoming],travel[incoming],np.array((player.pos[0],player.pos[1],player.pos[2])),
+                                  BULLET_RADIUS+PLAYER_RADIUS) for player in heroes]) # Collision with player body center
+        first=t.argmin(axis=0)
+        hit=t[first,np.arange(len(incoming))]<=1.0
+        handle_player_hits(world,[(i,heroes[h]) for i,h in zip(incoming[hit].tolist(),first[hit].tolist())],dead)
+    bullets.cull(dead)
+
+def handle_enemy_death(world,enemy,player):
+    # player: the hero whose bullet it was, None if that hero has left the game since
+    remove_enemy(world,enemy)
+    if enemy is world.boss_entity: 
+        world.boss_entity=None
+    world.enemies_killed_this_level+=1
+    if player is None:
+        return
+    score_mult=2 if player.score_perk_active_until>0 and world.sim_time<player.score_perk_active_until else 1
+    player.score+=enemy.archetype.points*score_mult
+    player.kills_for_health_perk+=1
+    player.kills_for_score_perk+=1
+    player.kills_for_gun_perk+=1
+    if player.kills_for_health_perk>=3 and not player.health_perk_available: 
+        player.health_perk_available=True
+        print("Health Perk!(H)")
+    if player.kills_for_score_perk>=4 and not player.score_perk_available: 
+        player.score_perk_available=True
+        print("Score Perk!(C)")
+    if player.kills_for_gun_perk>=5 and not player.gun_perk_available: 
+        player.gun_perk_available=True
+        print("Gun Perk!(G)")
+
+def handle_player_hits(world,hits,dead):
+    # Enemy bullets that reached a hero this tick, as (pool index, hero) in pool order; the game is over once
+    # no hero is standing
+    for i,player in hits:
+        if player.health<=0: # Downed by an earlier bullet this tick
+            continue
+        dead[i]=True
+        player.health-=int(world.bullets.damage[i])
+        if player.health<=0 and world.game_state==STATE_PLAYING: 
+            player.health=0
+            if not coop.standing(world):
+                start_transition(world,STATE_GAME_OVER_TRANSITION,[1.0,0.0,0.0])
+
+def check_level_completion(world):
+    level_conf=world.level_configs[world.current_level]
+    if world.enemies_spawned_this_level>=level_conf['total_enemies'] and not world.enemies and world.game_state==STATE_PLAYING:
+        if world.current_level==world.max_levels: 
+            world.game_state=STATE_YOU_WIN
         else: 
-            start_transition(STATE_LEVEL_TRANSITION,[0.0,1.0,0.0])
+            start_transition(world,STATE_LEVEL_TRANSITION,[0.0,1.0,0.0])
 
-def start_transition(target_state,color):
-    global game_state,transition_timer,transition_color,next_game_state_after_transition
-    game_state=target_state
-    transition_timer=TRANSITION_DURATION
-    transition_color=color
+def start_transition(world,target_state,color):
+    world.game_state=target_state
+    world.transition_timer=TRANSITION_DURATION
+    world.transition_color=color
     if target_state==STATE_LEVEL_TRANSITION: 
-        next_game_state_after_transition=STATE_PLAYING 
+        world.next_game_state_after_transition=STATE_PLAYING 
     elif target_state==STATE_GAME_OVER_TRANSITION: 
-        next_game_state_after_transition=STATE_PLAYING
-
-def update_game_state(delta_time):
-    if game_state==STATE_PLAYING: 
-        update_player(delta_time)
-        update_enemies(delta_time)
-        update_bullets(delta_time)
-        check_level_completion()
-    elif game_state==STATE_LEVEL_TRANSITION:
-        global transition_timer, current_level
-        transition_timer-=delta_time
-        if transition_timer<=0: 
-            current_level+=1
-            init_level(current_level)
-    elif game_state==STATE_GAME_OVER_TRANSITION:
-        global player
-        transition_timer-=delta_time # Added player global here
-        if transition_timer<=0: 
-            player['health']=PLAYER_MAX_HEALTH
-            init_level(current_level)
+        world.next_game_state_after_transition=STATE_PLAYING
+
+def update_game_state(world,delta_time):
+    for _ in coop.hero_turns(world): # Each hero's input, with world.player bound to it
+        handle_key_presses(world)
+    world.sim_time+=delta_time
+    if world.game_state==STATE_PLAYING: 
+        t=profiler.mark()
+        for _ in coop.hero_turns(world,standing_only=True):
+            update_player(world,delta_time)
+        t=profiler.record('update_player',t)
+        update_enemies(world,delta_time)
+        t=profiler.record('update_enemies',t)
+        update_bullets(world,delta_time)
+        profiler.record('update_bullets',t)
+        check_level_completion(world)
+    elif world.game_state==STATE_LEVEL_TRANSITION:
+        world.transition_timer-=delta_time
+        if world.transition_timer<=0: 
+            world.current_level+=1
+            init_level(world,world.current_level)
+    elif world.game_state==STATE_GAME_OVER_TRANSITION:
+        world.transition_timer-=delta_time
+        if world.transition_timer<=0: 
+            for player in world.players:
+                player.health=PLAYER_MAX_HEALTH
+            init_level(world,world.current_level)
+
+def fixed_update(delta_time):
+    # Keep the pre-tick positions so display() can interpolate between ticks
+    world.player_prev_pos=list(world.player.pos)
+    world.enemy_batch.snapshot()
+    if recorder:
+        recorder.record_tick(delta_time,lambda dt: update_game_state(world,dt))
+    else:
+        update_game_state(world,delta_time)
+
+def interpolated_player_pos():
+    player=world.player
+    if world.player_prev_pos is None:
+        return player.pos
+    return [p+(c-p)*render_alpha for p,c in zip(world.player_prev_pos,player.pos)]
 
 # --- Drawing Functions ---
-def draw_text(x,y,text,r=1,g=1,b=1,font=GLUT_BITMAP_HELVETICA_18): 
+def draw_text(x,y,text,r=1,g=1,b=1,font=GLUT_BITMAP_HELVETICA_18,values=()): # Draws text.format(*values)
+    if hud_text and hud_text.draw(x,y,text,(r,g,b),font,values):
+        return
     glColor3f(r,g,b)
     glRasterPos2f(x,y)
-    [glutBitmapCharacter(font,ord(c)) for c in text]
+    for c in (text.format(*values) if values else text):
+        glutBitmapCharacter(font,ord(c))
 
 def draw_cylinder(base_r,top_r,height,slices,stacks,color): # Draws cylinder along its local Y axis
-    global glu_quadric
     glColor3fv(color)
     glPushMatrix()
     # Default GLU cylinder is along Z. Rotate it to be along Y for easier limb construction.
     glRotatef(-90,1,0,0) 
-    gluCylinder(glu_quadric,base_r,top_r,height,slices,stacks)
-    gluDisk(glu_quadric,0,base_r,slices,1) # Base cap at Z=0 (after rotation, this is Y=0)
-    glTranslatef(0,0,height)
-    gluDisk(glu_quadric,0,top_r,slices,1)
-    glPopMatrix() # Top cap at Z=height (after rotation, Y=height)
+    quadric_meshes.cylinder(base_r,top_r,height,slices,stacks) # Capped at both ends
+    glPopMatrix()
 
 def draw_tapered_cylinder(base_radius, top_radius, height, color):
-    global glu_quadric
     glColor3fv(color)
     glPushMatrix()
     glRotatef(-90, 1, 0, 0)  # Rotate to point along Y
-    gluCylinder(glu_quadric, base_radius, top_radius, height, 20, 8)
-    # Base cap
-    gluDisk(glu_quadric, 0, base_radius, 20, 8)
-    # Top cap
-    glTranslatef(0, 0, height)
-    gluDisk(glu_quadric, 0, top_radius, 20, 8)
+    quadric_meshes.cylinder(base_radius, top_radius, height, 20, 8) # Capped at both ends
     glPopMatrix()
 
 def draw_player_humanoid_model():
@@ -480,7 +723,7 @@ def draw_player_humanoid_model():
     glPushMatrix()
     glTranslatef(0, PLAYER_LEG_LENGTH + torso_height + head_radius, 0)
     glColor3f(0.8, 0.6, 0.4)
-    glutSolidSphere(head_radius, 20, 20)
+    quadric_meshes.sphere(head_radius, 20, 20)
     glPopMatrix()
 
     # Arms (at shoulder height - moved forward)
@@ -604,20 +847,113 @@ def draw_revised_wolf_model(total_h, body_c, leg_c, face_c, gun_c):  # Model ori
     glPopMatrix()
 
 
+def draw_wolf_box_model(total_h, body_c, leg_c, face_c):  # Middle LOD tier: no cylinders, leg pairs as slabs
+    body_width = total_h * 0.35
+    body_height = total_h * 0.35
+    body_depth = total_h * 0.7
+    face_size = total_h * 0.25
+    leg_len = total_h * 0.4
+    leg_r = total_h * 0.04
+    body_center_y = leg_len + body_height/2
+    for (x,y,z),(sx,sy,sz),color in (((0,body_center_y,0),(body_width,body_height,body_depth),body_c),
+                                      ((0,body_center_y,body_depth/2+face_size/4),(face_size,face_size,face_size*0.5),face_c),
+                                      ((0,leg_len/2,body_depth*0.3),(body_width*0.8+2*leg_r,leg_len,2*leg_r),leg_c),
+                                      ((0,leg_len/2,-body_depth*0.3),(body_width*0.8+2*leg_r,leg_len,2*leg_r),leg_c)):
+        glPushMatrix()
+        glTranslatef(x,y,z)
+        glColor3fv(color)
+        glScalef(sx,sy,sz)
+        glutSolidCube(1.0)
+        glPopMatrix()
+
+def draw_wolf_billboard(total_h, body_c):  # Far LOD tier: one quad facing local +Z, turned to the camera by the caller
+    half_w = total_h * 0.3
+    glColor3fv(body_c)
+    glBegin(GL_QUADS)
+    glNormal3f(0,0,1)
+    glVertex3f(-half_w,total_h*0.15,0)
+    glVertex3f(half_w,total_h*0.15,0)
+    glVertex3f(half_w,total_h*0.75,0)
+    glVertex3f(-half_w,total_h*0.75,0)
+    glEnd()
+
+def draw_wolf_cached(archetype, tier=0):
+    # One glCallList per wolf; each tier's mesh and its shaded colors are compiled on first sight
+    wolf_display_lists.call((tier, archetype.model_height, archetype.color), build_wolf_mesh, archetype, tier)
+
+def build_wolf_mesh(archetype, tier=0):
+    if tier == 0:
+        draw_revised_wolf_model(archetype.model_height, archetype.color, archetype.dark_color, archetype.bright_color, [0.1, 0.1, 0.1])
+    elif tier == 1:
+        draw_wolf_box_model(archetype.model_height, archetype.color, archetype.dark_color, archetype.bright_color)
+    else:
+        draw_wolf_billboard(archetype.model_height, archetype.color)
+
+def wolf_lod_tiers(slots, feet, heights, camera_pos):
+    # LOD tier per wolf from the camera distance in wolf heights, and the yaw that turns a billboard to the camera
+    dx=camera_pos[0]-feet[:,0]
+    dz=camera_pos[2]-feet[:,2]
+    dist=np.sqrt(dx*dx+(camera_pos[1]-feet[:,1]-heights/2)**2+dz*dz)
+    return wolf_lod.select(slots,dist/heights,world.enemy_batch.generation[slots]),np.degrees(np.arctan2(dx,dz))
+
+def setup_instanced_renderer():
+    global instanced_renderer
+    if os.environ.get('DUNGEON_INSTANCING','1')=='0':
+        return
+    instanced_renderer=InstancedRenderer.create()
+    if instanced_renderer:
+        # Same part shading as the immediate-mode wolf; body/face/legs are tinted per instance
+        instanced_renderer.add_mesh('wolf',wolf_mesh((1.0,1.0,1.0),(0.8,0.8,0.8,0.0),(1.1,1.1,1.1),(0.1,0.1,0.1)))
+        instanced_renderer.add_mesh('wolf_box',wolf_box_mesh((1.0,1.0,1.0),(0.8,0.8,0.8,0.0),(1.1,1.1,1.1)))
+        instanced_renderer.add_mesh('wolf_billboard',billboard_mesh(0.6,0.15,0.75))
+        instanced_renderer.add_mesh('bullet',sphere_mesh(6,6))
+
+def visible_enemies(view):
+    # Live slots whose bounding sphere is in view, with their interpolated feet and model heights
+    enemy_batch=world.enemy_batch
+    slots=enemy_batch.live_slots()
+    heights=enemy_batch.model_height[slots]
+    centers=enemy_batch.interpolated_pos(render_alpha)[slots] # Enemy pos is the body centre
+    radii=np.maximum(enemy_batch.collision_radius[slots],WOLF_CULL_RADIUS_RATIO*heights)
+    shown=cull_counter.count('enemies',view.visible(centers,radii))
+    feet=centers[shown]
+    feet[:,1]-=heights[shown]/2 # Enemy model origin is at its feet
+    return slots[shown],feet,heights[shown]
+
+def visible_bullets(view):
+    # Interpolated positions and colors of the bullets in view
+    bullets=world.bullets
+    pos=bullets.interpolated_pos(render_alpha,BULLET_SPEED,scheduler.dt)
+    shown=cull_counter.count('bullets',view.visible(pos,BULLET_RADIUS))
+    return pos[shown],bullets.color[shown]
+
+def draw_instanced_enemies(camera_pos,view):
+    enemy_batch=world.enemy_batch
+    slots,feet,heights=visible_enemies(view)
+    tiers,to_camera=wolf_lod_tiers(slots,feet,heights,camera_pos)
+    yaw=np.where(tiers==2,to_camera,enemy_batch.rotation_y[slots])
+    data=pack_instances(feet,yaw,enemy_batch.color[slots],heights)
+    for tier,mesh in enumerate(WOLF_LOD_TIERS): # One draw call per tier in use
+        instanced_renderer.draw(mesh,data[tiers==tier])
+
+def draw_instanced_bullets(view):
+    pos,colors=visible_bullets(view)
+    instanced_renderer.draw('bullet',pack_instances(pos,0.0,colors,BULLET_RADIUS))
+
 def draw_dungeon():
     floor_color=[0.5,0.5,0.5]
     wall_color=[0.4,0.4,0.4]
-    boss_active=boss_entity and boss_entity['health']>0
-    if 1<=current_level<=3: 
+    boss_active=world.boss_entity and world.boss_entity.health>0
+    if 1<=world.current_level<=3: 
         floor_color=[0.6,0.55,0.5]
         wall_color=[0.5,0.45,0.4]
-    elif 4<=current_level<=6: 
+    elif 4<=world.current_level<=6: 
         floor_color=[0.7,0.3,0.1]
         wall_color=[0.5,0.2,0.05]
-    elif 7<=current_level<=10: 
+    elif 7<=world.current_level<=10: 
         floor_color=[0.7,0.8,0.95]
         wall_color=[0.5,0.6,0.75]
-    if current_level==10 and boss_active: 
+    if world.current_level==10 and boss_active: 
         floor_color=[0.2,0.2,0.4]
         wall_color=[0.1,0.1,0.3]
     glColor3fv(floor_color)
@@ -657,8 +993,47 @@ def draw_dungeon():
     glVertex3f(DUNGEON_SIZE_X,WALL_HEIGHT,DUNGEON_SIZE_Z)
     glVertex3f(DUNGEON_SIZE_X,WALL_HEIGHT,0)
     glEnd()
+    glBegin(GL_QUADS) # Pillars and inner walls, the same boxes the flow field routes around
+    for x0,z0,x1,z1 in DUNGEON_OBSTACLES:
+        glNormal3f(0,1,0)
+        glVertex3f(x0,WALL_HEIGHT,z0)
+        glVertex3f(x1,WALL_HEIGHT,z0)
+        glVertex3f(x1,WALL_HEIGHT,z1)
+        glVertex3f(x0,WALL_HEIGHT,z1)
+        glNormal3f(0,0,-1)
+        glVertex3f(x0,0,z0)
+        glVertex3f(x0,WALL_HEIGHT,z0)
+        glVertex3f(x1,WALL_HEIGHT,z0)
+        glVertex3f(x1,0,z0)
+        glNormal3f(0,0,1)
+        glVertex3f(x0,0,z1)
+        glVertex3f(x1,0,z1)
+        glVertex3f(x1,WALL_HEIGHT,z1)
+        glVertex3f(x0,WALL_HEIGHT,z1)
+        glNormal3f(-1,0,0)
+        glVertex3f(x0,0,z0)
+        glVertex3f(x0,0,z1)
+        glVertex3f(x0,WALL_HEIGHT,z1)
+        glVertex3f(x0,WALL_HEIGHT,z0)
+        glNormal3f(1,0,0)
+        glVertex3f(x1,0,z0)
+        glVertex3f(x1,WALL_HEIGHT,z0)
+        glVertex3f(x1,WALL_HEIGHT,z1)
+        glVertex3f(x1,0,z1)
+    glEnd()
+
+def draw_profiler_overlay():
+    y=148
+    draw_text(10,y,"drawn/culled   wolves {}/{}  bullets {}/{}",0.7,0.9,1.0,
+              values=(cull_counter.drawn['enemies'],cull_counter.culled['enemies'],cull_counter.drawn['bullets'],cull_counter.culled['bullets']))
+    y-=18
+    draw_text(10,y,"phase            p50     p95     p99 (ms)",0.7,0.9,1.0)
+    for phase,(p50,p95,p99) in profiler.percentiles().items():
+        y-=18
+        draw_text(10,y,"{:<15}{:>7.2f} {:>7.2f} {:>7.2f}",0.7,0.9,1.0,values=(phase,p50,p95,p99))
 
 def draw_ui():
+    player=world.player
     glMatrixMode(GL_PROJECTION)
     glPushMatrix()
     glLoadIdentity()
@@ -668,31 +1043,33 @@ def draw_ui():
     glLoadIdentity()
     glDisable(GL_LIGHTING)
     glDisable(GL_DEPTH_TEST)
-    draw_text(10,SCREEN_HEIGHT-30,f"Health: {player['health']}/{PLAYER_MAX_HEALTH}",1,0.2,0.2)
-    draw_text(10,SCREEN_HEIGHT-60,f"Score: {player['score']}",1,1,0.2)
-    draw_text(SCREEN_WIDTH-200,SCREEN_HEIGHT-30,f"Level: {current_level}",0.8,0.8,0.8)
+    draw_text(10,SCREEN_HEIGHT-30,"Health: {}/{}",1,0.2,0.2,values=(player.health,PLAYER_MAX_HEALTH))
+    draw_text(10,SCREEN_HEIGHT-60,"Score: {}",1,1,0.2,values=(player.score,))
+    draw_text(SCREEN_WIDTH-200,SCREEN_HEIGHT-30,"Level: {}",0.8,0.8,0.8,values=(world.current_level,))
     perk_y=SCREEN_HEIGHT-90
-    if player['health_perk_available']: 
+    if player.health_perk_available: 
         draw_text(10,perk_y,"Health Perk Ready!(H)",0,1,0)
         perk_y-=25
-    if player['score_perk_available']:
+    if player.score_perk_available:
         draw_text(10,perk_y,"Score Perk Ready!(C)",1,1,0)
         perk_y-=25
-    if player['gun_perk_available']: 
+    if player.gun_perk_available: 
         draw_text(10,perk_y,"Gun Perk Ready!(G)",1,0.5,0)
         perk_y-=25
     active_perk_y=SCREEN_HEIGHT-90
-    if player['score_perk_active_until']>0 and time.time()<player['score_perk_active_until']: 
-        rem=int(player['score_perk_active_until']-time.time())
-        draw_text(SCREEN_WIDTH-250,active_perk_y,f"Score x2: {rem}s",1,1,0)
+    if player.score_perk_active_until>0 and world.sim_time<player.score_perk_active_until: 
+        rem=int(player.score_perk_active_until-world.sim_time)
+        draw_text(SCREEN_WIDTH-250,active_perk_y,"Score x2: {}s",1,1,0,values=(rem,))
         active_perk_y-=25
-    if player['gun_perk_active_until']>0 and time.time()<player['gun_perk_active_until']: 
-        rem=int(player['gun_perk_active_until']-time.time())
-        draw_text(SCREEN_WIDTH-250,active_perk_y,f"Rapid Fire: {rem}s",1,0.5,0)
+    if player.gun_perk_active_until>0 and world.sim_time<player.gun_perk_active_until: 
+        rem=int(player.gun_perk_active_until-world.sim_time)
+        draw_text(SCREEN_WIDTH-250,active_perk_y,"Rapid Fire: {}s",1,0.5,0,values=(rem,))
         active_perk_y-=25
-    if game_state==STATE_YOU_WIN: 
+    if profiler.enabled:
+        draw_profiler_overlay()
+    if world.game_state==STATE_YOU_WIN: 
         draw_text(SCREEN_WIDTH/2-100,SCREEN_HEIGHT/2,"YOU WIN!",0.2,1,0.2,GLUT_BITMAP_TIMES_ROMAN_24)
-        draw_text(SCREEN_WIDTH/2-150,SCREEN_HEIGHT/2-30,f"Final Score: {player['score']}",1,1,0.2)
+        draw_text(SCREEN_WIDTH/2-150,SCREEN_HEIGHT/2-30,"Final Score: {}",1,1,0.2,values=(player.score,))
     glEnable(GL_DEPTH_TEST)
     glEnable(GL_LIGHTING)
     glPopMatrix()
@@ -702,29 +1079,36 @@ def draw_ui():
 
 # --- GLUT Callbacks ---
 def display():
+    player=world.player
+    enemy_batch=world.enemy_batch
     glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
     glLoadIdentity()
-    player_base_x,player_base_y,player_base_z = player['pos']
-    if camera_mode==CAMERA_MODE_FIRST_PERSON:
+    player_base_x,player_base_y,player_base_z = interpolated_player_pos()
+    if world.camera_mode==CAMERA_MODE_FIRST_PERSON:
         eye_x=player_base_x
         eye_y=player_base_y-PLAYER_BODY_Y_OFFSET+PLAYER_EYE_HEIGHT_FROM_MODEL_BASE
         eye_z=player_base_z
-        pitch_r=math.radians(player['rotation_x'])
-        yaw_r=math.radians(player['rotation_y'])
+        pitch_r=math.radians(player.rotation_x)
+        yaw_r=math.radians(player.rotation_y)
         look_x=eye_x+math.sin(yaw_r)*math.cos(pitch_r)
         look_y=eye_y-math.sin(pitch_r)
         look_z=eye_z-math.cos(yaw_r)*math.cos(pitch_r)
         gluLookAt(eye_x,eye_y,eye_z,look_x,look_y,look_z,0,1,0)
-    elif camera_mode==CAMERA_MODE_THIRD_PERSON:
+        camera_pos=(eye_x,eye_y,eye_z)
+        camera_target=(look_x,look_y,look_z)
+    elif world.camera_mode==CAMERA_MODE_THIRD_PERSON:
         target_foc_y = player_base_y - PLAYER_BODY_Y_OFFSET + PLAYER_TOTAL_HEIGHT/2
         # Use only tp_camera_yaw_offset for camera rotation, not player rotation
-        cam_x_off = tp_camera_distance * math.cos(math.radians(tp_camera_pitch)) * math.sin(math.radians(tp_camera_yaw_offset))
-        cam_y_off = tp_camera_distance * math.sin(math.radians(-tp_camera_pitch))
-        cam_z_off = -tp_camera_distance * math.cos(math.radians(tp_camera_pitch)) * math.cos(math.radians(tp_camera_yaw_offset))
+        cam_x_off = tp_camera_distance * math.cos(math.radians(world.tp_camera_pitch)) * math.sin(math.radians(world.tp_camera_yaw_offset))
+        cam_y_off = tp_camera_distance * math.sin(math.radians(-world.tp_camera_pitch))
+        cam_z_off = -tp_camera_distance * math.cos(math.radians(world.tp_camera_pitch)) * math.cos(math.radians(world.tp_camera_yaw_offset))
         cam_x = player_base_x + cam_x_off
         cam_y = target_foc_y + cam_y_off
         cam_z = player_base_z + cam_z_off
         gluLookAt(cam_x, cam_y, cam_z, player_base_x, target_foc_y, player_base_z, 0, 1, 0)
+        camera_pos=(cam_x,cam_y,cam_z)
+        camera_target=(player_base_x,target_foc_y,player_base_z)
+    view=Frustum(CAMERA_FOV_Y,SCREEN_WIDTH/(SCREEN_HEIGHT or 1),CAMERA_NEAR,CAMERA_FAR,camera_pos,camera_target)
     glEnable(GL_LIGHTING)
     glEnable(GL_LIGHT0)
     light_pos=[DUNGEON_SIZE_X/2,WALL_HEIGHT*1.8,DUNGEON_SIZE_Z/2,1.0]
@@ -733,31 +1117,46 @@ def display():
     glLightfv(GL_LIGHT0,GL_AMBIENT,[0.35,0.35,0.35,1])
     glEnable(GL_COLOR_MATERIAL)
     glColorMaterial(GL_FRONT_AND_BACK,GL_AMBIENT_AND_DIFFUSE)
+    t=profiler.mark()
     draw_dungeon()
-    if camera_mode == CAMERA_MODE_THIRD_PERSON:
+    profiler.record('draw_dungeon',t)
+    if world.camera_mode == CAMERA_MODE_THIRD_PERSON:
         glPushMatrix()
-        glTranslatef(player['pos'][0], player['pos'][1] - PLAYER_BODY_Y_OFFSET, player['pos'][2])
-        glRotatef(player['rotation_y'], 0, 1, 0)
+        glTranslatef(player_base_x, player_base_y - PLAYER_BODY_Y_OFFSET, player_base_z)
+        glRotatef(player.rotation_y, 0, 1, 0)
         draw_player_humanoid_model()
         
         # Calculate laser start position (gun tip)
-        yaw_rad = math.radians(player['rotation_y'])
+        yaw_rad = math.radians(player.rotation_y)
         shoulder_height = PLAYER_LEG_LENGTH + PLAYER_TORSO_HEIGHT * 0.8
         gun_forward_offset = 0.35 * PLAYER_TOTAL_HEIGHT + PLAYER_GUN_LENGTH
         glPopMatrix()
         
-    for enemy in enemies: # Enemy model origin is at its feet (Y=0 locally)
-        glPushMatrix()
-        glTranslatef(enemy['pos'][0],enemy['pos'][1]-enemy['model_height']/2,enemy['pos'][2])
-        glRotatef(enemy['rotation_y'],0,1,0)
-        draw_revised_wolf_model(enemy['model_height'],enemy['color'],[c*0.8 for c in enemy['color']],[c*1.1 for c in enemy['color']],[0.1,0.1,0.1]); glPopMatrix()
-    for bullet in bullets: 
-        glPushMatrix()
-        glTranslatef(bullet['pos'][0],bullet['pos'][1],bullet['pos'][2])
-        glColor3fv(bullet['color'])
-        glutSolidSphere(BULLET_RADIUS,6,6)
-        glPopMatrix()
-    if game_state==STATE_LEVEL_TRANSITION or game_state==STATE_GAME_OVER_TRANSITION:
+    t=profiler.mark()
+    if instanced_renderer:
+        draw_instanced_enemies(camera_pos,view)
+    else:
+        slots,feet,heights=visible_enemies(view)
+        tiers,to_camera=wolf_lod_tiers(slots,feet,heights,camera_pos)
+        yaw=np.where(tiers==2,to_camera,enemy_batch.rotation_y[slots])
+        for (ex,ey,ez),tier,yaw_deg,slot in zip(feet.tolist(),tiers.tolist(),yaw.tolist(),slots.tolist()): # Enemy model origin is at its feet (Y=0 locally)
+            glPushMatrix()
+            glTranslatef(ex,ey,ez)
+            glRotatef(yaw_deg,0,1,0)
+            draw_wolf_cached(enemy_batch.entities[slot].archetype,tier); glPopMatrix()
+    t=profiler.record('draw_enemies',t)
+    if instanced_renderer:
+        draw_instanced_bullets(view)
+    else:
+        bullet_render_pos,bullet_colors=visible_bullets(view)
+        for (bx,by,bz),bullet_color in zip(bullet_render_pos.tolist(),bullet_colors.tolist()): 
+            glPushMatrix()
+            glTranslatef(bx,by,bz)
+            glColor3fv(bullet_color)
+            quadric_meshes.sphere(BULLET_RADIUS,6,6)
+            glPopMatrix()
+    profiler.record('draw_bullets',t)
+    if world.game_state==STATE_LEVEL_TRANSITION or world.game_state==STATE_GAME_OVER_TRANSITION:
         glMatrixMode(GL_PROJECTION)
         glPushMatrix()
         glLoadIdentity()
@@ -767,7 +1166,7 @@ def display():
         glLoadIdentity()
         glDisable(GL_LIGHTING)
         glDisable(GL_DEPTH_TEST)
-        glColor4f(transition_color[0],transition_color[1],transition_color[2],0.85)
+        glColor4f(world.transition_color[0],world.transition_color[1],world.transition_color[2],0.85)
         glBegin(GL_QUADS)
         glVertex2f(0,0)
         glVertex2f(1,0)
@@ -780,7 +1179,10 @@ def display():
         glMatrixMode(GL_PROJECTION)
         glPopMatrix()
         glMatrixMode(GL_MODELVIEW)
+    t=profiler.mark()
     draw_ui()
+    profiler.record('draw_ui',t)
+    profiler.end_frame()
     glutSwapBuffers()
 
 def reshape(w,h):
@@ -789,58 +1191,64 @@ def reshape(w,h):
     glViewport(0,0,w,h if h else 1)
     glMatrixMode(GL_PROJECTION)
     glLoadIdentity()
-    gluPerspective(45.0,float(w)/(h if h else 1),0.1,500.0)
+    gluPerspective(CAMERA_FOV_Y,float(w)/(h if h else 1),CAMERA_NEAR,CAMERA_FAR)
     glMatrixMode(GL_MODELVIEW)
     glLoadIdentity()
 
 def keyboard(key,x,y):
-    global camera_mode,player
     k=key.lower()
-    keys_pressed[k]=True
+    world.keys_pressed[k]=True
     if key==b'\x1b': 
         glutLeaveMainLoop()
-    if k==b'f': 
-        camera_mode = 1-camera_mode # Toggle 0 and 1
-    if k==b'h' and player['health_perk_available']: 
-        player['health']=PLAYER_MAX_HEALTH
-        player['health_perk_available']=False
-        player['kills_for_health_perk']=0
-        print("Health Perk!")
-    if k==b'c' and player['score_perk_available']:
-        player['score_perk_active_until']=time.time()+PERK_SCORE_MULTIPLIER_DURATION
-        player['score_perk_available']=False
-        player['kills_for_score_perk']=0
-        print("Score Perk!")
-    if k==b'g' and player['gun_perk_available']: 
-        player['gun_perk_active_until']=time.time()+PERK_RAPID_FIRE_DURATION
-        player['gun_perk_available']=False
-        player['kills_for_gun_perk']=0
-        print("Gun Perk!")
+    elif k==b'p': 
+        print("Profiler on." if profiler.toggle() else "Profiler off.")
+    elif k in TICK_KEYS:
+        world.key_presses.append(k) # Acted on by the next tick, so replays reproduce it
+
+def handle_key_presses(world):
+    player=world.player
+    key_presses=world.key_presses
+    for k in key_presses:
+        if k==b'f': 
+            world.camera_mode = 1-world.camera_mode # Toggle 0 and 1
+        if k==b'h' and player.health_perk_available: 
+            player.health=PLAYER_MAX_HEALTH
+            player.health_perk_available=False
+            player.kills_for_health_perk=0
+            print("Health Perk!")
+        if k==b'c' and player.score_perk_available:
+            player.score_perk_active_until=world.sim_time+PERK_SCORE_MULTIPLIER_DURATION
+            player.score_perk_available=False
+            player.kills_for_score_perk=0
+            print("Score Perk!")
+        if k==b'g' and player.gun_perk_available: 
+            player.gun_perk_active_until=world.sim_time+PERK_RAPID_FIRE_DURATION
+            player.gun_perk_available=False
+            player.kills_for_gun_perk=0
+            print("Gun Perk!")
+    key_presses.clear()
 
 def keyboard_up(key,x,y): 
-    keys_pressed[key.lower()]=False
+    world.keys_pressed[key.lower()]=False
 def special_keys_input(key,x,y): 
-    special_keys_pressed[key]=True
+    world.special_keys_pressed[key]=True
 def special_keys_up(key,x,y): 
-    special_keys_pressed[key]=False
+    world.special_keys_pressed[key]=False
 def mouse_click(button,state,x,y): 
-    global mouse_buttons
-    mouse_buttons[button]=state # Store exact state
+    world.mouse_buttons[button]=state # Store exact state
     
 def idle():
-    global last_time
+    global last_time,render_alpha
     current_t=glutGet(GLUT_ELAPSED_TIME)/1000.0
-    delta_t=current_t-last_time
+    frame_t=current_t-last_time
     last_time=current_t
-    if delta_t > 0.1: 
-        delta_t=0.1
-    if delta_t <= 0: 
-        delta_t=1/60.0
-    update_game_state(delta_t)
+    # Simulation advances in fixed ticks whatever the frame rate; rendering interpolates between them
+    scheduler.advance(frame_t,fixed_update)
+    render_alpha=scheduler.alpha()
     glutPostRedisplay()
 
 def main():
-    global last_time,glu_quadric
+    global last_time,quadric_meshes,wolf_display_lists,hud_text,recorder
     glutInit(sys.argv)
     glutInitDisplayMode(GLUT_DOUBLE|GLUT_RGB|GLUT_DEPTH|GLUT_ALPHA)
     glutInitWindowSize(SCREEN_WIDTH,SCREEN_HEIGHT)
@@ -850,12 +1258,20 @@ def main():
     glClearColor(0.05,0.05,0.15,1.0)
     glEnable(GL_BLEND)
     glBlendFunc(GL_SRC_ALPHA,GL_ONE_MINUS_SRC_ALPHA)
-    glu_quadric=gluNewQuadric()
-    gluQuadricNormals(glu_quadric,GLU_SMOOTH)
-    gluQuadricTexture(glu_quadric,GL_FALSE)
-    init_level_configs()
-    init_player()
-    init_level(current_level)
+    quadric_meshes=QuadricMeshCache()
+    wolf_display_lists=DisplayListCache(WOLF_DISPLAY_LIST_CAPACITY)
+    setup_instanced_renderer()
+    hud_text=HudText.create(((GLUT_BITMAP_HELVETICA_18,18),(GLUT_BITMAP_TIMES_ROMAN_24,24)),HUD_TEXT_CACHE_CAPACITY)
+    if os.environ.get('DUNGEON_PROFILE_CSV'):
+        profiler.stream_csv(os.environ['DUNGEON_PROFILE_CSV'])
+    if os.environ.get('DUNGEON_RECORD'):
+        seed=int(os.environ.get('DUNGEON_SEED',random.randrange(2**32)))
+        world.rng.seed(seed)
+        recorder=ReplayRecorder(os.environ['DUNGEON_RECORD'],os.path.splitext(os.path.basename(__file__))[0],seed,world.current_level,scheduler.dt,world)
+        print(f"Recording to {os.environ['DUNGEON_RECORD']} (seed {seed})")
+    init_level_configs(world)
+    init_player(world)
+    init_level(world,world.current_level)
     last_time=glutGet(GLUT_ELAPSED_TIME)/1000.0
     glutDisplayFunc(display)
     glutReshapeFunc(reshape)
@@ -866,7 +1282,7 @@ def main():
     glutMouseFunc(mouse_click)
     glutIdleFunc(idle)
     print("--- Game Controls ---")
-    print("W,S:Move | A,D:Rotate | MouseLeft:Shoot | Arrows:Cam | F:View | H,C,G:Perks | ESC:Exit")
+    print("W,S:Move | A,D:Rotate | MouseLeft:Shoot | Arrows:Cam | F:View | H,C,G:Perks | P:Profiler | ESC:Exit")
     glutMainLoop()
 
 if __name__ == "__main__": main()
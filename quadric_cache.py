@@ -0,0 +1,81 @@
+"""GLU-style cylinders and spheres tessellated once per shape and replayed from a vertex buffer.
+
+gluCylinder, gluDisk and glutSolidSphere recompute every vertex and normal on each
+call. QuadricMeshCache builds the same surfaces in NumPy the first time a shape is
+drawn, uploads them as a StaticMesh of (normal, position) rows, and later calls with
+the same dimensions are a single glDrawArrays. Rows carry no color, so the current
+glColor applies as it did with GLU.
+"""
+import math
+
+import numpy as np
+from OpenGL.GL import GL_N3F_V3F, GL_TRIANGLES
+
+from static_mesh import StaticMesh
+
+
+def _triangles(normals, positions):
+    rows = np.empty((len(positions), 6), dtype=np.float32)
+    rows[:, 0:3] = normals
+    rows[:, 3:6] = positions
+    return rows
+
+
+def capped_cylinder_vertices(base_r, top_r, height, slices, stacks):
+    """Triangle rows of gluCylinder(base_r, top_r, height, slices, stacks) along +Z from z=0, closed by
+    a disk at each end with outward normals."""
+    angle = np.linspace(0.0, 2.0 * math.pi, slices + 1)
+    c, s = np.cos(angle), np.sin(angle)
+    r = np.linspace(base_r, top_r, stacks + 1)[:, None]
+    z = np.linspace(0.0, height, stacks + 1)[:, None]
+    ring = np.stack(np.broadcast_arrays(r * c, r * s, z), axis=-1) # (stacks + 1, slices + 1, 3)
+    slope = (base_r - top_r) / height if height else 0.0
+    normal = np.stack([c, s, np.full_like(c, slope)], axis=-1)
+    normal /= np.linalg.norm(normal, axis=1, keepdims=True)
+    normal = np.broadcast_to(normal, ring.shape)
+    # Side: two triangles per (stack, slice) quad, counter-clockwise seen from outside
+    corners = [(0, 0), (0, 1), (1, 1), (0, 0), (1, 1), (1, 0)]
+    side_p = np.stack([ring[i:stacks + i, j:slices + j] for i, j in corners], axis=2).reshape(-1, 3)
+    side_n = np.stack([normal[i:stacks + i, j:slices + j] for i, j in corners], axis=2).reshape(-1, 3)
+    # Caps: triangle fans around the axis
+    base, top = ring[0], ring[-1]
+    base_p = np.stack([np.zeros((slices, 3)), base[1:], base[:-1]], axis=1).reshape(-1, 3)
+    top_p = np.stack([np.tile([0.0, 0.0, height], (slices, 1)), top[:-1], top[1:]], axis=1).reshape(-1, 3)
+    positions = np.concatenate([side_p, base_p, top_p])
+    normals = np.concatenate([side_n, np.tile([0.0, 0.0, -1.0], (len(base_p), 1)), np.tile([0.0, 0.0, 1.0], (len(top_p), 1))])
+    return _triangles(normals, positions)
+
+
+def sphere_vertices(radius, slices, stacks):
+    """Triangle rows of glutSolidSphere(radius, slices, stacks): centred on the origin, poles on Z."""
+    theta = np.linspace(0.0, math.pi, stacks + 1)[:, None]
+    phi = np.linspace(0.0, 2.0 * math.pi, slices + 1)
+    unit = np.stack(np.broadcast_arrays(np.sin(theta) * np.cos(phi), np.sin(theta) * np.sin(phi), np.cos(theta)), axis=-1)
+    corners = [(0, 0), (1, 0), (1, 1), (0, 0), (1, 1), (0, 1)]
+    normals = np.stack([unit[i:stacks + i, j:slices + j] for i, j in corners], axis=2).reshape(-1, 3)
+    return _triangles(normals, normals * radius)
+
+
+class QuadricMeshCache:
+    def __init__(self):
+        self.meshes = {} # ('cylinder', base_r, top_r, height, slices, stacks) or ('sphere', radius, slices, stacks) -> StaticMesh
+
+    def _draw(self, key, build, *args):
+        mesh = self.meshes.get(key)
+        if mesh is None:
+            mesh = self.meshes[key] = StaticMesh(build(*args), GL_TRIANGLES, GL_N3F_V3F)
+        mesh.draw()
+
+    def cylinder(self, base_r, top_r, height, slices, stacks):
+        """Draw a capped cylinder along +Z (gluCylinder plus a gluDisk at each end)."""
+        self._draw(('cylinder', base_r, top_r, height, slices, stacks), capped_cylinder_vertices,
+                   base_r, top_r, height, slices, stacks)
+
+    def sphere(self, radius, slices, stacks):
+        """Draw a sphere at the origin (glutSolidSphere)."""
+        self._draw(('sphere', radius, slices, stacks), sphere_vertices, radius, slices, stacks)
+
+    def clear(self):
+        for mesh in self.meshes.values():
+            mesh.delete()
+        self.meshes.clear()
@@ -0,0 +1,289 @@
+"""Deterministic replays: per-tick input recorded to a compact binary file, played back headless.
+
+The simulation only reads the world's input dicts, its queued key-downs, the timestep
+and the world's RNG, so a replay is the RNG seed, the starting level and, for every tick,
+the input entries that changed since the previous tick. Record from the game with
+DUNGEON_RECORD=session.rpl (DUNGEON_SEED picks the seed) or from headless.py --record;
+play back as fast as the CPU allows:
+
+    python replay.py session.rpl
+    python replay.py session.rpl --seek 12000 --snapshot-every 600
+
+File layout (little-endian): header b'DRPL', version u8, game name (u8 length + ascii),
+seed u64, level u16, timestep f64; then one record per tick: a u8 whose low 7 bits count
+the changes and whose high bit means an f64 timestep follows, then the changes as
+(table u8, key code u16, value i16).
+
+A co-op session (server.py --record) has several heroes, each with its own input
+tables (coop.py). A change's table byte then carries the hero's index in world.players
+above its low three bits, and a tick opens with a LEAVE (code: the index of the hero
+leaving) or JOIN record for each hero that left or joined before it. A single-player
+recording only ever has hero 0, so its bytes read the same as in version 2.
+"""
+import argparse
+import atexit
+import copy
+import hashlib
+import struct
+import time
+
+import coop
+
+MAGIC = b'DRPL'
+VERSION = 3
+READS = (2, VERSION) # Version 2 files are version 3 files without co-op heroes
+HEADER = struct.Struct('<QHd') # seed, level, timestep
+CHANGE = struct.Struct('<BHh') # table, key code, value
+CUSTOM_DT = 0x80
+MAX_CHANGES = 0x7F
+
+# Input tables; key_presses is the queue of key-downs the next tick acts on
+KEYS, SPECIAL_KEYS, MOUSE_BUTTONS, KEY_PRESSES = range(4)
+JOIN, LEAVE = 4, 5
+HERO_SHIFT = 3 # table byte = table | hero index << HERO_SHIFT
+TABLE_MASK = (1 << HERO_SHIFT) - 1
+INPUT_DICTS = ((KEYS, 'keys_pressed'), (SPECIAL_KEYS, 'special_keys_pressed'), (MOUSE_BUTTONS, 'mouse_buttons'))
+PROCESSED = -1 # mouse_buttons value the game writes once a click has fired
+REMOVED = -2
+
+# GameWorld attributes that make up the simulation state, restored together by seek()
+STATE_FIELDS = ('rng', 'player', 'players', 'player_inputs', 'heroes_joined', 'enemies', 'bullets', 'enemy_batch',
+                 'level_configs', 'sim_time', 'game_state', 'current_level', 'enemies_killed_this_level',
+                 'enemies_spawned_this_level', 'boss_entity', 'transition_timer', 'transition_color',
+                 'next_game_state_after_transition', 'camera_mode', 'tp_camera_pitch', 'tp_camera_yaw_offset',
+                 'keys_pressed', 'special_keys_pressed', 'mouse_buttons', 'key_presses', 'player_prev_pos')
+
+
+def _key_code(table, key):
+    if table in (KEYS, KEY_PRESSES):
+        if len(key) != 1:
+            raise ValueError(f"key {key!r} is not a single byte; a replay cannot record it")
+        return key[0]
+    code = int(key)
+    if not 0 <= code <= 0xFFFF:
+        raise ValueError(f"input code {code} is outside 0..65535; a replay cannot record it")
+    return code
+
+
+def _decode_key(table, code):
+    return bytes([code]) if table in (KEYS, KEY_PRESSES) else code
+
+
+def _encode_value(value):
+    if value == "PROCESSED":
+        return PROCESSED
+    if not -0x8000 <= int(value) <= 0x7FFF:
+        raise ValueError(f"input value {value} is outside the replay's 16-bit range")
+    return int(value)
+
+
+def _decode_value(table, value):
+    if table == MOUSE_BUTTONS:
+        return "PROCESSED" if value == PROCESSED else value
+    return bool(value)
+
+
+def _heroes(world):
+    """(hero number, object holding its input tables) per hero; anything without world.players is one hero."""
+    players = getattr(world, 'players', None)
+    if not players:
+        return [(0, world)]
+    return [(player.number, coop.input_tables(world, index)) for index, player in enumerate(players)]
+
+
+def capture_inputs(world):
+    return [(number, [dict(getattr(inputs, name)) for _, name in INPUT_DICTS]) for number, inputs in _heroes(world)]
+
+
+def input_changes(world, previous):
+    """(table, key code, value) for every input entry that differs from previous, plus queued key-downs,
+    after a LEAVE or JOIN for each hero that left or joined since."""
+    changes = []
+    heroes = _heroes(world)
+    numbers = [number for number, _ in heroes]
+    roster = [number for number, _ in previous]
+    for number in list(roster):
+        if number not in numbers:
+            changes.append((LEAVE, roster.index(number), 0))
+            roster.remove(number)
+    for number in numbers:
+        if number not in roster:
+            changes.append((JOIN, 0, 0))
+            roster.append(number) # coop.join appends, so the rosters now match
+    before_of = dict(previous)
+    for index, (number, inputs) in enumerate(heroes):
+        hero = index << HERO_SHIFT
+        for (table, name), before in zip(INPUT_DICTS, before_of.get(number, ({}, {}, {}))):
+            now = getattr(inputs, name)
+            for key in before.keys() - now.keys():
+                changes.append((table | hero, _key_code(table, key), REMOVED))
+            for key, value in now.items():
+                if key not in before or before[key] != value:
+                    changes.append((table | hero, _key_code(table, key), _encode_value(value)))
+        changes.extend((KEY_PRESSES | hero, _key_code(KEY_PRESSES, key), 1) for key in inputs.key_presses)
+    return changes
+
+
+def apply_changes(world, changes, add_player=None):
+    """Apply input_changes' records to world; a JOIN calls add_player(world) (the game's)."""
+    for table, code, value in changes:
+        if table == LEAVE:
+            coop.leave(world, world.players[code])
+            continue
+        if table == JOIN:
+            add_player(world)
+            continue
+        inputs = coop.input_tables(world, table >> HERO_SHIFT)
+        table &= TABLE_MASK
+        key = _decode_key(table, code)
+        if table == KEY_PRESSES:
+            inputs.key_presses.append(key)
+        elif value == REMOVED:
+            getattr(inputs, INPUT_DICTS[table][1]).pop(key, None)
+        else:
+            getattr(inputs, INPUT_DICTS[table][1])[key] = _decode_value(table, value)
+
+
+def capture_state(world):
+    """Deep copy of the world's simulation state, RNG included, for seek()."""
+    return copy.deepcopy({name: getattr(world, name) for name in STATE_FIELDS})
+
+
+def restore_state(world, snapshot):
+    for name, value in copy.deepcopy(snapshot).items():
+        setattr(world, name, value)
+    world.enemy_batch.rebind() # deepcopy turns the enemies' 'pos' views into standalone arrays
+
+
+def state_digest(world):
+    """Short hash of the player (and any co-op heroes), enemy and bullet state, for comparing two runs tick for tick."""
+    h = hashlib.sha1()
+    p = world.player
+    h.update(repr((world.current_level, world.game_state, p.health, p.score, list(map(float, p.pos)))).encode())
+    for hero in world.players[1:]: # Co-op heroes
+        h.update(repr((hero.number, hero.health, hero.score, list(map(float, hero.pos)))).encode())
+    h.update(world.enemy_batch.pos[world.enemy_batch.live_slots()].tobytes())
+    h.update(world.bullets.pos[:world.bullets.count].tobytes())
+    return h.hexdigest()[:16]
+
+
+class ReplayRecorder:
+    def __init__(self, path, game_name, seed, level, timestep, world):
+        self.world = world
+        self.timestep = timestep
+        self.ticks = 0
+        self.file = open(path, 'wb')
+        name = game_name.encode('ascii')
+        self.file.write(MAGIC + bytes([VERSION, len(name)]) + name + HEADER.pack(seed, level, timestep))
+        self.previous = capture_inputs(world)
+        atexit.register(self.close)
+
+    def record_tick(self, dt, step):
+        """Write this tick's input changes, then run step(dt)."""
+        changes = input_changes(self.world, self.previous)
+        if len(changes) > MAX_CHANGES:
+            raise ValueError(f"{len(changes)} input changes in one tick; the format holds {MAX_CHANGES}")
+        if dt == self.timestep:
+            self.file.write(bytes([len(changes)]))
+        else:
+            self.file.write(bytes([len(changes) | CUSTOM_DT]) + struct.pack('<d', dt))
+        for change in changes:
+            self.file.write(CHANGE.pack(*change))
+        step(dt)
+        self.previous = capture_inputs(self.world) # Post-tick, so changes the game makes itself ("PROCESSED") are not lost
+        self.ticks += 1
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+
+
+def load_replay(path):
+    """Returns (game name, seed, level, [(dt, changes) per tick])."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:4] != MAGIC or data[4] not in READS:
+        raise ValueError(f"{path} is not a version {' or '.join(map(str, READS))} replay")
+    name_len = data[5]
+    game_name = data[6:6+name_len].decode('ascii')
+    offset = 6 + name_len
+    seed, level, timestep = HEADER.unpack_from(data, offset)
+    offset += HEADER.size
+    ticks = []
+    while offset < len(data):
+        head = data[offset]
+        offset += 1
+        dt = timestep
+        if head & CUSTOM_DT:
+            dt = struct.unpack_from('<d', data, offset)[0]
+            offset += 8
+        count = head & MAX_CHANGES
+        changes = [CHANGE.unpack_from(data, offset + i*CHANGE.size) for i in range(count)]
+        offset += count * CHANGE.size
+        ticks.append((dt, changes))
+    return game_name, seed, level, ticks
+
+
+class ReplayPlayer:
+    """Replays a recording through update_game_state headless, snapshotting every snapshot_every ticks."""
+
+    def __init__(self, path, snapshot_every=600):
+        import headless # Sets DUNGEON_HEADLESS before the game module is imported
+        self.game_name, self.seed, self.level, self.ticks = load_replay(path)
+        self.game = headless.load_game(self.game_name)
+        self.world = self.game.GameWorld(self.game.world.campaign)
+        self.snapshot_every = snapshot_every
+        self.snapshots = {}
+        headless.reset_game(self.game, self.world, seed=self.seed, level=self.level)
+        self.snapshots[0] = capture_state(self.world)
+        self.tick = 0
+
+    def step(self):
+        dt, changes = self.ticks[self.tick]
+        apply_changes(self.world, changes, self.game.add_player)
+        self.game.update_game_state(self.world, dt)
+        self.tick += 1
+        if self.snapshot_every and self.tick % self.snapshot_every == 0 and self.tick not in self.snapshots:
+            self.snapshots[self.tick] = capture_state(self.world)
+
+    def play(self, until=None):
+        """Run to tick `until` (default: the end). Returns the number of ticks stepped."""
+        until = len(self.ticks) if until is None else min(until, len(self.ticks))
+        start = self.tick
+        while self.tick < until:
+            self.step()
+        return self.tick - start
+
+    def seek(self, tick):
+        """Jump to tick from the nearest snapshot at or before it."""
+        tick = max(0, min(tick, len(self.ticks)))
+        base = max(t for t in self.snapshots if t <= tick)
+        if not base <= self.tick <= tick:
+            restore_state(self.world, self.snapshots[base])
+            self.tick = base
+        self.play(tick)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play back a recorded session headless at full speed")
+    parser.add_argument('replay')
+    parser.add_argument('--seek', type=int, default=None, help="jump to this tick (then print its state digest)")
+    parser.add_argument('--snapshot-every', type=int, default=600, help="ticks between state snapshots")
+    args = parser.parse_args(argv)
+
+    player = ReplayPlayer(args.replay, args.snapshot_every)
+    start = time.perf_counter()
+    if args.seek is not None:
+        player.seek(args.seek)
+    else:
+        player.play()
+    elapsed = time.perf_counter() - start
+    world = player.world
+    print(f"{player.game_name}: {player.tick}/{len(player.ticks)} ticks (seed {player.seed}) in {elapsed:.3f}s "
+          f"({player.tick / elapsed if elapsed > 0 else float('inf'):.0f} ticks/s)")
+    print(f"level {world.current_level} | score {world.player.score} | health {world.player.health} | "
+          f"digest {state_digest(world)}")
+    return player
+
+
+if __name__ == "__main__": main()
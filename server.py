@@ -0,0 +1,318 @@
+"""Authoritative co-op server: one GameWorld stepped on a fixed tick and streamed to every client.
+
+Each client plays its own hero in the shared dungeon (coop.py). The first client takes
+over the hero the world starts with; every later one gets a new hero (the game's
+add_player) beside it, and a client that disconnects takes its hero out of the world
+(the last hero stays, idle, for the next client to take over). Clients send input
+packets in place of the GLUT keyboard and mouse callbacks. A packet is a run of
+replay.CHANGE records, the same (table, key, value) entries a replay stores, and
+updates the input tables of that client's hero as it arrives; the next tick acts on
+them. At most coop.MAX_PLAYERS clients play at once; further connections are closed.
+
+Each tick the world is quantized once (snapshot.quantize) and encoded per client
+against the last snapshot that client was sent. TCP delivers in order, so that
+snapshot is the client's state and no acks are needed. A client whose socket is
+backed up skips ticks; its next snapshot covers everything that changed meanwhile.
+
+Messages are a u32 length and a body. The server sends a welcome (b'DNET', version,
+game name, timestep, the client's hero id) and then one snapshot per tick, which
+carries every hero (snapshot.HERO rows, by id); clients send input packets.
+
+    python server.py serve --game project_1st_part --port 5555 --seed 7
+    python server.py client --port 5555 --ticks 3600    (scripted: the headless autopilot)
+    python server.py loopback --clients 4 --ticks 3600  (server and scripted clients in one process)
+"""
+import argparse
+import asyncio
+import random
+import struct
+import time
+from types import SimpleNamespace
+
+import coop
+import headless
+import snapshot
+from campaign import Campaign
+from fixed_step import FixedStepScheduler
+from replay import CHANGE, ReplayRecorder, apply_changes, capture_inputs, input_changes, state_digest
+
+MAGIC = b'DNET'
+VERSION = 3 # A hero per client: the welcome names it and snapshots carry every hero
+FRAME = struct.Struct('<I')
+WELCOME = struct.Struct('<dI') # timestep and the client's hero id, after magic, version and game name
+MAX_INPUT_BYTES = 127 * CHANGE.size
+MAX_SNAPSHOT_BYTES = 1 << 24
+SEND_BUFFER_LIMIT = 64 * 1024 # Bytes queued for a client before its snapshots are skipped
+TABLES = 4 # replay.KEYS .. replay.KEY_PRESSES
+
+
+def frame(body):
+    return FRAME.pack(len(body)) + body
+
+
+async def read_frame(reader, limit):
+    (size,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if size > limit:
+        raise ValueError(f"{size}-byte message exceeds the {limit}-byte limit")
+    return await reader.readexactly(size)
+
+
+def decode_inputs(body):
+    if len(body) % CHANGE.size:
+        raise ValueError("input packet is not a whole number of changes")
+    changes = list(CHANGE.iter_unpack(body))
+    if any(table >= TABLES for table, _, _ in changes):
+        raise ValueError("input packet names an unknown input table")
+    return changes
+
+
+class ClientConnection:
+    def __init__(self, writer, number, player):
+        self.writer = writer
+        self.number = number
+        self.player = player # This client's hero in the world
+        self.baseline = None # Last WorldState sent; snapshots are encoded against it
+        self.snapshots = 0
+        self.bytes_sent = 0
+        self.skipped = 0
+        self.input_changes = 0
+
+
+class GameServer:
+    def __init__(self, game, world, timestep=headless.DEFAULT_TIMESTEP, recorder=None):
+        self.game = game
+        self.world = world
+        self.timestep = timestep
+        self.recorder = recorder
+        self.scheduler = FixedStepScheduler(1.0 / timestep)
+        self.tick = 0
+        self.clients = []
+        self.connections = 0
+        self.full_bytes = 0 # What full snapshots would have cost; counted when measure_full is set
+        self.measure_full = False
+
+    def adopt_hero(self):
+        """A hero for a new client: one no client plays (the world's first, or the last one left), else a new one."""
+        taken = {id(client.player) for client in self.clients}
+        for player in self.world.players:
+            if id(player) not in taken:
+                return player
+        return self.game.add_player(self.world)
+
+    async def handle_client(self, reader, writer):
+        if len(self.clients) >= coop.MAX_PLAYERS:
+            writer.close()
+            return
+        self.connections += 1
+        client = ClientConnection(writer, self.connections, self.adopt_hero())
+        name = self.game.__name__.encode('ascii')
+        writer.write(frame(MAGIC + bytes([VERSION, len(name)]) + name + WELCOME.pack(self.timestep, client.player.number)))
+        self.clients.append(client)
+        try:
+            while True:
+                changes = decode_inputs(await read_frame(reader, MAX_INPUT_BYTES))
+                apply_changes(coop.input_tables(self.world, self.world.players.index(client.player)), changes)
+                client.input_changes += len(changes)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass # Disconnected, or sent something that is not an input packet
+        finally:
+            self.clients.remove(client)
+            coop.leave(self.world, client.player)
+            writer.close()
+
+    def step(self, dt):
+        if self.recorder:
+            self.recorder.record_tick(dt, lambda dt: self.game.update_game_state(self.world, dt))
+        else:
+            self.game.update_game_state(self.world, dt)
+        self.tick += 1
+        state = snapshot.quantize(self.game, self.world, self.tick, self.timestep)
+        for client in self.clients:
+            if client.writer.transport.get_write_buffer_size() > SEND_BUFFER_LIMIT:
+                client.skipped += 1
+                continue
+            data = snapshot.encode(state, client.baseline)
+            client.writer.write(frame(data))
+            client.baseline = state
+            client.snapshots += 1
+            client.bytes_sent += FRAME.size + len(data)
+            if self.measure_full:
+                self.full_bytes += FRAME.size + len(snapshot.encode(state))
+
+    async def run(self, ticks=None, realtime=True):
+        """Step until ticks have run (forever if None): on the wall clock, or as fast as clients keep up."""
+        loop = asyncio.get_running_loop()
+        last = loop.time()
+        while ticks is None or self.tick < ticks:
+            if not realtime:
+                self.step(self.timestep)
+                await asyncio.sleep(0)
+                continue
+            now = loop.time()
+            self.scheduler.advance(now - last, self.step)
+            last = now
+            await asyncio.sleep(max(0.0, (1.0 - self.scheduler.alpha()) * self.scheduler.dt))
+
+    async def close(self):
+        for client in list(self.clients):
+            client.writer.close()
+        for client in list(self.clients):
+            try:
+                await client.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+def pilot(game, view):
+    """The headless autopilot, releasing the mouse a tick after each press so every press is a new click."""
+    clicked = view.mouse_buttons.get(game.GLUT_LEFT_BUTTON) == game.GLUT_DOWN
+    headless.autopilot(game, view)
+    if clicked:
+        view.mouse_buttons[game.GLUT_LEFT_BUTTON] = game.GLUT_UP
+
+
+class ScriptedClient:
+    """Mirrors the server's snapshots and plays its hero with controller(game, view); view mimics the GameWorld
+    fields it reads, with view.player this client's hero."""
+
+    def __init__(self, controller=pilot):
+        self.controller = controller
+        self.hero_id = None # Set by the server's welcome
+        self.state = None
+        self.snapshots = 0
+        self.bytes_received = 0
+        self.view = SimpleNamespace(player=SimpleNamespace(pos=[0.0, 0.0, 0.0], rotation_y=0.0, shoot_cooldown=0.0),
+                                    enemies=[], keys_pressed={}, special_keys_pressed={}, mouse_buttons={},
+                                    key_presses=[])
+
+    def update_view(self):
+        hero = self.state.hero(self.hero_id)
+        self.view.player.pos = [hero['x'] / snapshot.POS_SCALE, hero['y'] / snapshot.POS_SCALE,
+                                hero['z'] / snapshot.POS_SCALE]
+        self.view.player.rotation_y = hero['yaw'] * 360.0 / snapshot.PLAYER_ROT_STEPS
+        enemies = self.state.enemies
+        self.view.enemies = [SimpleNamespace(pos=(x / snapshot.POS_SCALE, 0.0, z / snapshot.POS_SCALE))
+                             for x, z in zip(enemies['x'].tolist(), enemies['z'].tolist())]
+
+    async def run(self, host, port, ticks=None):
+        reader, writer = await asyncio.open_connection(host, port)
+        welcome = await read_frame(reader, 256)
+        if welcome[:4] != MAGIC or welcome[4] != VERSION:
+            raise ValueError(f"{host}:{port} is not a version {VERSION} dungeon server")
+        game = headless.load_game(welcome[6:6+welcome[5]].decode('ascii'))
+        _, self.hero_id = WELCOME.unpack_from(welcome, 6 + welcome[5])
+        previous = capture_inputs(self.view)
+        try:
+            while ticks is None or self.snapshots < ticks:
+                data = await read_frame(reader, MAX_SNAPSHOT_BYTES)
+                self.state = snapshot.decode(self.state, data)
+                self.snapshots += 1
+                self.bytes_received += FRAME.size + len(data)
+                hero = self.state.hero(self.hero_id)
+                if self.state.header[2] != game.STATE_PLAYING or hero is None or hero['health'] <= 0:
+                    continue
+                self.update_view()
+                self.controller(game, self.view)
+                changes = input_changes(self.view, previous)
+                self.view.key_presses.clear()
+                previous = capture_inputs(self.view)
+                if changes:
+                    writer.write(frame(b''.join(CHANGE.pack(*change) for change in changes)))
+                    await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass # Server closed
+        finally:
+            writer.close()
+
+
+def new_world(game, args):
+    world = game.GameWorld(Campaign(args.campaign) if args.campaign else game.world.campaign)
+    headless.reset_game(game, world, seed=args.seed, level=args.level)
+    return world
+
+
+async def serve(args):
+    game = headless.load_game(args.game)
+    if args.record and args.seed is None:
+        args.seed = random.randrange(2**32) # A replay needs a known seed
+    world = new_world(game, args)
+    recorder = ReplayRecorder(args.record, args.game, args.seed, args.level, args.timestep, world) if args.record else None
+    server = GameServer(game, world, args.timestep, recorder)
+    tcp = await asyncio.start_server(server.handle_client, args.host, args.port)
+    print(f"{args.game} on {', '.join(str(s.getsockname()[:2]) for s in tcp.sockets)}")
+    async with tcp:
+        await server.run(args.ticks)
+    await server.close()
+    if recorder:
+        recorder.close()
+        print(f"recorded {recorder.ticks} ticks to {args.record} (seed {args.seed}, digest {state_digest(world)})")
+
+
+async def loopback(args):
+    """Server and scripted clients over 127.0.0.1 in one process; prints bandwidth per client."""
+    game = headless.load_game(args.game)
+    server = GameServer(game, new_world(game, args), args.timestep)
+    server.measure_full = True
+    tcp = await asyncio.start_server(server.handle_client, '127.0.0.1', 0)
+    port = tcp.sockets[0].getsockname()[1]
+    clients = [ScriptedClient() for _ in range(args.clients)]
+    tasks = [asyncio.create_task(client.run('127.0.0.1', port)) for client in clients]
+    while len(server.clients) < args.clients:
+        await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    async with tcp:
+        await server.run(args.ticks, realtime=args.realtime)
+        sent = {client.number: (client.player.number, client.player.score, client.snapshots, client.bytes_sent,
+                                client.skipped, client.input_changes) for client in server.clients}
+        await server.close()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    world = server.world
+    print(f"{args.game}: {server.tick} ticks in {elapsed:.2f}s, level {world.current_level}")
+    print(f"{'client':>6} {'hero':>5} {'score':>6} {'snapshots':>10} {'skipped':>8} {'KB':>8} {'B/snapshot':>11} "
+          f"{'inputs':>7}")
+    for number, (hero, score, snapshots, sent_bytes, skipped, inputs) in sorted(sent.items()):
+        print(f"{number:>6} {hero:>5} {score:>6} {snapshots:>10} {skipped:>8} {sent_bytes/1024:>8.1f} "
+              f"{sent_bytes/max(snapshots, 1):>11.1f} {inputs:>7}")
+    total = sum(row[3] for row in sent.values())
+    print(f"full snapshots would have cost {server.full_bytes/max(total, 1):.1f}x the bytes "
+          f"({server.full_bytes/max(sum(row[2] for row in sent.values()), 1):.1f} B/snapshot)")
+    return server, clients
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host a shared dungeon for networked clients")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name, help_text in (('serve', "run the server"), ('loopback', "server and scripted clients in one process")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('--game', default='project', help="game module to load (project or project_1st_part)")
+        p.add_argument('--seed', type=int, default=None)
+        p.add_argument('--level', type=int, default=1)
+        p.add_argument('--timestep', type=float, default=headless.DEFAULT_TIMESTEP)
+        p.add_argument('--campaign', default=None, help="levels and wolf types from this JSON/TOML campaign file")
+        p.add_argument('--ticks', type=int, default=None if name == 'serve' else 3600, help="stop after this many ticks")
+    p = sub.choices['serve']
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=5555)
+    p.add_argument('--record', default=None, help="write a replay of the session to this file (see replay.py)")
+    p = sub.choices['loopback']
+    p.add_argument('--clients', type=int, default=2)
+    p.add_argument('--realtime', action='store_true', help="tick on the wall clock instead of as fast as possible")
+    p = sub.add_parser('client', help="connect a scripted client")
+    p.add_argument('--host', default='127.0.0.1')
+    p.add_argument('--port', type=int, default=5555)
+    p.add_argument('--ticks', type=int, default=None, help="disconnect after this many snapshots")
+    args = parser.parse_args(argv)
+
+    if args.command == 'serve':
+        asyncio.run(serve(args))
+    elif args.command == 'loopback':
+        return asyncio.run(loopback(args))
+    else:
+        client = ScriptedClient()
+        asyncio.run(client.run(args.host, args.port, args.ticks))
+        print(f"{client.snapshots} snapshots, {client.bytes_received/1024:.1f} KB "
+              f"({client.bytes_received/max(client.snapshots, 1):.1f} B/snapshot)")
+
+
+if __name__ == "__main__": main()
@@ -0,0 +1,260 @@
+"""Quantized, delta-compressed world snapshots for network clients.
+
+quantize() reduces a GameWorld to integers once per tick: a fixed header, a row per
+hero (a co-op world has several, named by Player.number), enemies by batch slot (x/z
+in 1/256 units, facing in 1/256 turns, health) and bullets by id. encode() then writes
+one tick against a baseline, the state that client last received. The header and the
+hero rows go out in full every time; the rest goes in sections (a leading bit mask
+says which are present; empty ones are left out):
+
+    removed enemies   slot                      (a reused slot is removed, then spawned)
+    spawned enemies   slot, x, z, facing, health, type
+    nudged enemies    slot, int8 steps of x, z and facing
+    moved enemies     slot, x, z, facing        (a step too large for int8)
+    health changes    slot, health
+    removed bullets   id
+    spawned bullets   id, origin, direction, owner, birth tick
+
+Bullets fly straight at BULLET_SPEED, so one is described by where and when it was
+fired and the client extrapolates it; after its first snapshot a live bullet costs
+nothing. An enemy that did not change costs nothing either, so a snapshot grows with
+what changed, not with how many entities are alive. Every snapshot ends with a CRC32
+of the quantized state, which decode() checks against its own result.
+"""
+import struct
+import zlib
+
+import numpy as np
+
+POS_SCALE = 256.0 # Quantization steps per world unit
+ROT_STEPS = 256 # Enemy facing steps per turn
+PLAYER_ROT_STEPS = 65536
+DIR_SCALE = 32767.0
+NO_BASELINE = 0xFFFFFFFF
+
+# tick, baseline tick, game state, level, hero count
+HEADER = struct.Struct('<IIBHB')
+COUNT = struct.Struct('<H')
+CRC = struct.Struct('<I')
+
+# Pitch in centidegrees
+HERO = np.dtype([('id', '<u4'), ('x', '<u2'), ('y', '<u2'), ('z', '<u2'), ('yaw', '<u2'), ('pitch', '<i2'),
+                 ('health', '<i2'), ('score', '<i4'), ('perks', 'u1')])
+ENEMY = np.dtype([('slot', '<u2'), ('x', '<u2'), ('z', '<u2'), ('rot', 'u1'), ('health', '<u2')])
+SPAWNED = np.dtype([('slot', '<u2'), ('x', '<u2'), ('z', '<u2'), ('rot', 'u1'), ('health', '<u2'), ('type', 'u1')])
+NUDGED = np.dtype([('slot', '<u2'), ('dx', 'i1'), ('dz', 'i1'), ('drot', 'i1')])
+MOVED = np.dtype([('slot', '<u2'), ('x', '<u2'), ('z', '<u2'), ('rot', 'u1')])
+HEALTH = np.dtype([('slot', '<u2'), ('health', '<u2')])
+BULLET = np.dtype([('id', '<u4'), ('x', '<u2'), ('y', '<u2'), ('z', '<u2'), ('dx', '<i2'), ('dy', '<i2'), ('dz', '<i2'),
+                   ('owner', 'u1'), ('birth', '<i4')])
+SLOT = np.dtype('<u2')
+BULLET_ID = np.dtype('<u4')
+SECTIONS = (SLOT, SPAWNED, NUDGED, MOVED, HEALTH, BULLET_ID, BULLET) # In encoding order; spawned carries the type table
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+class WorldState:
+    """One tick in quantized form; the server builds it with quantize(), a client with decode()."""
+    __slots__ = ('header', 'heroes', 'enemies', 'enemy_gen', 'enemy_types', 'bullets')
+
+    def __init__(self, header, heroes, enemies, enemy_gen, enemy_types, bullets):
+        self.header = header # HEADER fields, baseline tick included
+        self.heroes = heroes # HERO rows in world.players order
+        self.enemies = enemies # ENEMY rows sorted by slot
+        self.enemy_gen = enemy_gen # Slot generation per row (server side; zeros on a client)
+        self.enemy_types = enemy_types # Type id string per row
+        self.bullets = bullets # BULLET rows sorted by id
+
+    @property
+    def tick(self):
+        return self.header[0]
+
+    def hero(self, hero_id):
+        """The HERO row of hero hero_id, or None if it is not in the world."""
+        rows = self.heroes[self.heroes['id'] == hero_id]
+        return rows[0] if len(rows) else None
+
+    def crc(self):
+        header = HEADER.pack(self.header[0], 0, *self.header[2:])
+        crc = zlib.crc32(self.heroes.tobytes(), zlib.crc32(header))
+        return zlib.crc32(self.bullets['id'].tobytes(), zlib.crc32(self.enemies.tobytes(), crc))
+
+    def bullet_positions(self, tick, speed, timestep):
+        """(n, 3) positions of the bullets at tick, extrapolated from where and when they were fired."""
+        b = self.bullets
+        origin = np.stack([b['x'], b['y'], b['z']], axis=1) / POS_SCALE
+        direction = np.stack([b['dx'], b['dy'], b['dz']], axis=1) / DIR_SCALE
+        return origin + direction * (speed * timestep * (tick - b['birth']))[:, None]
+
+
+def _quantize_pos(values):
+    return np.clip(np.rint(np.asarray(values) * POS_SCALE), 0, 0xFFFF).astype(np.uint16)
+
+
+def quantize(game, world, tick, timestep):
+    """WorldState of world at tick; bullet birth ticks assume every tick lasts timestep."""
+    header = (tick, NO_BASELINE, world.game_state, world.current_level, len(world.players))
+    heroes = np.empty(len(world.players), HERO)
+    for row, p in zip(heroes, world.players):
+        row['x'], row['y'], row['z'] = _quantize_pos(p.pos).tolist()
+        row['id'] = p.number
+        row['yaw'] = int(round(p.rotation_y % 360.0 / 360.0 * PLAYER_ROT_STEPS)) % PLAYER_ROT_STEPS
+        row['pitch'] = int(round(p.rotation_x * 100))
+        row['health'] = max(-0x8000, min(p.health, 0x7FFF))
+        row['score'] = p.score
+        row['perks'] = p.health_perk_available | p.score_perk_available << 1 | p.gun_perk_available << 2
+
+    batch = world.enemy_batch
+    slots = batch.live_slots()
+    enemies = np.empty(len(slots), ENEMY)
+    enemies['slot'] = slots
+    enemies['x'] = _quantize_pos(batch.pos[slots, 0])
+    enemies['z'] = _quantize_pos(batch.pos[slots, 2])
+    enemies['rot'] = np.rint(batch.rotation_y[slots] % 360.0 / 360.0 * ROT_STEPS).astype(np.int64) % ROT_STEPS
+    handles = [batch.entities[slot] for slot in slots.tolist()]
+    enemies['health'] = np.clip([enemy.health for enemy in handles], 0, 0xFFFF)
+    enemy_types = np.array([str(enemy.archetype.type_id) for enemy in handles], dtype=object)
+
+    pool = world.bullets
+    n = pool.count
+    order = np.argsort(pool.ids[:n], kind='stable')
+    age = game.BULLET_LIFESPAN - pool.lifespan[:n][order]
+    direction = pool.dir[:n][order]
+    origin = pool.pos[:n][order] - direction * (game.BULLET_SPEED * age)[:, None]
+    bullets = np.empty(n, BULLET)
+    bullets['id'] = pool.ids[:n][order]
+    for axis, name in enumerate('xyz'):
+        bullets[name] = _quantize_pos(origin[:, axis])
+        bullets['d' + name] = np.rint(direction[:, axis] * DIR_SCALE)
+    bullets['owner'] = pool.owner[:n][order]
+    bullets['birth'] = tick - np.rint(age / timestep).astype(np.int64)
+    return WorldState(header, heroes, enemies, batch.generation[slots].copy(), enemy_types, bullets)
+
+
+def _rows(dtype, fields):
+    rows = np.empty(len(next(iter(fields.values()))), dtype)
+    for name, values in fields.items():
+        rows[name] = values
+    return rows
+
+
+def _wrap(steps, period):
+    return (steps + period // 2) % period - period // 2
+
+
+def encode(state, base=None):
+    """Bytes that turn base (the WorldState the client holds, None for none) into state."""
+    if base is None:
+        base = EMPTY
+    cur, old = state.enemies, base.enemies
+    cur_key = cur['slot'].astype(np.int64) << 32 | state.enemy_gen
+    old_key = old['slot'].astype(np.int64) << 32 | base.enemy_gen
+    kept = np.isin(cur_key, old_key)
+    removed = old['slot'][~np.isin(old_key, cur_key)]
+    spawned = cur[~kept]
+    types = state.enemy_types[~kept]
+    table = list(dict.fromkeys(types.tolist()))
+    type_index = {type_id: i for i, type_id in enumerate(table)}
+
+    now = cur[kept]
+    before = old[np.searchsorted(old_key, cur_key[kept])]
+    dx = now['x'].astype(np.int64) - before['x']
+    dz = now['z'].astype(np.int64) - before['z']
+    drot = _wrap(now['rot'].astype(np.int64) - before['rot'], ROT_STEPS)
+    moved = (dx != 0) | (dz != 0) | (drot != 0)
+    small = moved & (np.abs(dx) <= 127) & (np.abs(dz) <= 127)
+    large = moved & ~small
+    hurt = now['health'] != before['health']
+
+    gone = base.bullets['id'][~np.isin(base.bullets['id'], state.bullets['id'])]
+    fired = state.bullets[~np.isin(state.bullets['id'], base.bullets['id'])]
+
+    sections = (removed.astype(SLOT),
+                _rows(SPAWNED, {'slot': spawned['slot'], 'x': spawned['x'], 'z': spawned['z'], 'rot': spawned['rot'],
+                                'health': spawned['health'], 'type': [type_index[t] for t in types.tolist()]}),
+                _rows(NUDGED, {'slot': now['slot'][small], 'dx': dx[small], 'dz': dz[small], 'drot': drot[small]}),
+                now[large][['slot', 'x', 'z', 'rot']].astype(MOVED),
+                now[hurt][['slot', 'health']].astype(HEALTH),
+                gone.astype(BULLET_ID),
+                fired)
+    parts = [HEADER.pack(state.tick, base.tick if base is not EMPTY else NO_BASELINE, *state.header[2:]),
+             state.heroes.tobytes(), bytes([sum(1 << i for i, rows in enumerate(sections) if len(rows))])]
+    for rows in sections:
+        if len(rows):
+            parts += [COUNT.pack(len(rows)), rows.tobytes()]
+            if rows.dtype == SPAWNED:
+                parts.append(bytes([len(table)]) + b''.join(bytes([len(t)]) + t.encode('utf-8') for t in table))
+    parts.append(CRC.pack(state.crc()))
+    return b''.join(parts)
+
+
+class _Reader:
+    def __init__(self, data):
+        self.data = data
+        self.offset = 0
+
+    def take(self, size):
+        if self.offset + size > len(self.data):
+            raise SnapshotError("snapshot truncated")
+        chunk = self.data[self.offset:self.offset + size]
+        self.offset += size
+        return chunk
+
+    def section(self, dtype, present):
+        if not present:
+            return np.empty(0, dtype)
+        (count,) = COUNT.unpack(self.take(COUNT.size))
+        return np.frombuffer(self.take(count * dtype.itemsize), dtype)
+
+
+def decode(base, data):
+    """The WorldState data describes, applied to base (the client's previous state, None for none)."""
+    r = _Reader(data)
+    header = HEADER.unpack(r.take(HEADER.size))
+    heroes = np.frombuffer(r.take(header[4] * HERO.itemsize), HERO)
+    if base is None:
+        base = EMPTY
+    if header[1] != (base.tick if base is not EMPTY else NO_BASELINE):
+        raise SnapshotError(f"snapshot {header[0]} is against tick {header[1]}, not {base.tick}")
+    mask = r.take(1)[0]
+    removed, spawned = r.section(SLOT, mask & 1), r.section(SPAWNED, mask & 2)
+    table = [r.take(r.take(1)[0]).decode('utf-8') for _ in range(r.take(1)[0])] if len(spawned) else []
+    nudged, moved, hurt, gone, fired = (r.section(dtype, mask & 1 << i) for i, dtype in enumerate(SECTIONS[2:], 2))
+    (crc,) = CRC.unpack(r.take(CRC.size))
+
+    keep = ~np.isin(base.enemies['slot'], removed)
+    enemies = base.enemies[keep].copy()
+    types = base.enemy_types[keep]
+    try:
+        rows = np.searchsorted(enemies['slot'], nudged['slot'])
+        enemies['x'][rows] += nudged['dx'].astype(np.uint16) # uint16 wraps, so adding a negative step works
+        enemies['z'][rows] += nudged['dz'].astype(np.uint16)
+        enemies['rot'][rows] += nudged['drot'].astype(np.uint8)
+        rows = np.searchsorted(enemies['slot'], moved['slot'])
+        for name in ('x', 'z', 'rot'):
+            enemies[name][rows] = moved[name]
+        enemies['health'][np.searchsorted(enemies['slot'], hurt['slot'])] = hurt['health']
+        new_types = np.array([table[i] for i in spawned['type'].tolist()], dtype=object)
+    except IndexError:
+        raise SnapshotError(f"snapshot {header[0]} refers to an enemy or type it does not have") from None
+    if len(spawned):
+        enemies = np.concatenate([enemies, spawned[['slot', 'x', 'z', 'rot', 'health']].astype(ENEMY)])
+        types = np.concatenate([types, new_types])
+        order = np.argsort(enemies['slot'], kind='stable')
+        enemies, types = enemies[order], types[order]
+
+    bullets = base.bullets[~np.isin(base.bullets['id'], gone)]
+    if len(fired):
+        bullets = np.concatenate([bullets, fired])
+        bullets = bullets[np.argsort(bullets['id'], kind='stable')]
+    state = WorldState(header, heroes, enemies, np.zeros(len(enemies), np.uint32), types, bullets)
+    if state.crc() != crc:
+        raise SnapshotError(f"snapshot {header[0]} does not match the server state (CRC)")
+    return state
+
+
+EMPTY = WorldState((NO_BASELINE, NO_BASELINE, 0, 0, 0), np.empty(0, HERO), np.empty(0, ENEMY),
+                   np.empty(0, np.uint32), np.empty(0, dtype=object), np.empty(0, BULLET))
@@ -0,0 +1,120 @@
+"""Uniform grid over the dungeon floor (X/Z plane) for broad-phase collision queries."""
+import math
+
+import numpy as np
+
+
+class SpatialGrid:
+    def __init__(self, size_x, size_z, cell_size):
+        self.cell_size = float(cell_size)
+        self.cols = max(1, int(math.ceil(size_x / self.cell_size)))
+        self.rows = max(1, int(math.ceil(size_z / self.cell_size)))
+        self.cells = {} # cell index -> items, only occupied cells are stored
+
+    def clear(self):
+        self.cells.clear()
+
+    def cell_coords(self, x, z):
+        ix = min(self.cols - 1, max(0, int(x // self.cell_size)))
+        iz = min(self.rows - 1, max(0, int(z // self.cell_size)))
+        return ix, iz
+
+    def cell_keys(self, xs, zs):
+        """Vectorised cell index for arrays of x/z positions (matches the keys used by insert)."""
+        ix = np.minimum(np.maximum((xs // self.cell_size).astype(np.int64), 0), self.cols - 1)
+        iz = np.minimum(np.maximum((zs // self.cell_size).astype(np.int64), 0), self.rows - 1)
+        return ix * self.rows + iz
+
+    def occupied_mask(self):
+        """Boolean array indexed by cell key, True where at least one item was inserted."""
+        mask = np.zeros(self.cols * self.rows, dtype=bool)
+        if self.cells:
+            mask[np.fromiter(self.cells.keys(), dtype=np.int64, count=len(self.cells))] = True
+        return mask
+
+    def insert(self, item, x, z, radius=0.0):
+        """Add item to every cell its bounding square (centre x,z +/- radius) overlaps."""
+        ix0, iz0 = self.cell_coords(x - radius, z - radius)
+        ix1, iz1 = self.cell_coords(x + radius, z + radius)
+        cells = self.cells
+        for ix in range(ix0, ix1 + 1):
+            for iz in range(iz0, iz1 + 1):
+                key = ix * self.rows + iz
+                bucket = cells.get(key)
+                if bucket is None:
+                    cells[key] = [item]
+                else:
+                    bucket.append(item)
+
+    def query_point(self, x, z):
+        """Items whose inserted bounds cover the cell containing (x, z), in insertion order."""
+        ix, iz = self.cell_coords(x, z)
+        return self.cells.get(ix * self.rows + iz, ())
+
+    def query_radius(self, x, z, radius):
+        """Items in every cell overlapping the square (x, z) +/- radius, without duplicates."""
+        ix0, iz0 = self.cell_coords(x - radius, z - radius)
+        ix1, iz1 = self.cell_coords(x + radius, z + radius)
+        if ix0 == ix1 and iz0 == iz1:
+            return list(self.cells.get(ix0 * self.rows + iz0, ()))
+        seen = set()
+        found = []
+        for ix in range(ix0, ix1 + 1):
+            for iz in range(iz0, iz1 + 1):
+                for item in self.cells.get(ix * self.rows + iz, ()):
+                    if id(item) not in seen:
+                        seen.add(id(item))
+                        found.append(item)
+        return found
+
+
+class NeighbourIndex:
+    """Counting-sort grid over arrays of x/z points, rebuilt each tick, for vectorised k-nearest queries.
+
+    Cells are radius wide, so every point within radius of a point lies in the 3x3 cells
+    around it. Each query gathers every point in those nine cells and keeps the k
+    closest with one argpartition, so the result is the exact k nearest. The cost per
+    query grows with how many points share its neighbourhood, O(n * m) for m candidates.
+    """
+
+    def __init__(self, size_x, size_z, radius):
+        self.radius = float(radius)
+        self.cols = max(1, int(math.ceil(size_x / self.radius)))
+        self.rows = max(1, int(math.ceil(size_z / self.radius)))
+
+    def k_nearest(self, xs, zs, k):
+        """(neighbours, dist) of shape (n, k): indices into xs/zs of each point's k closest other points
+        within radius, nearest first, padded with -1 (and dist inf)."""
+        xs, zs = np.asarray(xs, dtype=float), np.asarray(zs, dtype=float)
+        n, rows = len(xs), self.rows
+        ix = np.minimum(np.maximum((xs // self.radius).astype(np.int64), 0), self.cols - 1)
+        iz = np.minimum(np.maximum((zs // self.radius).astype(np.int64), 0), rows - 1)
+        order = np.argsort(ix * rows + iz, kind='stable')
+        counts = np.bincount(ix * rows + iz, minlength=self.cols * rows)
+        start = np.concatenate(([0], np.cumsum(counts)))
+        # (n, 9) neighbouring cells; off-grid ones are empty
+        off_x, off_z = np.repeat([-1, 0, 1], 3), np.tile([-1, 0, 1], 3)
+        cx, cz = ix[:, None] + off_x, iz[:, None] + off_z
+        inside = (cx >= 0) & (cx < self.cols) & (cz >= 0) & (cz < rows)
+        cell = np.where(inside, cx * rows + cz, 0)
+        first = start[cell]
+        size = np.where(inside, start[cell + 1] - first, 0).ravel()
+        # Every point of each query's nine cells, laid out one query per row of an (n, width) table
+        total = size.reshape(n, 9).sum(axis=1)
+        found = int(total.sum())
+        within = np.arange(found)
+        member = order[np.repeat(first.ravel(), size) + within - np.repeat(np.cumsum(size) - size, size)]
+        width = max(int(total.max()) if n else 0, k)
+        cand = np.full((n, width), -1)
+        cand[np.repeat(np.arange(n), total), within - np.repeat(np.cumsum(total) - total, total)] = member
+        valid = cand >= 0
+        cand = np.where(valid, cand, 0)
+        row = np.arange(n)[:, None]
+        dist = np.hypot(xs[cand] - xs[:, None], zs[cand] - zs[:, None])
+        dist[~valid | (cand == row) | (dist > self.radius)] = np.inf
+        keep = np.argpartition(dist, k - 1, axis=1)[:, :k] if width > k else np.broadcast_to(np.arange(k), (n, k))
+        dist = np.take_along_axis(dist, keep, axis=1)
+        nearest = np.argsort(dist, axis=1, kind='stable')
+        keep, dist = np.take_along_axis(keep, nearest, axis=1), np.take_along_axis(dist, nearest, axis=1)
+        neighbours = np.where(np.isfinite(dist), np.take_along_axis(cand, keep, axis=1), -1)
+        return neighbours, dist
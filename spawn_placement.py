@@ -0,0 +1,86 @@
+"""Occupancy grid over the spawn area for placing enemies away from the player and each other.
+
+The area is cut into square cells. block() stamps a keep-out disc around each point;
+a cell is blocked if any part of it could fall inside a disc, i.e. its centre lies
+within radius + half the cell diagonal. Every point of a free cell is therefore valid,
+and sample() picks a free cell uniformly and a point uniformly inside it.
+
+Stamping is vectorised over all points at once and sampling is a single draw, so a
+crowded arena costs one pass instead of a series of rejected guesses, and a full one
+is reported immediately (sample() returns None).
+"""
+import math
+import random
+
+import numpy as np
+
+BLOCK_CHUNK = 256 # Points stamped per vectorised pass; keeps the temporaries cache-sized
+
+
+class SpawnPlacer:
+    def __init__(self, x_min, z_min, x_max, z_max, cell_size=1.0):
+        self.x_min = float(x_min)
+        self.z_min = float(z_min)
+        self.cell_size = float(cell_size)
+        self.cols = max(1, int((x_max - x_min) // self.cell_size))
+        self.rows = max(1, int((z_max - z_min) // self.cell_size))
+        self.half_diagonal = self.cell_size * math.sqrt(0.5)
+        self.open = np.ones((self.cols, self.rows), dtype=bool) # What reset() frees; close() shrinks it for good
+        self.free = self.open.copy()
+        self._stamps = {} # keep-out radius -> (di, dj) cell offsets a disc of that radius can reach
+
+    def reset(self):
+        self.free[:] = self.open
+
+    def close(self, boxes, clearance):
+        """Permanently block every cell within clearance of the (n, 4) x_min, z_min, x_max, z_max boxes."""
+        cx = self.x_min + (np.arange(self.cols) + 0.5) * self.cell_size
+        cz = self.z_min + (np.arange(self.rows) + 0.5) * self.cell_size
+        reach_sq = (clearance + self.half_diagonal) ** 2
+        for x0, z0, x1, z1 in np.asarray(boxes, dtype=float).reshape(-1, 4).tolist():
+            gx = np.maximum(np.maximum(x0 - cx, cx - x1), 0.0)
+            gz = np.maximum(np.maximum(z0 - cz, cz - z1), 0.0)
+            self.open &= gx[:, None]**2 + gz[None, :]**2 >= reach_sq
+        self.free &= self.open
+
+    def _stamp(self, radius):
+        offsets = self._stamps.get(radius)
+        if offsets is None:
+            reach = (radius + self.half_diagonal) / self.cell_size
+            span = int(math.ceil(reach)) + 1
+            di, dj = np.meshgrid(np.arange(-span, span + 1), np.arange(-span, span + 1), indexing='ij')
+            # The point sits anywhere in its own cell, so an offset cell's centre is at least |d| - 0.5 cells away
+            near = np.maximum(np.abs(di) - 0.5, 0)**2 + np.maximum(np.abs(dj) - 0.5, 0)**2 < reach * reach
+            offsets = self._stamps[radius] = (di[near].astype(np.int32), dj[near].astype(np.int32))
+        return offsets
+
+    def block(self, xz, radius):
+        """Mark every cell that comes within radius of any of the (n, 2) x/z points."""
+        xz = np.asarray(xz, dtype=np.float64).reshape(-1, 2)
+        di, dj = self._stamp(radius)
+        reach_sq = (radius + self.half_diagonal) ** 2
+        for start in range(0, len(xz), BLOCK_CHUNK):
+            chunk = xz[start:start + BLOCK_CHUNK]
+            # Position in cell units, so cell (i, j) has its centre at (i + 0.5, j + 0.5)
+            u = ((chunk[:, 0] - self.x_min) / self.cell_size).astype(np.float32)
+            v = ((chunk[:, 1] - self.z_min) / self.cell_size).astype(np.float32)
+            ix = np.floor(u).astype(np.int32)[:, None] + di
+            iz = np.floor(v).astype(np.int32)[:, None] + dj
+            du = ix + np.float32(0.5) - u[:, None]
+            dv = iz + np.float32(0.5) - v[:, None]
+            hit = ((du*du + dv*dv) * np.float32(self.cell_size ** 2) < reach_sq) & \
+                  (ix >= 0) & (ix < self.cols) & (iz >= 0) & (iz < self.rows)
+            self.free[ix[hit], iz[hit]] = False
+
+    def free_cells(self):
+        return int(np.count_nonzero(self.free))
+
+    def sample(self, rng=random):
+        """A uniformly random (x, z) clear of every blocked disc, or None if no cell is free."""
+        free = np.flatnonzero(self.free)
+        if len(free) == 0:
+            return None
+        cell = int(free[rng.randrange(len(free))])
+        ix, iz = divmod(cell, self.rows)
+        return (self.x_min + (ix + rng.random()) * self.cell_size,
+                self.z_min + (iz + rng.random()) * self.cell_size)
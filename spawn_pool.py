@@ -0,0 +1,58 @@
+"""Counted multiset of the enemy types a level still has to spawn.
+
+A boss level used to keep one list entry per wolf and filter, choose and remove from
+it on every spawn, all O(wolves). SpawnPool keeps a count per type instead: drawing,
+taking and returning a wolf touch one counter, and a weighted draw walks the handful
+of distinct types, never the wolves, so a wave of thousands costs the same as six.
+
+draw() picks random.randrange(total) and walks the counts in first-seen order, which
+consumes the RNG exactly like random.choice on the old list and, for pools listed in
+runs of one type (as the level tables are), lands on the same type.
+"""
+import random
+
+
+class SpawnPool:
+    def __init__(self, types=(), priority=()):
+        self.priority = frozenset(priority) # Types draw() skips; the caller takes them explicitly (the boss)
+        self.counts = {} # type -> remaining, in first-seen order
+        self.total = 0
+        self.drawable = 0 # total minus priority types
+        for type_id in types:
+            self.put_back(type_id)
+
+    def __len__(self):
+        return self.total
+
+    def __contains__(self, type_id):
+        return self.counts.get(type_id, 0) > 0
+
+    def take(self, type_id):
+        """Remove one type_id; False if none is left."""
+        if self.counts.get(type_id, 0) <= 0:
+            return False
+        self.counts[type_id] -= 1
+        self.total -= 1
+        if type_id not in self.priority:
+            self.drawable -= 1
+        return True
+
+    def put_back(self, type_id):
+        """Return one type_id, e.g. after a spawn found no free spot."""
+        self.counts[type_id] = self.counts.get(type_id, 0) + 1
+        self.total += 1
+        if type_id not in self.priority:
+            self.drawable += 1
+
+    def draw(self, rng=random):
+        """Remove and return a random non-priority type weighted by its count, or None if there is none."""
+        if self.drawable <= 0:
+            return None
+        index = rng.randrange(self.drawable)
+        for type_id, count in self.counts.items():
+            if type_id in self.priority or count <= 0:
+                continue
+            if index < count:
+                self.take(type_id)
+                return type_id
+            index -= count
@@ -0,0 +1,42 @@
+"""Static geometry uploaded once to a vertex buffer and drawn with a single call."""
+import numpy as np
+from OpenGL.GL import *
+
+# Interleaved layout understood by glInterleavedArrays(GL_C4F_N3F_V3F): rgba, normal, position
+VERTEX_FLOATS = 10
+
+
+def quad_vertices(corners, normal, color):
+    """Rows for one GL_QUADS quad: corners is (4, 3), color rgb."""
+    rows = np.empty((4, VERTEX_FLOATS), dtype=np.float32)
+    rows[:, 0:3] = color
+    rows[:, 3] = 1.0
+    rows[:, 4:7] = normal
+    rows[:, 7:10] = corners
+    return rows
+
+
+class StaticMesh:
+    def __init__(self, vertices, mode=GL_QUADS, layout=GL_C4F_N3F_V3F):
+        """layout is the glInterleavedArrays format of the rows; GL_N3F_V3F keeps the current glColor."""
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.count = len(self.vertices)
+        self.mode = mode
+        self.layout = layout
+        self.vbo = glGenBuffers(1)
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glBufferData(GL_ARRAY_BUFFER, self.vertices.nbytes, self.vertices, GL_STATIC_DRAW)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def draw(self):
+        glBindBuffer(GL_ARRAY_BUFFER, self.vbo)
+        glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
+        glInterleavedArrays(self.layout, 0, None)
+        glDrawArrays(self.mode, 0, self.count)
+        glPopClientAttrib()
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+
+    def delete(self):
+        if self.vbo is not None:
+            glDeleteBuffers(1, [self.vbo])
+            self.vbo = None
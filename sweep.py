@@ -0,0 +1,201 @@
+"""Balance sweeps: many headless sessions across all cores, results written column by column.
+
+Each worker process imports its own copy of the game module, since overrides change
+its module constants. Inside a worker, sessions run one after another; each restores
+the default constants, applies its overrides and plays a fresh GameWorld.
+
+--set NAME=v1,v2,... adds a sweep axis. The sweep runs every combination, --sessions
+times each, with a different seed every session. NAME is one of the game's
+module constants (PLAYER_SPEED, BULLET_SPEED, PERK_RAPID_FIRE_DURATION, ...) or a
+level setting (max_concurrent, max_concurrent_boss_phase, total_enemies) applied to
+every level, or to one level with a .N suffix (max_concurrent.10).
+
+    python sweep.py --sessions 32 --set PLAYER_SPEED=4,5,6 --out speed.npz
+    python sweep.py --game project_1st_part --sim-seconds 900 --set max_concurrent.9=3,4 --out mc9.csv
+
+.npz results hold one array per column (numpy.load(path)['score']); .csv has the same
+columns with a header row.
+"""
+import argparse
+import ast
+import contextlib
+import csv
+import io
+import itertools
+import math
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import headless
+from campaign import Campaign
+
+LEVEL_SETTINGS = ('max_concurrent', 'max_concurrent_boss_phase', 'total_enemies')
+RESULT_COLUMNS = ('session', 'seed', 'ticks', 'sim_seconds', 'wall_seconds', 'ticks_per_second', 'level', 'score',
+                  'deaths', 'won', 'clear_seconds')
+
+_game = None
+_campaign = None
+_defaults = {} # constant name -> value before any override, per worker
+
+
+def parse_axis(text):
+    """'NAME=v1,v2' -> (NAME, [v1, v2]) with numeric values parsed."""
+    name, sep, values = text.partition('=')
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"expected NAME=value[,value...], got {text!r}")
+    parsed = []
+    for value in values.split(','):
+        try:
+            parsed.append(ast.literal_eval(value.strip()))
+        except (ValueError, SyntaxError):
+            raise argparse.ArgumentTypeError(f"{name}: {value!r} is not a number")
+    return name.strip(), parsed
+
+
+def check_override(game, name):
+    setting, _, level = name.partition('.')
+    if setting in LEVEL_SETTINGS:
+        if level and not level.isdigit():
+            raise ValueError(f"{name}: the level suffix must be a number")
+        return
+    if level or not name.isupper() or not hasattr(game, name):
+        raise ValueError(f"{name} is neither a {game.__name__} constant nor one of {', '.join(LEVEL_SETTINGS)}[.N]")
+
+
+def apply_overrides(game, overrides):
+    """Reset constants to their defaults, then set this session's constants. Level settings are returned."""
+    for name, value in _defaults.items():
+        setattr(game, name, value)
+    level_settings = {}
+    for name, value in overrides.items():
+        if name.partition('.')[0] in LEVEL_SETTINGS:
+            level_settings[name] = value
+            continue
+        _defaults.setdefault(name, getattr(game, name))
+        setattr(game, name, value)
+    return level_settings
+
+
+def apply_level_settings(world, level_settings):
+    for name, value in level_settings.items():
+        setting, _, level = name.partition('.')
+        for number in ([int(level)] if level else range(1, world.max_levels + 1)):
+            config = world.level_configs[number]
+            if setting == 'max_concurrent_boss_phase' and 'is_boss_level' not in config:
+                continue
+            config[setting] = value
+
+
+def perk_pilot(game, world):
+    """The headless autopilot, plus cashing in perks: health below half, the others as soon as earned."""
+    headless.autopilot(game, world)
+    p = world.player
+    if p.health_perk_available and p.health < game.PLAYER_MAX_HEALTH / 2:
+        world.key_presses.append(b'h')
+    if p.score_perk_available:
+        world.key_presses.append(b'c')
+    if p.gun_perk_available:
+        world.key_presses.append(b'g')
+
+
+def init_worker(game_name, campaign_path):
+    global _game, _campaign
+    _game = headless.load_game(game_name)
+    _campaign = Campaign(campaign_path) if campaign_path else None
+
+
+def run_session(job):
+    session, seed, overrides, level, sim_seconds, timestep = job
+    game = _game
+    level_settings = apply_overrides(game, overrides)
+    world = game.GameWorld(_campaign) # After the overrides: the world reads PLAYER_SPEED etc. when built
+    headless.reset_game(game, world, seed=seed, level=level)
+    apply_level_settings(world, level_settings)
+    with contextlib.redirect_stdout(io.StringIO()): # The games print perk and level messages
+        stats = headless.run(game, world, sim_seconds=sim_seconds, timestep=timestep, controller=perk_pilot)
+    stats.update(session=session, seed=seed, clear_seconds=stats['sim_seconds'] if stats['won'] else math.nan)
+    return stats
+
+
+def write_columns(path, columns):
+    if path.endswith('.csv'):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(columns.keys())
+            writer.writerows(zip(*columns.values()))
+    else:
+        np.savez(path, **{name: np.asarray(values) for name, values in columns.items()})
+
+
+def summarize(columns, axis_names):
+    groups = {}
+    for i in range(len(columns['session'])):
+        groups.setdefault(tuple(columns[name][i] for name in axis_names), []).append(i)
+    widths = [max(12, len(name) + 2) for name in axis_names]
+    header = ''.join(f"{name:>{width}}" for name, width in zip(axis_names, widths))
+    print(f"{header}{'runs':>6}{'won':>6}{'clear s':>10}{'deaths':>8}{'score':>8}{'ticks/s':>9}")
+    for key, rows in groups.items():
+        cleared = [columns['clear_seconds'][i] for i in rows if columns['won'][i]]
+        values = ''.join(f"{value:>{width}}" for value, width in zip(key, widths))
+        print(f"{values}{len(rows):>6}{len(cleared):>6}"
+              f"{statistics.mean(cleared) if cleared else math.nan:>10.1f}"
+              f"{statistics.mean(columns['deaths'][i] for i in rows):>8.2f}"
+              f"{statistics.mean(columns['score'][i] for i in rows):>8.0f}"
+              f"{statistics.mean(columns['ticks_per_second'][i] for i in rows):>9.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless sessions in parallel for balance tuning")
+    parser.add_argument('--game', default='project', help="game module to load (project or project_1st_part)")
+    parser.add_argument('--sessions', type=int, default=8, help="sessions per combination of --set values")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--seed', type=int, default=None, help="base seed; session i uses seed + i")
+    parser.add_argument('--sim-seconds', type=float, default=600.0, help="simulated seconds per session (cap)")
+    parser.add_argument('--timestep', type=float, default=headless.DEFAULT_TIMESTEP)
+    parser.add_argument('--level', type=int, default=1, help="starting level")
+    parser.add_argument('--campaign', default=None, help="levels and wolf types from this JSON/TOML campaign file")
+    parser.add_argument('--set', dest='axes', type=parse_axis, action='append', default=[], metavar='NAME=V1,V2',
+                        help="override a constant or level setting; several values make a sweep axis")
+    parser.add_argument('--out', default=None, help="results file, .npz (default) or .csv")
+    args = parser.parse_args(argv)
+
+    game = headless.load_game(args.game)
+    for name, _ in args.axes:
+        try:
+            check_override(game, name)
+        except ValueError as e:
+            parser.error(str(e))
+    axis_names = [name for name, _ in args.axes]
+    combos = list(itertools.product(*(values for _, values in args.axes)))
+    base_seed = args.seed if args.seed is not None else random.randrange(2**31)
+    jobs = []
+    for combo in combos:
+        for _ in range(args.sessions):
+            session = len(jobs)
+            jobs.append((session, base_seed + session, dict(zip(axis_names, combo)), args.level, args.sim_seconds,
+                         args.timestep))
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(args.game, args.campaign)) as pool:
+        results = list(pool.map(run_session, jobs, chunksize=max(1, len(jobs) // (4 * args.workers))))
+    elapsed = time.perf_counter() - start
+
+    columns = {name: [job[2][name] for job in jobs] for name in axis_names}
+    for name in RESULT_COLUMNS:
+        columns[name] = [stats[name] for stats in results]
+    total_ticks = sum(columns['ticks'])
+    print(f"{args.game}: {len(jobs)} sessions on {args.workers} workers in {elapsed:.1f}s wall "
+          f"({total_ticks / elapsed:.0f} ticks/s total, base seed {base_seed})")
+    summarize(columns, axis_names)
+    if args.out:
+        write_columns(args.out, columns)
+        print(f"wrote {args.out}")
+    return columns
+
+
+if __name__ == "__main__": main()
@@ -0,0 +1,5 @@
+import os
+import sys
+
+os.environ['DUNGEON_HEADLESS'] = '1' # The game modules must never import OpenGL under test
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
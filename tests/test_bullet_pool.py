@@ -0,0 +1,156 @@
+import math
+
+import numpy as np
+import pytest
+
+import headless
+from bullet_pool import OWNER_ENEMY, OWNER_PLAYER, BulletPool, sweep_sphere, sweep_spheres
+
+
+def sweep(start, travel, center, radius):
+    return sweep_spheres(np.array([start], dtype=float), np.array([travel], dtype=float),
+                         np.array([center], dtype=float), np.array([radius], dtype=float))[0]
+
+
+def test_hit_returns_first_contact():
+    # From x=0 towards a unit sphere at x=5: touches at x=4, 40% of a 10-unit step
+    assert sweep((0, 0, 0), (10, 0, 0), (5, 0, 0), 1.0) == pytest.approx(0.4)
+
+
+def test_fast_bullet_does_not_tunnel():
+    # The step starts before the sphere and ends past it, so neither endpoint is inside
+    assert sweep((-20, 0, 0), (40, 0, 0), (0, 0.5, 0), 1.0) == pytest.approx((20 - math.sqrt(0.75)) / 40)
+
+
+def test_miss():
+    assert sweep((0, 0, 0), (10, 0, 0), (5, 3, 0), 1.0) == math.inf # Passes beside it
+    assert sweep((0, 0, 0), (2, 0, 0), (5, 0, 0), 1.0) == math.inf # Stops short of it
+    assert sweep((0, 0, 0), (-10, 0, 0), (5, 0, 0), 1.0) == math.inf # Heads away from it
+    assert sweep((0, 0, 0), (0, 0, 0), (5, 0, 0), 1.0) == math.inf # Does not move
+
+
+def test_starting_inside_hits_at_zero():
+    assert sweep((5, 0.5, 0), (10, 0, 0), (5, 0, 0), 1.0) == 0.0
+    assert sweep((5, 0, 0), (0, 0, 0), (5, 0, 0), 1.0) == 0.0
+
+
+def test_rows_are_paired_and_radii_may_be_scalar():
+    start = np.zeros((3, 3))
+    travel = np.array([[10.0, 0, 0], [0, 10.0, 0], [0, 0, 10.0]])
+    centers = np.array([[5.0, 0, 0], [5.0, 0, 0], [0, 0, 5.0]])
+    t = sweep_spheres(start, travel, centers, 1.0)
+    assert t[0] == pytest.approx(0.4)
+    assert t[1] == math.inf
+    assert t[2] == pytest.approx(0.4)
+
+
+def test_scalar_sweep_matches_arrays():
+    rng = np.random.default_rng(3)
+    start = rng.uniform(-5, 5, (500, 3))
+    centers = rng.uniform(-5, 5, (500, 3))
+    travel = (centers - start) * rng.uniform(0.2, 2.0, (500, 1)) + rng.uniform(-2, 2, (500, 3)) # Mostly aimed at it
+    radii = rng.uniform(0.2, 2.0, 500)
+    expected = sweep_spheres(start, travel, centers, radii)
+    assert 100 < np.isfinite(expected).sum() < 400 # Enough hits and misses to compare
+    for k in range(500):
+        got = sweep_sphere(start[k].tolist(), travel[k].tolist(), centers[k].tolist(), float(radii[k]))
+        assert got == pytest.approx(expected[k])
+
+
+def spawn_row(pool, k, owner=OWNER_PLAYER):
+    return pool.spawn((k, 0.0, 0.0), (1.0, 0.0, 0.0), owner, k, 1.0 + k, (0.5, 0.5, 0.5))
+
+
+def test_spawn_and_spawn_many_grow_the_pool():
+    pool = BulletPool(capacity=2)
+    for k in range(3):
+        assert spawn_row(pool, k) == k
+    assert (pool.count, pool.capacity) == (3, 4)
+    pool.spawn_many(np.full((6, 3), 7.0), np.tile([0.0, 0.0, 1.0], (6, 1)), OWNER_ENEMY, 2, 0.5, (1.0, 0.0, 0.0))
+    assert (len(pool), pool.capacity) == (9, 16)
+    assert pool.ids[:9].tolist() == list(range(9))
+    assert pool.pos[:3, 0].tolist() == [0.0, 1.0, 2.0] # Rows survive the reallocation
+    assert pool.lifespan[:3].tolist() == [1.0, 2.0, 3.0]
+    assert pool.owner[:9].tolist() == [OWNER_PLAYER] * 3 + [OWNER_ENEMY] * 6
+    assert (pool.damage[3:9] == 2).all() and (pool.color[3:9] == (1.0, 0.0, 0.0)).all()
+    pool.spawn_many(np.empty((0, 3)), np.empty((0, 3)), OWNER_ENEMY, 1, 1.0, (0.0, 0.0, 0.0))
+    assert pool.count == 9 and pool.next_id == 9
+
+
+def test_cull_swaps_tail_survivors_into_the_holes():
+    pool = BulletPool(capacity=8)
+    for k in range(6):
+        spawn_row(pool, k)
+    pool.cull(np.array([True, False, False, True, False, True]))
+    assert pool.count == 3
+    assert sorted(pool.ids[:3].tolist()) == [1, 2, 4]
+    for i, bullet_id in enumerate(pool.ids[:3].tolist()): # Every column moved with its row
+        assert pool.pos[i, 0] == bullet_id and pool.damage[i] == bullet_id and pool.lifespan[i] == 1.0 + bullet_id
+    pool.cull(np.zeros(3, dtype=bool))
+    assert pool.count == 3
+    pool.cull(np.ones(3, dtype=bool))
+    assert pool.count == 0
+
+
+def test_integrate_bounds_and_interpolation():
+    pool = BulletPool()
+    pool.spawn((1.0, 1.0, 1.0), (1.0, 0.0, 0.0), OWNER_PLAYER, 1, 1.0, (0.0, 0.0, 0.0))
+    pool.spawn((9.5, 1.0, 1.0), (0.0, 0.0, -1.0), OWNER_ENEMY, 1, 0.01, (0.0, 0.0, 0.0))
+    pool.integrate(0.1, 20.0)
+    assert pool.pos[:2].tolist() == [[3.0, 1.0, 1.0], [9.5, 1.0, -1.0]]
+    assert pool.lifespan[:2] == pytest.approx([0.9, -0.09])
+    assert pool.out_of_bounds((0.0, 0.0, 0.0), (10.0, 5.0, 10.0)).tolist() == [False, True]
+    assert pool.out_of_bounds((0.0, 0.0, -2.0), (9.5, 5.0, 10.0)).tolist() == [False, True] # Bounds are open
+    assert np.allclose(pool.interpolated_pos(0.25, 20.0, 0.1), [[1.5, 1.0, 1.0], [9.5, 1.0, 0.5]])
+    assert np.allclose(pool.interpolated_pos(1.0, 20.0, 0.1), pool.pos[:2])
+
+
+def bullet_scene(game, bullets):
+    """A seeded level with wolves about and `bullets` bullets flying at them, at the player and at the walls."""
+    world = game.GameWorld(game.world.campaign)
+    headless.reset_game(game, world, seed=7)
+    headless.run(game, world, ticks=240, controller=None)
+    assert world.enemies
+    world.bullets.clear()
+    rng = np.random.default_rng(bullets)
+    player = world.player.pos
+    targets = [enemy.pos.copy() for enemy in world.enemies]
+    for k in range(bullets):
+        owner = OWNER_PLAYER if k % 3 else OWNER_ENEMY
+        if owner == OWNER_PLAYER:
+            start = player + rng.normal(0.0, 0.5, 3)
+            aim = targets[k % len(targets)] + rng.normal(0.0, 0.4, 3) if k % 4 else rng.uniform(0, 70, 3)
+        else:
+            start = targets[k % len(targets)] + rng.normal(0.0, 0.5, 3)
+            aim = player + rng.normal(0.0, 0.3, 3)
+        start[1] = aim[1]
+        direction = (aim - start) / np.linalg.norm(aim - start)
+        world.bullets.spawn(start, direction, owner, 2, rng.uniform(0.0, 2.0), (1.0, 1.0, 0.0))
+    return world
+
+
+def bullet_outcome(world):
+    n = world.bullets.count
+    return (world.bullets.ids[:n].tolist(), world.bullets.pos[:n].round(9).tolist(),
+            sorted((enemy.slot, enemy.health) for enemy in world.enemies),
+            world.player.health, world.player.score, world.game_state, world.enemies_killed_this_level)
+
+
+@pytest.mark.parametrize('game_name', ['project', 'project_1st_part'])
+@pytest.mark.parametrize('bullets', [12, 120]) # Below and above BULLET_ARRAY_THRESHOLD
+def test_scalar_and_array_bullet_updates_agree(game_name, bullets):
+    game = headless.load_game(game_name)
+    assert bullets < game.BULLET_ARRAY_THRESHOLD or bullets >= game.BULLET_ARRAY_THRESHOLD * 2
+    scalar, arrays = bullet_scene(game, bullets), bullet_scene(game, bullets)
+    assert bullet_outcome(scalar) == bullet_outcome(arrays)
+    start = bullet_outcome(scalar)
+    for _ in range(150):
+        game.update_bullets_scalar(scalar, headless.DEFAULT_TIMESTEP)
+        game.update_bullets_arrays(arrays, headless.DEFAULT_TIMESTEP)
+        assert bullet_outcome(scalar) == bullet_outcome(arrays)
+        if not scalar.bullets.count:
+            break
+    end = bullet_outcome(scalar)
+    assert end[2] != start[2] or end[4] != start[4] # Wolves were hit
+    assert end[3] < start[3] # And so was the player
+    assert len(end[0]) < len(start[0])
@@ -0,0 +1,122 @@
+import json
+import os
+
+import pytest
+
+from campaign import CACHE_HEADER, Campaign, CampaignError, read_cache
+
+SOURCE = {
+    'enemies': {
+        '1': {'name': 'Type1Wolf', 'health': 3, 'damage': 3, 'speed_mult': 0.4, 'model_height': 1.5,
+              'color': [0.6, 0.5, 0.4], 'points': 10},
+        'boss': {'name': 'BossWolf', 'health': 15, 'damage': 7, 'speed_mult': 0.8, 'model_height': 2.5,
+                 'color': [0.3, 0.3, 0.3], 'points': 100, 'is_boss': True},
+    },
+    'levels': [
+        {'max_concurrent': 2, 'waves': [{'type': 1, 'count': 6}]},
+        {'max_concurrent_boss_phase': 3, 'is_boss_level': True,
+         'waves': [{'type': 'boss', 'count': 1}, {'type': 1, 'count': 5}], 'colors': {'1': [0.9, 0.4, 0.3]}},
+    ],
+}
+
+
+def write(path, source, mtime_ns=None):
+    path.write_text(json.dumps(source))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'campaign.json'
+    write(path, SOURCE, 1_000_000_000_000_000_000)
+    return path
+
+
+def test_compiles_then_loads_from_cache(source):
+    first = Campaign(str(source))
+    assert not first.from_cache
+    second = Campaign(str(source))
+    assert second.from_cache
+    assert second.level_count == 2
+    assert second.level(1) == first.level(1) == {'total_enemies': 6, 'enemy_types': [1] * 6, 'max_concurrent': 2}
+    assert second.level(2)['colors'] == {1: [0.9, 0.4, 0.3]}
+    assert second.enemy_definition(1, 2)['color'] == [0.9, 0.4, 0.3]
+    assert second.enemy_definition('boss', 1)['is_boss']
+
+
+def test_touched_but_unchanged_source_keeps_the_cache(source):
+    Campaign(str(source))
+    os.utime(source, ns=(2_000_000_000_000_000_000,) * 2)
+    touched = Campaign(str(source))
+    assert touched.from_cache
+    _, header = read_cache(touched.cache_path)
+    assert header[2] == 2_000_000_000_000_000_000 # Recorded mtime refreshed, so the next launch skips the hash
+    assert Campaign(str(source)).from_cache
+
+
+def test_edited_source_is_recompiled(source):
+    Campaign(str(source))
+    edited = json.loads(json.dumps(SOURCE))
+    edited['levels'][0]['max_concurrent'] = 12
+    write(source, edited, 1_000_000_000_000_000_000) # Same mtime restored; the size gives it away
+    campaign = Campaign(str(source))
+    assert not campaign.from_cache
+    assert campaign.level(1)['max_concurrent'] == 12
+
+
+def test_edit_with_same_size_and_new_mtime_is_recompiled(source):
+    Campaign(str(source))
+    edited = json.loads(json.dumps(SOURCE))
+    edited['levels'][0]['max_concurrent'] = 3 # One digit for another: same size
+    write(source, edited, 3_000_000_000_000_000_000)
+    campaign = Campaign(str(source))
+    assert not campaign.from_cache
+    assert campaign.level(1)['max_concurrent'] == 3
+
+
+def test_corrupt_cache_is_rebuilt(source):
+    campaign = Campaign(str(source))
+    with open(campaign.cache_path, 'rb') as f:
+        data = f.read()
+    with open(campaign.cache_path, 'wb') as f:
+        f.write(data[:CACHE_HEADER.size + 5]) # Header intact, enemy table cut short
+    rebuilt = Campaign(str(source))
+    assert not rebuilt.from_cache
+    assert rebuilt.level(2)['is_boss_level']
+    assert Campaign(str(source)).from_cache
+
+
+def test_cache_of_another_version_is_ignored(source):
+    campaign = Campaign(str(source))
+    with open(campaign.cache_path, 'r+b') as f:
+        f.seek(4)
+        f.write(bytes([0xFF]))
+    assert not Campaign(str(source)).from_cache
+
+
+@pytest.mark.parametrize('change, message', [
+    (lambda s: s['levels'][0].update(waves=[{'type': 2, 'count': 1}]), "undefined enemy types"),
+    (lambda s: s['levels'][0].update(waves=[{'type': True, 'count': 1}]), "type"),
+    (lambda s: s['levels'][0].update(waves={'type': 1}), "waves must be a list"),
+    (lambda s: s['levels'][1].update(colors=[0.9, 0.4, 0.3]), "colors must be a table"),
+    (lambda s: s['enemies']['1'].update(health=0), "must be positive"),
+    (lambda s: s['levels'][0].update(speed=2), "unknown keys"),
+])
+def test_invalid_sources_name_the_file_and_the_problem(tmp_path, change, message):
+    broken = json.loads(json.dumps(SOURCE))
+    change(broken)
+    path = tmp_path / 'broken.json'
+    write(path, broken)
+    with pytest.raises(CampaignError) as error:
+        Campaign(str(path))
+    assert str(error.value).startswith(str(path))
+    assert message in str(error.value)
+    assert not os.path.exists(str(path) + '.cache')
+
+
+def test_malformed_json_is_a_campaign_error(tmp_path):
+    path = tmp_path / 'broken.json'
+    path.write_text('{"enemies": ')
+    with pytest.raises(CampaignError):
+        Campaign(str(path))
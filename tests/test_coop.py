@@ -0,0 +1,123 @@
+import numpy as np
+import pytest
+
+import coop
+import headless
+from bullet_pool import OWNER_ENEMY, OWNER_PLAYER
+
+GAMES = ['project', 'project_1st_part']
+
+
+def coop_world(game_name, heroes=2):
+    game = headless.load_game(game_name)
+    world = game.GameWorld(game.world.campaign)
+    headless.reset_game(game, world, seed=7)
+    for _ in range(heroes - 1):
+        game.add_player(world)
+    return game, world
+
+
+def coop_pilot(game, world):
+    """headless.autopilot for every hero, each on its own input tables."""
+    for _ in coop.hero_turns(world, standing_only=True):
+        headless.autopilot(game, world)
+
+
+@pytest.mark.parametrize('game_name', GAMES)
+def test_each_hero_moves_on_its_own_inputs(game_name):
+    game, world = coop_world(game_name)
+    host, guest = world.players
+    own_keys = world.keys_pressed
+    assert guest.number != host.number and guest.pos != host.pos
+    world.player_inputs[1].keys_pressed[b'a'] = True
+    world.player_inputs[1].keys_pressed[b'w'] = True
+    start_host, start_guest = list(host.pos), list(guest.pos)
+    for _ in range(30):
+        game.update_game_state(world, headless.DEFAULT_TIMESTEP)
+    assert host.pos == start_host and host.rotation_y == 0.0
+    assert guest.pos != start_guest and guest.rotation_y != 0.0
+    assert world.player is host and world.keys_pressed is own_keys # hero_turns put the world back
+
+
+@pytest.mark.parametrize('game_name', GAMES)
+def test_kills_score_for_the_hero_who_fired(game_name):
+    game, world = coop_world(game_name)
+    host, guest = world.players
+    game.spawn_enemy(world)
+    enemy = world.enemies[0]
+    enemy.health = 1
+    start = np.array(enemy.pos) - (3.0, 0.0, 0.0)
+    world.bullets.spawn(start, (1.0, 0.0, 0.0), OWNER_PLAYER, 1, game.BULLET_LIFESPAN, (1, 1, 1), guest.number)
+    for _ in range(30):
+        game.update_bullets(world, headless.DEFAULT_TIMESTEP)
+    assert not world.enemies
+    assert guest.score == enemy.archetype.points and host.score == 0
+    assert guest.kills_for_gun_perk == 1 and host.kills_for_gun_perk == 0
+
+
+@pytest.mark.parametrize('game_name', GAMES)
+def test_the_game_is_over_once_no_hero_stands(game_name):
+    game, world = coop_world(game_name)
+    host, guest = world.players
+
+    def shoot(hero):
+        center = np.array(hero.pos)
+        world.bullets.spawn(center - (2.0, 0.0, 0.0), (1.0, 0.0, 0.0), OWNER_ENEMY, hero.health, game.BULLET_LIFESPAN,
+                            (1, 0, 0))
+        for _ in range(10):
+            game.update_bullets(world, headless.DEFAULT_TIMESTEP)
+
+    shoot(guest)
+    assert guest.health == 0 and host.health == game.PLAYER_MAX_HEALTH
+    assert world.game_state == game.STATE_PLAYING
+    world.player_inputs[1].keys_pressed[b'a'] = True # A downed hero sits out
+    game.update_game_state(world, headless.DEFAULT_TIMESTEP)
+    assert guest.rotation_y == 0.0
+    shoot(host)
+    assert world.game_state == game.STATE_GAME_OVER_TRANSITION
+    for _ in range(int(game.TRANSITION_DURATION / headless.DEFAULT_TIMESTEP) + 2):
+        game.update_game_state(world, headless.DEFAULT_TIMESTEP)
+    assert world.game_state == game.STATE_PLAYING
+    assert host.health == guest.health == game.PLAYER_MAX_HEALTH
+
+
+@pytest.mark.parametrize('game_name', GAMES)
+def test_wolves_go_for_the_nearest_hero(game_name):
+    game, world = coop_world(game_name)
+    host, guest = world.players
+    host.pos[0], host.pos[2] = 10.0, 10.0
+    guest.pos[0], guest.pos[2] = 60.0, 60.0
+    for _ in range(2):
+        game.spawn_enemy(world)
+    batch = world.enemy_batch
+    near_host, near_guest = batch.live_slots()[:2].tolist()
+    batch.pos[near_host, ::2] = (15.0, 12.0)
+    batch.pos[near_guest, ::2] = (55.0, 58.0)
+    world.flow_field.update([host.pos[0], guest.pos[0]], [host.pos[2], guest.pos[2]])
+    targets = coop.wolf_targets(world, world.players)
+    assert targets[near_host].tolist() == host.pos and targets[near_guest].tolist() == guest.pos
+
+
+def test_leaving_hands_the_world_tables_to_the_next_hero():
+    game, world = coop_world('project', heroes=3)
+    host, second, third = world.players
+    second_keys = world.player_inputs[1].keys_pressed
+    second_keys[b'w'] = True
+    assert coop.leave(world, host)
+    assert world.player is second and world.players == [second, third]
+    assert world.keys_pressed is second_keys and world.player_inputs[0] is None
+    assert coop.leave(world, third) and world.players == [second]
+    assert not coop.leave(world, second) # The last hero stays, letting go of its keys
+    assert world.players == [second] and world.keys_pressed == {}
+    assert game.add_player(world).number == 3 # Numbers are never reused
+
+
+@pytest.mark.parametrize('game_name', GAMES)
+def test_coop_autopilot_plays_every_hero(game_name):
+    game, world = coop_world(game_name, heroes=3)
+    shooters = set()
+    for _ in range(600):
+        headless.run(game, world, ticks=1, controller=coop_pilot)
+        pool = world.bullets
+        shooters.update(pool.shooter[:pool.count][pool.owner[:pool.count] == OWNER_PLAYER].tolist())
+    assert shooters == {hero.number for hero in world.players}
@@ -0,0 +1,64 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from enemy_batch import EnemyBatch
+from flow_field import FlowField, ObstacleGrid
+from spatial_grid import NeighbourIndex
+
+SIZE = 40.0
+BOXES = ((18.0, 4.0, 20.0, 30.0), (6.0, 24.0, 14.0, 26.0))
+PLAYER = (30.0, 0.9, 12.0)
+
+
+def crowd(count, array_threshold):
+    """A seeded batch of count wolves, some bunched up, two on the very same spot and one slot freed."""
+    rng = np.random.default_rng(count)
+    batch = EnemyBatch(capacity=4, array_threshold=array_threshold)
+    spots = rng.uniform(1.0, SIZE - 1.0, (count, 2))
+    spots[count // 2:] = spots[0] + rng.normal(0.0, 1.0, (count - count // 2, 2)) # A huddle
+    spots[1] = spots[2]
+    enemies = []
+    for k, (x, z) in enumerate(spots.tolist()):
+        archetype = SimpleNamespace(collision_radius=0.5 + 0.1 * (k % 3), model_height=1.5, damage=2,
+                                    color=(0.5, 0.5, 0.5))
+        enemy = SimpleNamespace(pos=[x, 1.0, z], archetype=archetype, slot=None)
+        batch.add(enemy, speed=2.0 + k % 4, reload_time=1.5, shoot_cooldown=float(rng.uniform(0.0, 2.0)))
+        enemies.append(enemy)
+    batch.remove(enemies[3])
+    return batch
+
+
+@pytest.mark.parametrize('count', [6, 45])
+def test_scalar_and_array_steps_agree(count):
+    obstacles = ObstacleGrid(SIZE, SIZE, 1.0, BOXES)
+    flow = FlowField(obstacles)
+    flow.update(PLAYER[0], PLAYER[2])
+    neighbours = NeighbourIndex(SIZE, SIZE, 3.0)
+    scalar, arrays = crowd(count, np.inf), crowd(count, 0)
+    fired = 0
+    for tick in range(120):
+        shots = []
+        for batch in (scalar, arrays):
+            slots = batch.step(1 / 60.0, PLAYER, 3.0, 20.0, SIZE, SIZE, flow, neighbours, 6, 1.5)
+            shots.append((list(slots), batch.muzzle_shots(np.array(slots, dtype=np.int64), PLAYER, 0.6)))
+        (scalar_slots, (scalar_start, scalar_dir)), (array_slots, (array_start, array_dir)) = shots
+        assert scalar_slots == array_slots, tick
+        assert np.allclose(scalar_start, array_start) and np.allclose(scalar_dir, array_dir)
+        live = scalar.live_slots()
+        assert np.allclose(scalar.pos[live], arrays.pos[live]), tick
+        assert np.allclose(scalar.rotation_y[live], arrays.rotation_y[live])
+        assert np.allclose(scalar.shoot_cooldown[live], arrays.shoot_cooldown[live])
+        fired += len(scalar_slots)
+    assert fired
+    assert not obstacles.contains(scalar.pos[live, 0], scalar.pos[live, 2]).any()
+
+
+def test_step_picks_the_path_by_live_count():
+    batch = crowd(6, 6)
+    calls = []
+    batch._step_each = lambda slots, *args: calls.append(slots) or []
+    batch.step(1 / 60.0, PLAYER, 3.0, 20.0, SIZE, SIZE) # Five live: below the threshold
+    assert calls == [[0, 1, 2, 4, 5]]
+    assert EnemyBatch().step(1 / 60.0, PLAYER, 3.0, 20.0, SIZE, SIZE) == []
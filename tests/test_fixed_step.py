@@ -0,0 +1,41 @@
+from fixed_step import FixedStepScheduler
+
+# A power-of-two tick rate keeps every sum below exact in binary floating point
+DT = 1 / 64.0
+
+
+def test_runs_whole_ticks_and_banks_the_remainder():
+    scheduler = FixedStepScheduler(tick_rate=64.0)
+    steps = []
+    assert scheduler.advance(2.5 * DT, steps.append) == 2
+    assert steps == [DT, DT]
+    assert scheduler.alpha() == 0.5
+    assert scheduler.advance(0.5 * DT, steps.append) == 1
+    assert scheduler.ticks == 3
+    assert scheduler.alpha() == 0.0
+
+
+def test_short_frames_accumulate_into_a_tick():
+    scheduler = FixedStepScheduler(tick_rate=64.0)
+    steps = []
+    for _ in range(3):
+        assert scheduler.advance(0.25 * DT, steps.append) == 0
+    assert scheduler.advance(0.5 * DT, steps.append) == 1
+    assert scheduler.alpha() == 0.25
+
+
+def test_catches_up_to_the_limit_then_drops_the_backlog():
+    scheduler = FixedStepScheduler(tick_rate=64.0, max_catch_up=5)
+    steps = []
+    assert scheduler.advance(64.5 * DT, steps.append) == 5 # A one-second stall owes 64 ticks
+    assert len(steps) == 5
+    assert scheduler.dropped_time == 59 * DT
+    assert scheduler.alpha() == 0.5 # The partial tick survives the drop
+    assert scheduler.advance(0.0, steps.append) == 0
+    assert scheduler.ticks == 5
+
+
+def test_negative_frame_time_is_ignored():
+    scheduler = FixedStepScheduler(tick_rate=64.0)
+    assert scheduler.advance(-1.0, lambda dt: None) == 0
+    assert scheduler.accumulator == 0.0
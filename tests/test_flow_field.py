@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+import pytest
+
+from flow_field import FlowField, ObstacleGrid
+
+# A 20 x 20 room split by a wall along x = 9..11 that leaves a gap for z > 15
+WALL = (9.0, 0.0, 11.0, 15.0)
+
+
+def room(*boxes):
+    return ObstacleGrid(20.0, 20.0, 1.0, boxes or (WALL,))
+
+
+def walk(field, x, z, limit=200):
+    """(cells visited, path cost) following the field one cell per step from x/z until it stops."""
+    grid = field.obstacles
+    visited, cost = [grid.cell_of(x, z)], 0.0
+    for _ in range(limit):
+        fx, fz, _ = field.sample_one(x, z)
+        if fx == 0 and fz == 0:
+            break
+        step = 1.0 / max(abs(fx), abs(fz)) # One whole cell along each axis the step moves on
+        x, z = x + fx * step, z + fz * step
+        visited.append(grid.cell_of(x, z))
+        cost += step
+    return visited, cost
+
+
+def test_walls_block_their_cells():
+    grid = room()
+    assert grid.blocked[9:11, 0:15].all()
+    assert not grid.blocked[9:11, 15:].any()
+    assert grid.blocked.sum() == 30
+
+
+def test_routes_around_the_wall_through_the_gap():
+    field = FlowField(room())
+    assert field.update(15.5, 2.5)
+    goal = field.obstacles.cell_of(15.5, 2.5)
+    visited, cost = walk(field, 5.5, 2.5)
+    assert visited[-1] == goal
+    grid = field.obstacles
+    assert not any(grid.blocked.flat[cell] for cell in visited)
+    assert max(cell % grid.rows for cell in visited) >= 15 # Went up through the gap
+    assert cost == pytest.approx(field.dist[grid.cell_of(5.5, 2.5)]) # Along a shortest path
+
+
+def test_sight_and_recompute_only_on_a_new_cell():
+    field = FlowField(room())
+    field.update(15.5, 2.5)
+    assert not field.sample_one(5.5, 2.5)[2] # Behind the wall
+    assert field.sample_one(15.5, 12.5)[2]
+    assert not field.update(15.9, 2.1) # Same cell: the field stands
+    assert field.update(16.5, 2.5)
+    assert field.recomputes == 2
+
+
+def test_scalar_sample_matches_arrays():
+    field = FlowField(room((4.0, 4.0, 6.0, 12.0), WALL))
+    field.update(17.5, 3.5)
+    rng = np.random.default_rng(5)
+    xs, zs = rng.uniform(0, 20, 300), rng.uniform(0, 20, 300)
+    fx, fz, sight = field.sample(xs, zs)
+    for k in range(300):
+        assert field.sample_one(float(xs[k]), float(zs[k])) == (fx[k], fz[k], sight[k])
+
+
+def test_several_goals_lead_each_cell_to_the_nearest():
+    boxes = ((4.0, 4.0, 6.0, 12.0), WALL)
+    goals = ((17.5, 3.5), (2.5, 17.5), (5.5, 2.5))
+    field = FlowField(room(*boxes))
+    assert field.update([x for x, _ in goals], [z for _, z in goals])
+    singles = []
+    for x, z in goals:
+        single = FlowField(room(*boxes))
+        single.update(x, z)
+        singles.append(single)
+    dist = np.array([single.dist for single in singles])
+    assert np.array_equal(field.dist, dist.min(axis=0))
+    free = ~field.obstacles.blocked.ravel()
+    assert (field.goal_index[free] >= 0).all()
+    assert np.array_equal(dist[field.goal_index[free], np.flatnonzero(free)], field.dist[free])
+    own = field.goal_index == 1 # Cells leading to the second goal see it as a field aimed at it alone would
+    assert np.array_equal(field.in_sight[own], singles[1].in_sight[own])
+    visited, cost = walk(field, 15.5, 17.5)
+    assert visited[-1] == field.obstacles.cell_of(*goals[field.goal_index[visited[0]]])
+    assert cost == pytest.approx(field.dist[visited[0]]) # Along a shortest path to the nearest goal
+    assert not field.update([17.9, 2.1, 5.1], [3.1, 17.9, 2.9]) # Every goal in the same cell: the field stands
+
+
+def test_unreachable_cells_have_no_flow():
+    field = FlowField(room((9.0, 0.0, 11.0, 20.0))) # Wall from edge to edge
+    field.update(15.5, 2.5)
+    assert field.sample_one(5.5, 2.5) == (0.0, 0.0, False)
+    assert math.isinf(field.dist[field.obstacles.cell_of(5.5, 2.5)])
+
+
+def test_sweep_finds_the_first_wall():
+    grid = room((4.0, 0.0, 5.0, 20.0), WALL)
+    assert grid.sweep_one(0.0, 5.0, 20.0, 0.0) == pytest.approx(0.2)
+    assert grid.sweep_one(15.0, 5.0, -20.0, 0.0) == pytest.approx(0.2) # From the other side: the near wall
+    assert grid.sweep_one(0.0, 5.0, 3.0, 0.0) == math.inf # Stops short
+    assert grid.sweep_one(10.0, 5.0, 1.0, 1.0) == 0.0 # Starts inside
+    assert grid.sweep_one(12.0, 16.0, -10.0, 0.0) == pytest.approx(0.7) # Through the gap to the first wall
+    t = grid.sweep([0.0, 15.0, 0.0, 10.0, 12.0], [5.0, 5.0, 5.0, 5.0, 16.0],
+                   [20.0, -20.0, 3.0, 1.0, -10.0], [0.0, 0.0, 0.0, 1.0, 0.0])
+    assert t == pytest.approx([0.2, 0.2, math.inf, 0.0, 0.7])
+
+
+def test_push_out_moves_circles_clear_of_boxes():
+    grid = room()
+    assert grid.push_out_one(8.8, 5.0, 0.5) == pytest.approx((8.5, 5.0))
+    assert grid.push_out_one(9.2, 5.0, 0.5) == pytest.approx((8.5, 5.0)) # Centre inside: nearest side
+    assert grid.push_out_one(5.0, 5.0, 0.5) == (5.0, 5.0)
+    x, z = grid.push_out(np.array([8.8, 9.2, 5.0, 11.3]), np.array([5.0, 5.0, 5.0, 15.3]), 0.5)
+    assert x[:3] == pytest.approx([8.5, 8.5, 5.0])
+    assert math.hypot(x[3] - 11.0, z[3] - 15.0) == pytest.approx(0.5) # Off the corner, radially
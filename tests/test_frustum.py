@@ -0,0 +1,55 @@
+import numpy as np
+
+from frustum import CullCounter, Frustum, look_at_matrix, perspective_matrix
+
+
+def test_matrices_match_glu():
+    assert np.allclose(perspective_matrix(90.0, 2.0, 1.0, 100.0),
+                       [[0.5, 0.0, 0.0, 0.0], [0.0, 1.0, 0.0, 0.0],
+                        [0.0, 0.0, -101.0 / 99.0, -200.0 / 99.0], [0.0, 0.0, -1.0, 0.0]])
+    assert np.allclose(look_at_matrix((0.0, 0.0, 0.0), (0.0, 0.0, -1.0)), np.identity(4))
+    # Looking down +X from (1, 2, 3): world +X is the view's -Z
+    m = look_at_matrix((1.0, 2.0, 3.0), (5.0, 2.0, 3.0))
+    assert np.allclose(m @ [1.0, 2.0, 3.0, 1.0], [0.0, 0.0, 0.0, 1.0])
+    assert np.allclose(m @ [2.0, 2.0, 3.0, 1.0], [0.0, 0.0, -1.0, 1.0])
+    assert np.allclose(m @ [1.0, 3.0, 3.0, 1.0], [0.0, 1.0, 0.0, 1.0])
+
+
+def test_spheres_inside_outside_and_straddling():
+    # 90 degrees square from the origin down -Z: the side planes are x = +-z and y = +-z
+    frustum = Frustum(90.0, 1.0, 1.0, 100.0, (0.0, 0.0, 0.0), (0.0, 0.0, -1.0))
+    spheres = [((0.0, 0.0, -10.0), 1.0, True), # Dead centre
+               ((0.0, 0.0, 10.0), 1.0, False), # Behind the camera
+               ((20.0, 0.0, -10.0), 1.0, False), # Off to the right
+               ((10.5, 0.0, -10.0), 1.0, True), # Centre outside the right plane, but reaching in
+               ((0.0, -12.0, -10.0), 1.0, False), # Below
+               ((0.0, 0.0, -0.5), 0.2, False), # Before the near plane
+               ((0.0, 0.0, -0.5), 1.0, True), # Straddling it
+               ((0.0, 0.0, -100.5), 1.0, True), # Straddling the far plane
+               ((0.0, 0.0, -101.5), 1.0, False), # Beyond it
+               ((11.0, 11.0, -10.0), 1.3, True)] # Outside two planes near a corner: kept, erring on drawing
+    centers = [c for c, _, _ in spheres]
+    radii = [r for _, r, _ in spheres]
+    assert frustum.visible(centers, radii).tolist() == [shown for _, _, shown in spheres]
+    assert frustum.visible(centers, 1.0).tolist()[:5] == [True, False, False, True, False] # Scalar radius
+
+
+def test_points_agree_with_clip_space():
+    eye, target = (35.0, 12.0, 80.0), (35.0, 0.0, 35.0)
+    frustum = Frustum(60.0, 4.0 / 3.0, 0.5, 200.0, eye, target)
+    clip = perspective_matrix(60.0, 4.0 / 3.0, 0.5, 200.0) @ look_at_matrix(eye, target)
+    rng = np.random.default_rng(2)
+    points = rng.uniform(-150.0, 150.0, (5000, 3)) + (35.0, 0.0, 35.0)
+    h = np.c_[points, np.ones(len(points))] @ clip.T
+    inside = (h[:, 3] > 0) & (np.abs(h[:, :3]) <= h[:, 3:4]).all(axis=1)
+    assert 100 < inside.sum() < 4900
+    assert np.array_equal(frustum.visible(points, 0.0), inside)
+
+
+def test_cull_counter_counts_each_kind():
+    counter = CullCounter(('wolves', 'bullets'))
+    shown = counter.count('wolves', np.array([True, False, True, True]))
+    assert shown.tolist() == [0, 2, 3]
+    counter.count('bullets', np.zeros(5, dtype=bool))
+    assert counter.drawn == {'wolves': 3, 'bullets': 0}
+    assert counter.culled == {'wolves': 1, 'bullets': 5}
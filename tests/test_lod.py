@@ -0,0 +1,44 @@
+import numpy as np
+
+from lod import LodSelector
+
+
+def tiers(selector, distances, generations=1):
+    slots = np.arange(len(distances))
+    return selector.select(slots, distances, np.full(len(distances), generations, np.uint32)).tolist()
+
+
+def test_plain_thresholds_pick_the_tier():
+    selector = LodSelector([10.0, 30.0], hysteresis=2.0)
+    assert tiers(selector, [0.0, 9.0, 15.0, 29.0, 35.0, 100.0]) == [0, 0, 1, 1, 2, 2]
+
+
+def test_hysteresis_holds_the_tier_near_a_threshold():
+    selector = LodSelector([10.0, 30.0], hysteresis=2.0)
+    walk = [9.0, 11.0, 11.9, 12.1, 11.0, 8.1, 7.9, 9.0, 31.0, 32.5, 28.5, 27.9]
+    chosen = [tiers(selector, [d])[0] for d in walk]
+    assert chosen == [0, 0, 0, 1, 1, 1, 0, 0, 1, 2, 2, 1]
+
+
+def test_a_far_jump_crosses_several_tiers_at_once():
+    selector = LodSelector([10.0, 30.0], hysteresis=2.0)
+    assert tiers(selector, [5.0]) == [0]
+    assert tiers(selector, [40.0]) == [2]
+    assert tiers(selector, [9.0]) == [1] # Still inside the lower boundary's band
+    assert tiers(selector, [7.0]) == [0]
+
+
+def test_a_reused_slot_starts_fresh():
+    selector = LodSelector([10.0], hysteresis=2.0)
+    assert tiers(selector, [20.0], generations=1) == [1]
+    assert tiers(selector, [9.0], generations=1) == [1] # Same wolf inside the band: stays coarse
+    assert tiers(selector, [9.0], generations=2) == [0] # A new wolf in the slot: the plain threshold
+    assert tiers(selector, [11.0], generations=2) == [0] # And it keeps its own tier from then on
+
+
+def test_slots_beyond_capacity_grow_the_tables():
+    selector = LodSelector([10.0], hysteresis=1.0, capacity=2)
+    slots = np.array([0, 5, 70])
+    assert selector.select(slots, [20.0, 5.0, 20.0], np.ones(3, np.uint32)).tolist() == [1, 0, 1]
+    assert len(selector.tiers) == len(selector.generations) >= 71
+    assert selector.select(slots, [10.5, 10.5, 9.5], np.ones(3, np.uint32)).tolist() == [1, 0, 1]
@@ -0,0 +1,109 @@
+import pytest
+
+import coop
+import headless
+from replay import (KEYS, REMOVED, ReplayPlayer, ReplayRecorder, apply_changes, capture_inputs, input_changes, load_replay,
+                    state_digest)
+
+TICKS = 1500
+
+
+@pytest.fixture(scope='module', params=['project', 'project_1st_part'])
+def recording(request, tmp_path_factory):
+    """(path, digest at every tick) of an autopilot run recorded with seed 7."""
+    path = str(tmp_path_factory.mktemp('replay') / f'{request.param}.rpl')
+    game = headless.load_game(request.param)
+    world = game.GameWorld(game.world.campaign)
+    headless.reset_game(game, world, seed=7)
+    recorder = ReplayRecorder(path, request.param, 7, 1, headless.DEFAULT_TIMESTEP, world)
+    digests = [state_digest(world)]
+    for _ in range(TICKS):
+        headless.run(game, world, ticks=1, recorder=recorder)
+        digests.append(state_digest(world))
+    recorder.close()
+    return path, digests
+
+
+def test_header_and_tick_count_round_trip(recording):
+    path, _ = recording
+    game_name, seed, level, ticks = load_replay(path)
+    assert game_name in ('project', 'project_1st_part')
+    assert (seed, level, len(ticks)) == (7, 1, TICKS)
+    assert all(dt == headless.DEFAULT_TIMESTEP for dt, _ in ticks)
+    assert any(changes for _, changes in ticks) # The autopilot turned and fired
+
+
+def test_playback_reproduces_the_recorded_run(recording):
+    path, digests = recording
+    player = ReplayPlayer(path)
+    assert player.play() == TICKS
+    assert state_digest(player.world) == digests[-1]
+
+
+def test_seek_matches_straight_playback(recording):
+    path, digests = recording
+    player = ReplayPlayer(path, snapshot_every=200)
+    for tick in (TICKS, 700, 1300, 0, 450):
+        player.seek(tick)
+        assert player.tick == tick
+        assert state_digest(player.world) == digests[tick]
+
+
+class Inputs:
+    def __init__(self):
+        self.keys_pressed, self.special_keys_pressed, self.mouse_buttons, self.key_presses = {}, {}, {}, []
+
+
+def test_input_changes_round_trip_through_apply():
+    before, after = Inputs(), Inputs()
+    before.keys_pressed[b'w'] = True
+    after.keys_pressed[b'a'] = True
+    after.special_keys_pressed[300] = True # Wider than a byte
+    after.mouse_buttons[0] = "PROCESSED"
+    after.key_presses.append(b' ')
+    changes = input_changes(after, capture_inputs(before))
+    assert (KEYS, ord('w'), REMOVED) in changes
+    replayed = Inputs()
+    replayed.keys_pressed[b'w'] = True
+    apply_changes(replayed, changes)
+    assert replayed.keys_pressed == {b'a': True}
+    assert replayed.special_keys_pressed == {300: True}
+    assert replayed.mouse_buttons == {0: "PROCESSED"}
+    assert replayed.key_presses == [b' ']
+
+
+def test_unrecordable_inputs_are_rejected():
+    world = Inputs()
+    world.special_keys_pressed[0x10000] = True
+    with pytest.raises(ValueError):
+        input_changes(world, capture_inputs(Inputs()))
+    world = Inputs()
+    world.mouse_buttons[0] = 0x8000
+    with pytest.raises(ValueError):
+        input_changes(world, capture_inputs(Inputs()))
+
+
+@pytest.mark.parametrize('game_name', ['project', 'project_1st_part'])
+def test_coop_session_with_joins_and_leaves_plays_back(game_name, tmp_path):
+    path = str(tmp_path / 'coop.rpl')
+    game = headless.load_game(game_name)
+    world = game.GameWorld(game.world.campaign)
+    headless.reset_game(game, world, seed=7)
+    recorder = ReplayRecorder(path, game_name, 7, 1, headless.DEFAULT_TIMESTEP, world)
+    digests = []
+    for tick in range(900):
+        if tick in (100, 250):
+            game.add_player(world)
+        elif tick == 500:
+            coop.leave(world, world.players[0]) # The host leaves: the next hero takes over the world's tables
+        for _ in coop.hero_turns(world, standing_only=True):
+            headless.autopilot(game, world)
+        recorder.record_tick(headless.DEFAULT_TIMESTEP, lambda dt: game.update_game_state(world, dt))
+        digests.append(state_digest(world))
+    recorder.close()
+    assert [hero.number for hero in world.players] == [1, 2]
+    player = ReplayPlayer(path, snapshot_every=200)
+    for tick, numbers in ((300, [0, 1, 2]), (900, [1, 2]), (450, [0, 1, 2])):
+        player.seek(tick)
+        assert state_digest(player.world) == digests[tick - 1]
+        assert [hero.number for hero in player.world.players] == numbers
@@ -0,0 +1,43 @@
+import asyncio
+
+import headless
+import server
+from server import GameServer, ScriptedClient
+
+
+def test_loopback_gives_every_client_its_own_hero(capsys):
+    game_server, clients = server.main(['loopback', '--game', 'project_1st_part', '--clients', '2', '--ticks', '600',
+                                        '--seed', '7'])
+    capsys.readouterr()
+    assert sorted(client.hero_id for client in clients) == [0, 1]
+    for client in clients:
+        assert client.snapshots == 600
+        assert client.state.heroes['id'].tolist() == [0, 1] # Every snapshot carries both heroes
+        assert all(client.state.hero(other.hero_id)['yaw'] != 0 for other in clients) # Both turned to aim
+    assert len(game_server.world.players) == 1 # Both left; the last hero stays for the next client
+
+
+def test_a_client_leaving_takes_its_hero_out():
+    async def session():
+        game = headless.load_game('project_1st_part')
+        world = game.GameWorld(game.world.campaign)
+        headless.reset_game(game, world, seed=7)
+        game_server = GameServer(game, world)
+        tcp = await asyncio.start_server(game_server.handle_client, '127.0.0.1', 0)
+        port = tcp.sockets[0].getsockname()[1]
+        stayer, leaver = ScriptedClient(), ScriptedClient()
+        tasks = [asyncio.create_task(stayer.run('127.0.0.1', port)),
+                 asyncio.create_task(leaver.run('127.0.0.1', port, ticks=100))]
+        while len(game_server.clients) < 2:
+            await asyncio.sleep(0.01)
+        async with tcp:
+            await game_server.run(400, realtime=False)
+            players = [player.number for player in world.players]
+            await game_server.close()
+        await asyncio.gather(*tasks)
+        return stayer, leaver, players
+
+    stayer, leaver, players = asyncio.run(session())
+    assert stayer.hero_id != leaver.hero_id
+    assert players == [stayer.hero_id]
+    assert stayer.state.hero(leaver.hero_id) is None and stayer.state.hero(stayer.hero_id) is not None
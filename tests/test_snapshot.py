@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+import headless
+from snapshot import BULLET, ENEMY, CRC, HERO, SnapshotError, WorldState, decode, encode, quantize
+
+
+HERO_ROW = (0, 2560, 256, 2560, 16384, -1500, 90, 420, 0b101) # id, x, y, z, yaw, pitch, health, score, perks
+
+
+def state(tick, enemies=(), gens=None, types=None, bullets=(), heroes=(HERO_ROW,)):
+    """WorldState at tick with enemy rows (slot, x, z, rot, health), bullet rows (id, x, y, z) fired at tick id
+    and hero rows (HERO fields)."""
+    enemies = np.array(list(enemies), ENEMY)
+    gens = np.zeros(len(enemies), np.uint32) if gens is None else np.array(gens, np.uint32)
+    types = np.array(['1'] * len(enemies) if types is None else types, dtype=object)
+    rows = np.zeros(len(bullets), BULLET)
+    for row, (bullet_id, x, y, z) in zip(rows, bullets):
+        row['id'], row['x'], row['y'], row['z'], row['dx'], row['birth'] = bullet_id, x, y, z, 32767, bullet_id
+    return WorldState((tick, 0, 1, 2, len(heroes)), np.array(list(heroes), HERO), enemies, gens, types, rows)
+
+
+def assert_same(decoded, expected):
+    assert decoded.header[0] == expected.header[0] and decoded.header[2:] == expected.header[2:]
+    assert decoded.heroes.tobytes() == expected.heroes.tobytes()
+    assert decoded.enemies.tobytes() == expected.enemies.tobytes()
+    assert decoded.enemy_types.tolist() == expected.enemy_types.tolist()
+    assert decoded.bullets.tobytes() == expected.bullets.tobytes()
+
+
+def test_full_snapshot_round_trip():
+    first = state(10, [(0, 100, 200, 3, 5), (4, 60000, 7, 255, 15)], types=['1', 'boss'], bullets=[(7, 1, 2, 3)])
+    assert_same(decode(None, encode(first)), first)
+
+
+def test_delta_round_trip_covers_every_section():
+    base = state(10, [(0, 100, 200, 3, 5), (1, 500, 500, 0, 3), (2, 9000, 9000, 10, 3), (3, 40, 40, 0, 3)],
+                 gens=[1, 1, 1, 1], bullets=[(7, 1, 2, 3), (8, 4, 5, 6)])
+    nxt = state(11, [(0, 100, 200, 3, 5), # Unchanged
+                     (1, 480, 600, 250, 3), # Nudged, facing wrapping past zero
+                     (2, 1000, 9000, 10, 1), # Moved too far for a nudge, and hurt
+                     (3, 70, 70, 0, 3), # Slot reused by a new wolf
+                     (5, 8, 8, 8, 15)], # Spawned
+                gens=[1, 1, 1, 2, 1], types=['1', '1', '1', '2', 'boss'], bullets=[(8, 4, 5, 6), (9, 7, 8, 9)])
+    client = decode(None, encode(base))
+    data = encode(nxt, base)
+    assert_same(decode(client, data), nxt)
+    # An unchanged world costs the header, the hero rows, the section mask and the CRC
+    assert len(encode(nxt, nxt)) == len(encode(state(11), state(11)))
+
+
+def test_every_hero_is_sent_and_found_by_id():
+    heroes = ((0, 2560, 256, 2560, 0, 0, 100, 30, 0), (3, 2600, 256, 2500, 32768, 0, 0, 75, 0b1),
+              (4, 2500, 256, 2612, 100, -200, 40, 0, 0))
+    base = state(10, [(0, 100, 200, 3, 5)], heroes=heroes)
+    nxt = state(11, [(0, 100, 200, 3, 5)], heroes=heroes[1:]) # Hero 0 left
+    client = decode(None, encode(base))
+    assert_same(client, base)
+    assert client.hero(3)['score'] == 75 and client.hero(4)['health'] == 40
+    client = decode(client, encode(nxt, base))
+    assert_same(client, nxt)
+    assert client.hero(0) is None and client.heroes['id'].tolist() == [3, 4]
+
+
+def test_crc_catches_a_diverged_client():
+    base = state(10, [(0, 100, 200, 3, 5)])
+    nxt = state(11, [(0, 101, 200, 3, 5)])
+    client = decode(None, encode(base))
+    client.enemies['x'][0] += 1 # The client's copy drifted from what the server thinks it holds
+    with pytest.raises(SnapshotError, match="CRC"):
+        decode(client, encode(nxt, base))
+
+
+def test_corrupt_or_mismatched_snapshots_are_rejected():
+    base = state(10, [(0, 100, 200, 3, 5)])
+    nxt = state(11, [(0, 101, 200, 3, 4)])
+    data = bytearray(encode(nxt, base))
+    client = decode(None, encode(base))
+    data[-CRC.size - 1] ^= 0x01 # Flip a bit in the health change
+    with pytest.raises(SnapshotError, match="CRC"):
+        decode(client, bytes(data))
+    with pytest.raises(SnapshotError, match="truncated"):
+        decode(client, encode(nxt, base)[:-2])
+    with pytest.raises(SnapshotError, match="against tick"):
+        decode(None, encode(nxt, base)) # The client does not hold tick 10
+
+
+@pytest.mark.parametrize('game_name', ['project', 'project_1st_part'])
+def test_game_snapshots_decode_tick_after_tick(game_name):
+    game = headless.load_game(game_name)
+    world = game.GameWorld(game.world.campaign)
+    headless.reset_game(game, world, seed=7)
+    timestep = headless.DEFAULT_TIMESTEP
+    server_base = client = None
+    sizes = []
+    for tick in range(1, 601):
+        headless.run(game, world, ticks=1)
+        current = quantize(game, world, tick, timestep)
+        if tick % 3: # Send every third tick, each against the last one the client acknowledged
+            continue
+        data = encode(current, server_base)
+        client = decode(client, data)
+        assert_same(client, current)
+        server_base = current
+        sizes.append(len(data))
+    assert max(sizes[1:]) < sizes[0] + 200 # Deltas grow with what changed, not with what is alive
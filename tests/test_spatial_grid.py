@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from spatial_grid import NeighbourIndex, SpatialGrid
+
+
+def brute_k_nearest(xs, zs, k, radius):
+    """Per point, the distances to its k nearest other points within radius, padded with inf."""
+    d = np.hypot(xs[:, None] - xs, zs[:, None] - zs)
+    np.fill_diagonal(d, np.inf)
+    d[d > radius] = np.inf
+    d.sort(axis=1)
+    padded = np.full((len(xs), k), np.inf)
+    padded[:, :min(k, len(xs))] = d[:, :k]
+    return padded
+
+
+def assert_exact(index, xs, zs, k):
+    near, dist = index.k_nearest(xs, zs, k)
+    assert near.shape == dist.shape == (len(xs), k)
+    assert np.array_equal(dist, brute_k_nearest(xs, zs, k, index.radius))
+    found = near >= 0
+    assert np.array_equal(found, np.isfinite(dist))
+    row = np.broadcast_to(np.arange(len(xs))[:, None], near.shape)
+    assert not (near == row).any()
+    assert np.allclose(np.hypot(xs[near[found]] - xs[row[found]], zs[near[found]] - zs[row[found]]), dist[found])
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('k', [1, 6, 40])
+def test_k_nearest_matches_brute_force(seed, k):
+    rng = np.random.default_rng(seed)
+    index = NeighbourIndex(50.0, 50.0, 2.5)
+    xs, zs = rng.uniform(0.0, 50.0, 300), rng.uniform(0.0, 50.0, 300)
+    assert_exact(index, xs, zs, k)
+
+
+def test_k_nearest_across_cell_boundaries():
+    index = NeighbourIndex(20.0, 20.0, 2.0)
+    rng = np.random.default_rng(9)
+    # Points hugging the cell lines x, z = 2, 4, 6, ... from both sides, and the grid's outer edges
+    lines = rng.integers(0, 11, (400, 2)) * 2.0
+    xs, zs = (lines + rng.choice([-1e-9, 0.0, 1e-9, -0.01, 0.01], (400, 2))).T
+    assert_exact(index, np.clip(xs, 0.0, 20.0), np.clip(zs, 0.0, 20.0), 6)
+
+
+def test_k_larger_than_the_neighbourhood():
+    index = NeighbourIndex(30.0, 30.0, 3.0)
+    xs = np.array([1.0, 2.0, 3.5, 10.0, 29.9, 15.0, 15.0, 15.1])
+    zs = np.array([1.0, 1.5, 1.0, 10.0, 29.9, 15.0, 15.0, 16.0])
+    assert_exact(index, xs, zs, 12)
+    near, dist = index.k_nearest(xs, zs, 12)
+    assert (near[3] == -1).all() and np.isinf(dist[3]).all() # Alone
+    assert near[5, 0] == 6 and dist[5, 0] == 0.0 # Stacked on another
+    assert_exact(index, np.array([]), np.array([]), 3)
+    assert_exact(index, np.array([5.0]), np.array([5.0]), 3)
+
+
+def test_outside_points_are_clamped_to_the_edge_cells():
+    index = NeighbourIndex(10.0, 10.0, 2.0)
+    xs, zs = np.array([-0.5, 0.5, 10.5, 9.5]), np.array([5.0, 5.0, 5.0, 5.0])
+    assert_exact(index, xs, zs, 2)
+
+
+def test_insert_and_query_point():
+    grid = SpatialGrid(10.0, 10.0, 2.0)
+    a, b, c = object(), object(), object()
+    grid.insert(a, 1.0, 1.0)
+    grid.insert(b, 3.0, 3.0, radius=1.5) # Covers cells 0..2 on both axes
+    grid.insert(c, 50.0, -5.0) # Clamped to the edge cell
+    assert list(grid.query_point(1.5, 1.5)) == [a, b]
+    assert list(grid.query_point(7.0, 7.0)) == []
+    assert list(grid.query_point(4.5, 0.5)) == [b]
+    assert list(grid.query_point(9.9, 0.1)) == [c]
+    mask = grid.occupied_mask()
+    assert mask.sum() == len(grid.cells) == 10
+    assert mask[grid.cell_keys(np.array([1.0, 7.0, 9.0]), np.array([1.0, 7.0, 1.0]))].tolist() == [True, False, True]
+    grid.clear()
+    assert not grid.occupied_mask().any()
+
+
+def test_query_radius_is_a_superset_of_a_brute_force_filter():
+    rng = np.random.default_rng(4)
+    grid = SpatialGrid(40.0, 40.0, 3.0)
+    points = rng.uniform(0.0, 40.0, (500, 2))
+    radii = rng.uniform(0.0, 1.0, 500)
+    items = list(range(500))
+    for item, (x, z), r in zip(items, points.tolist(), radii.tolist()):
+        grid.insert(item, x, z, r)
+    for x, z, r in rng.uniform([0.0, 0.0, 0.1], [40.0, 40.0, 6.0], (200, 3)).tolist():
+        found = grid.query_radius(x, z, r)
+        assert len(found) == len(set(found)) # No duplicates
+        within = np.flatnonzero(np.hypot(points[:, 0] - x, points[:, 1] - z) <= r + radii)
+        assert set(within.tolist()) <= set(found)
+        # Nothing further away than the cells the query square and each item's bounds can share
+        reach = r + radii[found] + 2 * 3.0 * np.sqrt(2.0)
+        assert (np.hypot(points[found, 0] - x, points[found, 1] - z) <= reach).all()
@@ -0,0 +1,66 @@
+import random
+
+import numpy as np
+
+from spawn_placement import BLOCK_CHUNK, SpawnPlacer
+
+
+def test_sample_never_lands_in_a_keep_out_disc():
+    placer = SpawnPlacer(0.0, 0.0, 30.0, 20.0, cell_size=1.0)
+    rng = random.Random(3)
+    points = np.array([[15.0, 10.0], [3.2, 4.7], [29.5, 0.5]])
+    placer.block(points, 4.0)
+    assert 0 < placer.free_cells() < placer.cols * placer.rows
+    for _ in range(2000):
+        x, z = placer.sample(rng)
+        assert 0.0 <= x < 30.0 and 0.0 <= z < 20.0
+        assert (np.hypot(points[:, 0] - x, points[:, 1] - z) >= 4.0).all()
+        assert placer.free[int(x), int(z)]
+
+
+def test_block_only_closes_cells_a_disc_can_reach():
+    placer = SpawnPlacer(-10.0, -10.0, 10.0, 10.0, cell_size=0.5)
+    placer.block([(0.1, -0.3)], 2.0)
+    i, j = np.meshgrid(np.arange(placer.cols), np.arange(placer.rows), indexing='ij')
+    cx, cz = -10.0 + (i + 0.5) * 0.5, -10.0 + (j + 0.5) * 0.5
+    reach = np.hypot(cx - 0.1, cz + 0.3)
+    assert (~placer.free[reach < 2.0]).all() # Every cell whose centre is in the disc
+    assert placer.free[reach >= 2.0 + placer.half_diagonal].all() # And nothing that cannot touch it
+
+
+def test_many_points_block_in_chunks():
+    placer = SpawnPlacer(0.0, 0.0, 100.0, 100.0, cell_size=2.0)
+    rng = np.random.default_rng(1)
+    points = rng.uniform(0.0, 100.0, (BLOCK_CHUNK * 3 + 7, 2))
+    placer.block(points, 1.0)
+    one_by_one = SpawnPlacer(0.0, 0.0, 100.0, 100.0, cell_size=2.0)
+    for point in points:
+        one_by_one.block(point, 1.0)
+    assert np.array_equal(placer.free, one_by_one.free)
+
+
+def test_full_arena_returns_none_and_reset_reopens_it():
+    placer = SpawnPlacer(0.0, 0.0, 10.0, 10.0)
+    placer.block([(5.0, 5.0)], 20.0)
+    assert placer.free_cells() == 0
+    assert placer.sample(random.Random(0)) is None
+    placer.reset()
+    assert placer.free_cells() == 100
+    assert placer.sample(random.Random(0)) is not None
+
+
+def test_close_blocks_boxes_for_good():
+    placer = SpawnPlacer(0.0, 0.0, 20.0, 20.0)
+    placer.close([(8.0, 0.0, 12.0, 20.0)], 1.0) # A wall across the whole arena; cell centres 6.5 and 13.5 are in reach
+    assert not placer.free[6:14].any()
+    assert placer.free[:6].all() and placer.free[14:].all()
+    rng = random.Random(5)
+    for _ in range(500):
+        x, _ = placer.sample(rng)
+        assert x < 6.0 or x >= 14.0
+    placer.block([(3.0, 10.0)], 1.0)
+    placer.reset()
+    assert placer.free_cells() == np.count_nonzero(placer.open) == 12 * 20
+    placer.close([(0.0, 0.0, 20.0, 20.0)], 0.0)
+    placer.reset()
+    assert placer.sample(rng) is None
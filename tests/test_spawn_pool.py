@@ -0,0 +1,46 @@
+import random
+from collections import Counter
+
+from spawn_pool import SpawnPool
+
+
+def test_counts_track_take_and_put_back():
+    pool = SpawnPool(['boss', 1, 1, 2, 2, 2], priority=('boss',))
+    assert len(pool) == 6
+    assert pool.counts == {'boss': 1, 1: 2, 2: 3}
+    assert pool.drawable == 5
+    assert pool.take('boss')
+    assert not pool.take('boss')
+    assert 'boss' not in pool
+    assert pool.take(2)
+    assert (len(pool), pool.drawable, pool.counts[2]) == (4, 4, 2)
+    pool.put_back(2)
+    pool.put_back('boss')
+    assert (len(pool), pool.drawable, pool.counts) == (6, 5, {'boss': 1, 1: 2, 2: 3})
+    assert not pool.take(3)
+
+
+def test_draw_spends_exactly_the_non_priority_types():
+    types = ['boss'] + [1] * 40 + [2] * 25 + [3] * 10
+    pool = SpawnPool(types, priority=('boss',))
+    rng = random.Random(4)
+    drawn = []
+    while True:
+        type_id = pool.draw(rng)
+        if type_id is None:
+            break
+        drawn.append(type_id)
+    assert Counter(drawn) == {1: 40, 2: 25, 3: 10}
+    assert (len(pool), pool.drawable, 'boss' in pool) == (1, 0, True) # Only the boss is left for the caller
+    assert pool.take('boss') and not pool
+
+
+def test_draw_matches_random_choice_on_the_old_list():
+    types = [1] * 5 + [2] * 3 + [3] * 4
+    pool, old = SpawnPool(types), list(types)
+    a, b = random.Random(11), random.Random(11)
+    while old:
+        expected = b.choice(old)
+        old.remove(expected)
+        assert pool.draw(a) == expected
+    assert pool.draw(a) is None and len(pool) == 0